@@ -0,0 +1,79 @@
+"""add billsummary aggregate table
+
+Revision ID: 0008_add_bill_summary
+Revises: 0007_add_bill_templates
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0008_add_bill_summary"
+down_revision = "0007_add_bill_templates"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    summary = op.create_table(
+        "billsummary",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("company_id", sa.Integer(), nullable=True),
+        sa.Column("community_id", sa.Integer(), nullable=True),
+        sa.Column("period", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("bill_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "total_amount", sa.Numeric(18, 4), nullable=False, server_default="0"
+        ),
+        sa.Column("paid_amount", sa.Numeric(18, 4), nullable=False, server_default="0"),
+        sa.UniqueConstraint(
+            "company_id",
+            "community_id",
+            "period",
+            "status",
+            name="uq_billsummary_scope",
+        ),
+    )
+    op.create_index("ix_billsummary_company_id", "billsummary", ["company_id"])
+
+    # Backfill from existing bills; periods are folded in Python so the SQL
+    # stays portable between SQLite and PostgreSQL.
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text(
+            "SELECT company_id, community_id, cycle_start, status, COUNT(id), "
+            "COALESCE(SUM(total_amount), 0) FROM bill "
+            "GROUP BY company_id, community_id, cycle_start, status"
+        )
+    ).fetchall()
+    buckets = defaultdict(lambda: [0, Decimal("0")])
+    for company_id, community_id, cycle_start, status, count, total in rows:
+        key = (company_id, community_id, str(cycle_start)[:7], status)
+        buckets[key][0] += count
+        buckets[key][1] += Decimal(str(total))
+    if buckets:
+        op.bulk_insert(
+            summary,
+            [
+                {
+                    "company_id": k[0],
+                    "community_id": k[1],
+                    "period": k[2],
+                    "status": k[3],
+                    "bill_count": v[0],
+                    "total_amount": v[1],
+                    "paid_amount": Decimal("0"),
+                }
+                for k, v in buckets.items()
+            ],
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_billsummary_company_id", table_name="billsummary")
+    op.drop_table("billsummary")
@@ -0,0 +1,23 @@
+"""add bill (status, unit_id) index for arrears aggregation
+
+Revision ID: 0009_add_bill_status_index
+Revises: 0008_add_bill_summary
+Create Date: 2026-10-19 00:10:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0009_add_bill_status_index"
+down_revision = "0008_add_bill_summary"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # `payment` and its bill_id/unit_id indexes already exist (0001_add_payment)
+    op.create_index("ix_bill_status_unit", "bill", ["status", "unit_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bill_status_unit", table_name="bill")
@@ -0,0 +1,27 @@
+"""add composite indexes for unit history paging
+
+Revision ID: 0010_add_unit_history_indexes
+Revises: 0009_add_bill_status_index
+Create Date: 2026-10-19 00:20:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0010_add_unit_history_indexes"
+down_revision = "0009_add_bill_status_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # bills are already covered by the unique (unit_id, cycle_start) index
+    op.create_index(
+        "ix_lease_unit_dates", "lease", ["unit_id", "start_date", "end_date"]
+    )
+    op.create_index("ix_payment_unit_received", "payment", ["unit_id", "received_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_payment_unit_received", table_name="payment")
+    op.drop_index("ix_lease_unit_dates", table_name="lease")
@@ -0,0 +1,29 @@
+"""add unique constraint for meterreading (meter_id, period)
+
+Revision ID: 0011_add_meterreading_unique
+Revises: 0010_add_unit_history_indexes
+Create Date: 2026-10-19 00:30:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0011_add_meterreading_unique"
+down_revision = "0010_add_unit_history_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Fails if duplicate readings already exist; dedupe them first (see the
+    # approach in 0005_fixup_remove_duplicate_meters).
+    op.create_index(
+        "uq_meterreading_meter_period",
+        "meterreading",
+        ["meter_id", "period"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_meterreading_meter_period", table_name="meterreading")
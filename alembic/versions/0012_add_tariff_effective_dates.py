@@ -0,0 +1,62 @@
+"""add effective_from/effective_to to tariffwater
+
+Revision ID: 0012_add_tariff_effective_dates
+Revises: 0011_add_meterreading_unique
+Create Date: 2026-10-19 01:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0012_add_tariff_effective_dates"
+down_revision = "0011_add_meterreading_unique"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Older databases got tariffwater from SQLModel create_all rather than a
+    # migration, so create it here when it is missing.
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("tariffwater"):
+        op.create_table(
+            "tariffwater",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(
+                "company_id", sa.Integer(), sa.ForeignKey("company.id"), nullable=True
+            ),
+            sa.Column(
+                "community_id",
+                sa.Integer(),
+                sa.ForeignKey("community.id"),
+                nullable=True,
+            ),
+            sa.Column("cold_price", sa.Numeric(), nullable=False),
+            sa.Column("hot_price", sa.Numeric(), nullable=False),
+            sa.Column("effective_from", sa.Date(), nullable=True),
+            sa.Column("effective_to", sa.Date(), nullable=True),
+        )
+    else:
+        op.add_column(
+            "tariffwater", sa.Column("effective_from", sa.Date(), nullable=True)
+        )
+        op.add_column(
+            "tariffwater", sa.Column("effective_to", sa.Date(), nullable=True)
+        )
+    op.create_index(
+        "ix_tariffwater_community_from",
+        "tariffwater",
+        ["community_id", "effective_from"],
+    )
+    op.create_index(
+        "ix_tariffwater_company_from", "tariffwater", ["company_id", "effective_from"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tariffwater_company_from", table_name="tariffwater")
+    op.drop_index("ix_tariffwater_community_from", table_name="tariffwater")
+    with op.batch_alter_table("tariffwater") as batch_op:
+        batch_op.drop_column("effective_to")
+        batch_op.drop_column("effective_from")
@@ -0,0 +1,55 @@
+"""enforce lease non-overlap in the database
+
+Revision ID: 0013_add_lease_no_overlap
+Revises: 0012_add_tariff_effective_dates
+Create Date: 2026-10-19 01:30:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0013_add_lease_no_overlap"
+down_revision = "0012_add_tariff_effective_dates"
+branch_labels = None
+depends_on = None
+
+# Same rule as assert_no_lease_overlap: inclusive dates, NULL end_date is
+# open-ended.
+_SQLITE_OVERLAP = (
+    "SELECT 1 FROM lease AS l WHERE l.unit_id = NEW.unit_id"
+    " AND (NEW.end_date IS NULL OR l.start_date <= NEW.end_date)"
+    " AND (l.end_date IS NULL OR l.end_date >= NEW.start_date)"
+)
+
+
+def upgrade() -> None:
+    # Fails if overlapping leases already exist; resolve them first.
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        op.execute(
+            "ALTER TABLE lease ADD CONSTRAINT ex_lease_unit_period "
+            "EXCLUDE USING gist "
+            "(unit_id WITH =, daterange(start_date, end_date, '[]') WITH &&)"
+        )
+    elif dialect == "sqlite":
+        op.execute(
+            "CREATE TRIGGER trg_lease_no_overlap_insert BEFORE INSERT ON lease "
+            f"WHEN EXISTS ({_SQLITE_OVERLAP}) "
+            "BEGIN SELECT RAISE(ABORT, 'lease overlaps existing lease'); END"
+        )
+        op.execute(
+            "CREATE TRIGGER trg_lease_no_overlap_update "
+            "BEFORE UPDATE OF unit_id, start_date, end_date ON lease "
+            f"WHEN EXISTS ({_SQLITE_OVERLAP} AND l.id != NEW.id) "
+            "BEGIN SELECT RAISE(ABORT, 'lease overlaps existing lease'); END"
+        )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("ALTER TABLE lease DROP CONSTRAINT ex_lease_unit_period")
+    elif dialect == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS trg_lease_no_overlap_update")
+        op.execute("DROP TRIGGER IF EXISTS trg_lease_no_overlap_insert")
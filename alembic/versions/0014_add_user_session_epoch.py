@@ -0,0 +1,31 @@
+"""add session_epoch to user
+
+Revision ID: 0014_add_user_session_epoch
+Revises: 0013_add_lease_no_overlap
+Create Date: 2026-10-19 02:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0014_add_user_session_epoch"
+down_revision = "0013_add_lease_no_overlap"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Session cookies embed the epoch they were issued under; bumping it
+    # revokes every outstanding cookie of the user.
+    op.add_column(
+        "user",
+        sa.Column(
+            "session_epoch", sa.Integer(), nullable=False, server_default=sa.text("0")
+        ),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.drop_column("session_epoch")
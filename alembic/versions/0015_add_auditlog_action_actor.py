@@ -0,0 +1,31 @@
+"""add action and actor_id to auditlog
+
+Revision ID: 0015_add_auditlog_action_actor
+Revises: 0014_add_user_session_epoch
+Create Date: 2026-10-19 02:30:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0015_add_auditlog_action_actor"
+down_revision = "0014_add_user_session_epoch"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "auditlog",
+        sa.Column(
+            "action", sa.String(length=64), nullable=False, server_default=sa.text("''")
+        ),
+    )
+    op.add_column("auditlog", sa.Column("actor_id", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("auditlog") as batch_op:
+        batch_op.drop_column("actor_id")
+        batch_op.drop_column("action")
@@ -0,0 +1,27 @@
+"""add search indexes to the legacy auditlog table
+
+Revision ID: 0016_add_auditlog_indexes
+Revises: 0015_add_auditlog_action_actor
+Create Date: 2026-10-19 03:00:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0016_add_auditlog_indexes"
+down_revision = "0015_add_auditlog_action_actor"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # New audit rows go to monthly auditlog_YYYYMM partitions created at
+    # runtime (app.audit) with the same indexes; this table keeps the rows
+    # written before partitioning.
+    op.create_index("ix_auditlog_table_row", "auditlog", ["table_name", "row_id"])
+    op.create_index("ix_auditlog_actor_created", "auditlog", ["actor_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_auditlog_actor_created", table_name="auditlog")
+    op.drop_index("ix_auditlog_table_row", table_name="auditlog")
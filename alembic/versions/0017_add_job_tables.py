@@ -0,0 +1,44 @@
+"""add joblock and jobrun tables for the scheduler
+
+Revision ID: 0017_add_job_tables
+Revises: 0016_add_auditlog_indexes
+Create Date: 2026-10-19 04:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0017_add_job_tables"
+down_revision = "0016_add_auditlog_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "joblock",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("owner", sa.String(), nullable=False),
+        sa.Column("acquired_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+    op.create_table(
+        "jobrun",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("job_id", sa.String(), nullable=False),
+        sa.Column("trigger", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("owner", sa.String(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("result", sa.Text(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_jobrun_job_started", "jobrun", ["job_id", "started_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobrun_job_started", table_name="jobrun")
+    op.drop_table("jobrun")
+    op.drop_table("joblock")
@@ -0,0 +1,66 @@
+"""create tables that were only ever made by create_all
+
+Revision ID: 0018_add_missing_tables
+Revises: 0017_add_job_tables
+Create Date: 2026-10-19 05:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0018_add_missing_tables"
+down_revision = "0017_add_job_tables"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The app used to run SQLModel create_all on every startup, so existing
+    # databases already have these tables; fresh ones get them here.
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("chargeitem"):
+        op.create_table(
+            "chargeitem",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("code", sa.String(), nullable=False, unique=True),
+            sa.Column("description", sa.String(), nullable=True),
+        )
+    if not inspector.has_table("adjustment"):
+        op.create_table(
+            "adjustment",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(
+                "bill_line_id",
+                sa.Integer(),
+                sa.ForeignKey("billline.id"),
+                nullable=True,
+            ),
+            sa.Column("delta", sa.Numeric(), nullable=False),
+            sa.Column("reason", sa.String(), nullable=True),
+        )
+    if not inspector.has_table("appconfig"):
+        op.create_table(
+            "appconfig",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("key", sa.String(), nullable=False, unique=True),
+            sa.Column("value", sa.String(), nullable=True),
+        )
+    if not inspector.has_table("importbatch"):
+        op.create_table(
+            "importbatch",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("filename", sa.String(), nullable=False),
+            sa.Column("kind", sa.String(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("started_at", sa.DateTime(), nullable=True),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+            sa.Column("result", sa.Text(), nullable=True),
+            sa.Column("errors", sa.Text(), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    # the tables predate this revision on most databases; leave them
+    pass
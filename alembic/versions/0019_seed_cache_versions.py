@@ -0,0 +1,37 @@
+"""seed cross-process cache version counters in appconfig
+
+Revision ID: 0019_seed_cache_versions
+Revises: 0018_add_missing_tables
+Create Date: 2026-10-19 06:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0019_seed_cache_versions"
+down_revision = "0018_add_missing_tables"
+branch_labels = None
+depends_on = None
+
+KEYS = ("cache_version:tariffs", "cache_version:users")
+
+
+def upgrade() -> None:
+    # writers only UPDATE these rows (app.cache.CacheVersions.bump), so two
+    # workers never race to insert the same key
+    appconfig = sa.table("appconfig", sa.column("key"), sa.column("value"))
+    conn = op.get_bind()
+    existing = set(
+        conn.execute(
+            sa.select(appconfig.c.key).where(appconfig.c.key.in_(KEYS))
+        ).scalars()
+    )
+    rows = [{"key": k, "value": "0"} for k in KEYS if k not in existing]
+    if rows:
+        op.bulk_insert(appconfig, rows)
+
+
+def downgrade() -> None:
+    appconfig = sa.table("appconfig", sa.column("key"))
+    op.execute(appconfig.delete().where(appconfig.c.key.in_(KEYS)))
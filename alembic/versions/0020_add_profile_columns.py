@@ -0,0 +1,27 @@
+"""add profile columns to importbatch and jobrun
+
+Revision ID: 0020_add_profile_columns
+Revises: 0019_seed_cache_versions
+Create Date: 2026-10-19 07:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0020_add_profile_columns"
+down_revision = "0019_seed_cache_versions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("importbatch", sa.Column("profile", sa.Text(), nullable=True))
+    op.add_column("jobrun", sa.Column("profile", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("jobrun") as batch:
+        batch.drop_column("profile")
+    with op.batch_alter_table("importbatch") as batch:
+        batch.drop_column("profile")
@@ -0,0 +1,56 @@
+"""unique billsummary scope index that also matches NULL scopes
+
+Revision ID: 0021_billsummary_scope_index
+Revises: 0020_add_profile_columns
+Create Date: 2026-10-19 08:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0021_billsummary_scope_index"
+down_revision = "0020_add_profile_columns"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # merge rows the old constraint let through (NULL company/community)
+    rows = bind.execute(
+        sa.text(
+            "SELECT id, COALESCE(company_id, 0), COALESCE(community_id, 0), "
+            "period, status, bill_count, total_amount, paid_amount "
+            "FROM billsummary ORDER BY id"
+        )
+    ).fetchall()
+    keep = {}
+    for row_id, company, community, period, status, count, total, paid in rows:
+        key = (company, community, period, status)
+        if key not in keep:
+            keep[key] = [row_id, count or 0, total or 0, paid or 0, False]
+            continue
+        merged = keep[key]
+        merged[1] += count or 0
+        merged[2] += total or 0
+        merged[3] += paid or 0
+        merged[4] = True
+        bind.execute(sa.text("DELETE FROM billsummary WHERE id = :id"), {"id": row_id})
+    for row_id, count, total, paid, changed in keep.values():
+        if changed:
+            bind.execute(
+                sa.text(
+                    "UPDATE billsummary SET bill_count = :c, total_amount = :t, "
+                    "paid_amount = :p WHERE id = :id"
+                ),
+                {"c": count, "t": total, "p": paid, "id": row_id},
+            )
+    op.execute(
+        "CREATE UNIQUE INDEX ux_billsummary_scope ON billsummary "
+        "(coalesce(company_id, 0), coalesce(community_id, 0), period, status)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_billsummary_scope", table_name="billsummary")
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from ..audit import archive_partitions, search_audit
+from ..auth import require_role
+from ..db import engine
+
+router = APIRouter(prefix="/api/v1/audit", tags=["audit"])
+
+
+@router.get("/", dependencies=[Depends(require_role("admin"))])
+def list_audit(
+    start: date,
+    end: date,
+    table_name: Optional[str] = None,
+    row_id: Optional[int] = None,
+    actor_id: Optional[int] = None,
+    action: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Audit rows between two dates (inclusive), newest first."""
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    with engine.connect() as conn:
+        return search_audit(
+            conn,
+            datetime.combine(start, time.min),
+            datetime.combine(end + timedelta(days=1), time.min),
+            table_name=table_name,
+            row_id=row_id,
+            actor_id=actor_id,
+            action=action,
+            limit=limit,
+        )
+
+
+@router.post("/archive", dependencies=[Depends(require_role("admin"))])
+def archive_old_partitions():
+    """Archive and drop partitions older than AUDIT_RETENTION_MONTHS."""
+    return {"archived": archive_partitions()}
@@ -6,9 +6,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
 
 from ..auth import require_any_role, require_role
-from ..billing import compute_billing_cycle
+from ..billing import compute_billing_cycle, find_active_lease, insert_bill
 from ..db import engine
-from ..models import Bill, BillLine, BillTemplate, BillTemplateLine, ChargeItem
+from ..models import BillLine, BillTemplate, BillTemplateLine, ChargeItem
+from ..reports import summary_add_bill
 from ..schemas_billing import (
     BillTemplateCreate,
     BillTemplateRead,
@@ -271,28 +272,23 @@ def instantiate_template(
             raise HTTPException(status_code=404, detail="template not found")
 
         # compute cycle
-        # find lease start date for unit
-        from ..models import Building, Community, Company, Lease, Unit
+        # the lease active on the target date sets the cycle day
+        from ..models import Building, Community, Company, Unit
 
-        lease = session.exec(select(Lease).where(Lease.unit_id == unit_id)).first()
+        lease = find_active_lease(session, unit_id, d)
         if not lease:
-            raise HTTPException(status_code=400, detail="no lease for unit")
+            raise HTTPException(status_code=400, detail="no active lease for unit")
         cycle_start, cycle_end = compute_billing_cycle(lease.start_date, d)
 
-        # ensure not duplicate
-        existing = session.exec(
-            select(Bill).where(Bill.unit_id == unit_id, Bill.cycle_start == cycle_start)
-        ).first()
-        if existing:
-            raise HTTPException(status_code=400, detail="bill already exists for cycle")
-
         # determine company/community via unit->building->community->company
         unit = session.get(Unit, unit_id)
         b = session.get(Building, unit.building_id)
         comm = session.get(Community, b.community_id)
         comp = session.get(Company, comm.company_id)
 
-        bill = Bill(
+        # insert-or-nothing: a duplicate cycle is detected by the insert itself
+        bill = insert_bill(
+            session,
             company_id=comp.id,
             community_id=comm.id,
             unit_id=unit_id,
@@ -302,8 +298,8 @@ def instantiate_template(
             total_amount=0,
             template_id=t.id,
         )
-        session.add(bill)
-        session.flush()
+        if bill is None:
+            raise HTTPException(status_code=400, detail="bill already exists for cycle")
 
         # copy template lines
         tlines = session.exec(
@@ -325,6 +321,7 @@ def instantiate_template(
             )
             session.add(ln)
 
+        summary_add_bill(session, bill)
         session.commit()
         session.refresh(bill)
         return {"bill_id": bill.id, "status": bill.status}
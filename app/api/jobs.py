@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session, select
+
+from ..auth import require_role
+from ..db import engine
+from ..locks import lock_holder, worker_id
+from ..models import JobRun
+from ..scheduler import JOBS, LEADER_LOCK, get_scheduler, job_triggers, run_job
+
+router = APIRouter(prefix="/api/v1/jobs", tags=["ops"])
+
+
+def _run_dict(run: JobRun) -> dict:
+    return {
+        "id": run.id,
+        "job_id": run.job_id,
+        "trigger": run.trigger,
+        "status": run.status,
+        "owner": run.owner,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+        "result": json.loads(run.result) if run.result else None,
+        "error": json.loads(run.error) if run.error else None,
+    }
+
+
+@router.get("/", dependencies=[Depends(require_role("admin"))])
+def list_jobs():
+    """Configured jobs with their schedule, next run and last recorded run."""
+    scheduler = get_scheduler()
+    triggers = job_triggers()
+    jobs = []
+    with Session(engine) as session:
+        for job_id in JOBS:
+            last = session.exec(
+                select(JobRun)
+                .where(JobRun.job_id == job_id)
+                .order_by(JobRun.started_at.desc(), JobRun.id.desc())
+                .limit(1)
+            ).first()
+            job = scheduler.get_job(job_id) if scheduler else None
+            jobs.append(
+                {
+                    "id": job_id,
+                    "schedule": str(triggers[job_id]) if job_id in triggers else None,
+                    "next_run_time": job.next_run_time if job else None,
+                    "last_run": _run_dict(last) if last else None,
+                }
+            )
+    return {
+        "scheduler_running": scheduler is not None,
+        "worker": worker_id(),
+        "leader": lock_holder(LEADER_LOCK),
+        "jobs": jobs,
+    }
+
+
+@router.get("/{job_id}/runs", dependencies=[Depends(require_role("admin"))])
+def list_job_runs(job_id: str, limit: int = Query(50, ge=1, le=500)):
+    if job_id not in JOBS:
+        raise HTTPException(status_code=404, detail="job not found")
+    with Session(engine) as session:
+        runs = session.exec(
+            select(JobRun)
+            .where(JobRun.job_id == job_id)
+            .order_by(JobRun.started_at.desc(), JobRun.id.desc())
+            .limit(limit)
+        ).all()
+        return [_run_dict(r) for r in runs]
+
+
+@router.post("/{job_id}/run", dependencies=[Depends(require_role("admin"))])
+async def trigger_job(job_id: str):
+    """Run a job now in this worker, regardless of leadership."""
+    if job_id not in JOBS:
+        raise HTTPException(status_code=404, detail="job not found")
+    run = await run_in_threadpool(run_job, job_id, "manual")
+    if run is None:
+        raise HTTPException(status_code=409, detail="job is already running")
+    return _run_dict(run)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from ..auth import require_role
+from ..db import engine
+from ..meters import ReadingErrors, capture_readings
+from ..schemas import MeterReadingBulk
+
+router = APIRouter(prefix="/api/v1/meters", tags=["meters"])
+
+
+@router.post("/readings", dependencies=[Depends(require_role("clerk"))])
+def capture_meter_readings(payload: MeterReadingBulk):
+    """Record one period's readings for many meters; all-or-nothing."""
+    with Session(engine) as session:
+        try:
+            created = capture_readings(session, payload.period, payload.readings)
+            session.commit()
+        except ReadingErrors as e:
+            session.rollback()
+            raise HTTPException(status_code=400, detail=e.errors)
+        except IntegrityError:
+            # a concurrent capture won the (meter_id, period) unique index
+            session.rollback()
+            raise HTTPException(
+                status_code=409, detail="readings for this period already exist"
+            )
+        return {"period": payload.period, "created": created}
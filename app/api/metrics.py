@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+
+from ..auth import require_role
+from ..metrics import metrics
+
+router = APIRouter(prefix="/api/v1/metrics", tags=["ops"])
+
+
+@router.get("/", dependencies=[Depends(require_role("admin"))])
+def read_metrics():
+    """Counters, gauges and timings of this worker process."""
+    return metrics.snapshot()
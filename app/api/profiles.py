@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session, select
+
+from ..auth import require_role
+from ..db import engine
+from ..models import ImportBatch, JobRun
+
+router = APIRouter(prefix="/api/v1/profiles", tags=["ops"])
+
+
+def _headline(profile: str) -> dict:
+    data = json.loads(profile)
+    return {
+        "seconds": data["seconds"],
+        "peak_memory_bytes": data["peak_memory_bytes"],
+        "sql_statements": data["sql_statements"],
+    }
+
+
+@router.get("/", dependencies=[Depends(require_role("admin"))])
+def list_profiles(limit: int = Query(20, ge=1, le=200)):
+    """Most recent profiled import batches and job runs, newest first."""
+    with Session(engine) as session:
+        batches = session.exec(
+            select(ImportBatch)
+            .where(ImportBatch.profile.is_not(None))
+            .order_by(ImportBatch.id.desc())
+            .limit(limit)
+        ).all()
+        runs = session.exec(
+            select(JobRun)
+            .where(JobRun.profile.is_not(None))
+            .order_by(JobRun.id.desc())
+            .limit(limit)
+        ).all()
+        return {
+            "imports": [
+                {
+                    "batch_id": b.id,
+                    "kind": b.kind,
+                    "status": b.status,
+                    "started_at": b.started_at,
+                    **_headline(b.profile),
+                }
+                for b in batches
+            ],
+            "jobs": [
+                {
+                    "run_id": r.id,
+                    "job_id": r.job_id,
+                    "status": r.status,
+                    "started_at": r.started_at,
+                    **_headline(r.profile),
+                }
+                for r in runs
+            ],
+        }
+
+
+@router.get("/imports/{batch_id}", dependencies=[Depends(require_role("admin"))])
+def get_import_profile(batch_id: int):
+    with Session(engine) as session:
+        batch = session.get(ImportBatch, batch_id)
+        if not batch or not batch.profile:
+            raise HTTPException(status_code=404, detail="profile not found")
+        return {
+            "batch_id": batch.id,
+            "kind": batch.kind,
+            "status": batch.status,
+            "profile": json.loads(batch.profile),
+        }
+
+
+@router.get("/jobs/{run_id}", dependencies=[Depends(require_role("admin"))])
+def get_job_profile(run_id: int):
+    with Session(engine) as session:
+        run = session.get(JobRun, run_id)
+        if not run or not run.profile:
+            raise HTTPException(status_code=404, detail="profile not found")
+        return {
+            "run_id": run.id,
+            "job_id": run.job_id,
+            "status": run.status,
+            "profile": json.loads(run.profile),
+        }
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from ..auth import require_role
+from ..db import engine
+from ..reports import arrears_report, cycle_summary, rebuild_bill_summary
+
+router = APIRouter(prefix="/api/v1/reports", tags=["reports"])
+
+
+@router.get("/cycles", dependencies=[Depends(require_role("finance"))])
+def list_cycle_summary(
+    company_id: Optional[int] = None,
+    community_id: Optional[int] = None,
+    period: Optional[str] = None,
+):
+    """Cycle overview per community and period, read from `BillSummary`."""
+    with Session(engine) as session:
+        return cycle_summary(
+            session, company_id=company_id, community_id=community_id, period=period
+        )
+
+
+@router.post("/cycles/rebuild", dependencies=[Depends(require_role("admin"))])
+def rebuild_cycle_summary():
+    with Session(engine) as session:
+        rows = rebuild_bill_summary(session)
+        session.commit()
+        return {"rows": rows}
+
+
+@router.get("/arrears", dependencies=[Depends(require_role("finance"))])
+def list_arrears(
+    company_id: Optional[int] = None,
+    community_id: Optional[int] = None,
+    building_id: Optional[int] = None,
+    as_of: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Units with an outstanding balance; pass `next_cursor` to page on."""
+    with Session(engine) as session:
+        try:
+            return arrears_report(
+                session,
+                company_id=company_id,
+                community_id=community_id,
+                building_id=building_id,
+                as_of=as_of,
+                cursor=cursor,
+                limit=limit,
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="invalid cursor")
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from ..auth import require_role
+from ..db import engine
+from ..models import Unit
+from ..reports import unit_history
+
+router = APIRouter(prefix="/api/v1/units", tags=["units"])
+
+
+@router.get("/{unit_id}/history", dependencies=[Depends(require_role("clerk"))])
+def get_unit_history(
+    unit_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Leases, bills and payments of a unit, newest first, keyset-paged."""
+    with Session(engine) as session:
+        if not session.get(Unit, unit_id):
+            raise HTTPException(status_code=404, detail="unit not found")
+        try:
+            return unit_history(session, unit_id, cursor=cursor, limit=limit)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="invalid cursor")
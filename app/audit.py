@@ -0,0 +1,447 @@
+"""Audit trail writer, monthly partitions, search and archiving.
+
+Audit rows are not inserted in the request's transaction. `record_audit`
+attaches the row to the caller's session and hands it to a background
+writer only once that session commits (rolled back work leaves no audit
+row). The writer thread batches rows and stores them with multi-row
+INSERTs when AUDIT_BATCH_SIZE rows are pending or AUDIT_FLUSH_SECONDS have
+passed. With AUDIT_SYNC=1 (tests, one-off scripts) rows are written
+immediately after the commit instead.
+
+Rows are stored in one append-only table per month (``auditlog_YYYYMM``,
+same columns as `AuditLog`). Searches only read the partitions of the
+requested range; the legacy ``auditlog`` table holds rows written before
+partitioning and is read only for ranges that start before the oldest
+partition. Partitions older than AUDIT_RETENTION_MONTHS are exported to
+gzip-compressed JSONL files and dropped.
+"""
+
+from datetime import date, datetime, timedelta
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import (
+    DDL,
+    Column,
+    Index,
+    MetaData,
+    Table,
+    event,
+    insert,
+    inspect as sa_inspect,
+    literal,
+    select,
+    union_all,
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session as SASession
+
+from .db import chunked, engine
+from .metrics import metrics
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+AUDIT_SYNC = os.getenv("AUDIT_SYNC", "0") == "1"
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "1.0"))
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+# attempts per batch before its rows are given up (and logged as lost)
+AUDIT_WRITE_ATTEMPTS = int(os.getenv("AUDIT_WRITE_ATTEMPTS", "3"))
+AUDIT_RETRY_SECONDS = float(os.getenv("AUDIT_RETRY_SECONDS", "0.5"))
+
+AUDIT_RETENTION_MONTHS = int(os.getenv("AUDIT_RETENTION_MONTHS", "24"))
+AUDIT_ARCHIVE_DIR = os.getenv("AUDIT_ARCHIVE_DIR", "./data/audit_archive")
+
+# rows per INSERT ... VALUES (...), (...); 10 columns each stays well below
+# SQLite's bound-parameter limit
+_ROWS_PER_INSERT = 90
+
+_PARTITION_RE = re.compile(r"^auditlog_(\d{6})$")
+_APPEND_ONLY_MESSAGE = "audit log is append-only"
+
+# partition tables live in their own MetaData so create_all never touches them
+_partition_metadata = MetaData()
+_partition_lock = threading.Lock()
+# months whose partition is known to exist in this process
+_created_partitions: set = set()
+
+# PostgreSQL raises from a shared trigger function; SQLite gets per-table
+# triggers. Dropping a whole partition (retention) is still allowed.
+_PG_APPEND_ONLY_FUNCTION = DDL(
+    "CREATE OR REPLACE FUNCTION auditlog_append_only() RETURNS trigger AS $$ "
+    f"BEGIN RAISE EXCEPTION '{_APPEND_ONLY_MESSAGE}'; END $$ LANGUAGE plpgsql"
+)
+
+
+def month_key(value) -> str:
+    """Partition key ``YYYYMM`` of a date/datetime."""
+    return value.strftime("%Y%m")
+
+
+def partition_table(month: str) -> Table:
+    """Table object for the ``auditlog_<month>`` partition."""
+    name = f"auditlog_{month}"
+    with _partition_lock:
+        table = _partition_metadata.tables.get(name)
+        if table is not None:
+            return table
+        table = Table(
+            name,
+            _partition_metadata,
+            *(
+                Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable)
+                for c in AuditLog.__table__.columns
+            ),
+            Index(f"ix_{name}_table_row", "table_name", "row_id"),
+            Index(f"ix_{name}_actor_created", "actor_id", "created_at"),
+        )
+    for op in ("UPDATE", "DELETE"):
+        event.listen(
+            table,
+            "after_create",
+            DDL(
+                f"CREATE TRIGGER trg_{name}_no_{op.lower()} BEFORE {op} ON {name} "
+                f"BEGIN SELECT RAISE(ABORT, '{_APPEND_ONLY_MESSAGE}'); END"
+            ).execute_if(dialect="sqlite"),
+        )
+    event.listen(
+        table,
+        "after_create",
+        DDL(
+            f"CREATE TRIGGER trg_{name}_append_only BEFORE UPDATE OR DELETE "
+            f"ON {name} FOR EACH ROW EXECUTE FUNCTION auditlog_append_only()"
+        ).execute_if(dialect="postgresql"),
+    )
+    return table
+
+
+def ensure_partition(conn: Connection, month: str) -> Table:
+    table = partition_table(month)
+    if month not in _created_partitions:
+        if conn.dialect.name == "postgresql":
+            conn.execute(_PG_APPEND_ONLY_FUNCTION)
+        table.create(conn, checkfirst=True)
+        _created_partitions.add(month)
+    return table
+
+
+def list_partitions(conn: Connection) -> List[str]:
+    """Months (``YYYYMM``) that have a partition table, oldest first."""
+    months = []
+    for name in sa_inspect(conn).get_table_names():
+        m = _PARTITION_RE.match(name)
+        if m:
+            months.append(m.group(1))
+    return sorted(months)
+
+
+def audit_row(
+    action: str,
+    table_name: str = "",
+    row_id: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    actor_id: Optional[int] = None,
+    actor: Optional[str] = None,
+    ip: Optional[str] = None,
+    trace_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    return {
+        "action": action,
+        "table_name": table_name,
+        "row_id": row_id,
+        "before": before,
+        "after": after,
+        "actor_id": actor_id,
+        "actor": actor,
+        "ip": ip,
+        "trace_id": trace_id,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def write_audit_rows(rows: List[Dict[str, Any]]) -> None:
+    """Insert audit rows into their monthly partitions in one transaction."""
+    if not rows:
+        return
+    by_month: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_month.setdefault(month_key(row["created_at"]), []).append(row)
+    with engine.begin() as conn:
+        for month, month_rows in by_month.items():
+            table = ensure_partition(conn, month)
+            for chunk in chunked(month_rows, _ROWS_PER_INSERT):
+                conn.execute(insert(table).values(chunk))
+
+
+class AuditWriter:
+    """Background thread draining a queue of audit rows in batches."""
+
+    def __init__(self, batch_size: int, flush_seconds: float, maxsize: int):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition()
+        self._pending = 0
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="audit-writer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, rows: List[Dict[str, Any]]) -> None:
+        self._ensure_started()
+        for row in rows:
+            with self._flushed:
+                self._pending += 1
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                # back-pressure: write this row ourselves rather than drop it
+                with self._flushed:
+                    self._pending -= 1
+                write_audit_rows([row])
+
+    def _run(self) -> None:
+        batch: List[Dict[str, Any]] = []
+        deadline = None
+        stop = False
+        while not stop:
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            row = None
+            try:
+                row = self._queue.get(timeout=timeout)
+                if row is None:
+                    stop = True
+                else:
+                    batch.append(row)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_seconds
+            except queue.Empty:
+                pass
+            if batch and (
+                stop
+                or len(batch) >= self.batch_size
+                or time.monotonic() >= deadline
+                or row is _FLUSH
+            ):
+                self._write(batch)
+                batch = []
+                deadline = None
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        rows = [r for r in batch if r is not _FLUSH]
+        try:
+            if not rows:
+                return
+            for attempt in range(1, AUDIT_WRITE_ATTEMPTS + 1):
+                try:
+                    # each attempt is a new transaction
+                    write_audit_rows(rows)
+                    break
+                except Exception:
+                    logger.exception(
+                        "audit batch of %d rows failed (attempt %d/%d)",
+                        len(rows),
+                        attempt,
+                        AUDIT_WRITE_ATTEMPTS,
+                    )
+                    metrics.inc("audit.write_failures")
+                    # a partition may have been dropped (archiving) since
+                    # it was cached; check again on the next attempt
+                    with _partition_lock:
+                        _created_partitions.difference_update(
+                            month_key(r["created_at"]) for r in rows
+                        )
+                    if attempt < AUDIT_WRITE_ATTEMPTS:
+                        time.sleep(AUDIT_RETRY_SECONDS * attempt)
+            else:
+                # the audit trail must never take the worker down; record
+                # the loss and keep going
+                logger.error(
+                    "dropped %d audit rows after %d failed attempts",
+                    len(rows),
+                    AUDIT_WRITE_ATTEMPTS,
+                )
+                metrics.inc("audit.rows_lost", len(rows))
+        finally:
+            with self._flushed:
+                self._pending -= len(batch)
+                self._flushed.notify_all()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything submitted so far is written."""
+        if self._thread is None:
+            return True
+        with self._flushed:
+            self._pending += 1
+        self._queue.put(_FLUSH)
+        with self._flushed:
+            return self._flushed.wait_for(lambda: self._pending == 0, timeout)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        self.flush(timeout)
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+
+# marker forcing the writer to flush its current batch
+_FLUSH: Dict[str, Any] = {}
+
+writer = AuditWriter(AUDIT_BATCH_SIZE, AUDIT_FLUSH_SECONDS, AUDIT_QUEUE_SIZE)
+
+
+def record_audit(session: Optional[SASession], action: str, **fields) -> None:
+    """Queue an audit row to be written once `session` commits.
+
+    Without a session the row is submitted right away. Keyword fields are
+    those of `audit_row` (table_name, row_id, before, after, actor_id, ...).
+    """
+    row = audit_row(action, **fields)
+    if session is None:
+        _submit([row])
+    else:
+        session.info.setdefault("audit_rows", []).append(row)
+
+
+def _submit(rows: List[Dict[str, Any]]) -> None:
+    if AUDIT_SYNC:
+        write_audit_rows(rows)
+    else:
+        writer.submit(rows)
+
+
+def flush_audit(timeout: float = 5.0) -> bool:
+    return writer.flush(timeout)
+
+
+def shutdown_audit_writer() -> None:
+    writer.stop()
+
+
+@event.listens_for(SASession, "after_commit")
+def _submit_after_commit(session):
+    rows = session.info.pop("audit_rows", None)
+    if rows:
+        _submit(rows)
+
+
+@event.listens_for(SASession, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("audit_rows", None)
+
+
+def _months_between(start: date, end: date) -> List[str]:
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(f"{year:04d}{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def search_audit(
+    conn: Connection,
+    start: datetime,
+    end: datetime,
+    table_name: Optional[str] = None,
+    row_id: Optional[int] = None,
+    actor_id: Optional[int] = None,
+    action: Optional[str] = None,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """Audit rows with start <= created_at < end, newest first.
+
+    Only the partitions of months overlapping the range are queried (one
+    UNION ALL); filters on (table_name, row_id) and (actor_id, created_at)
+    use the per-partition indexes.
+    """
+    existing = list_partitions(conn)
+    # `end` is exclusive: a range ending at midnight on the 1st stops before
+    # that month
+    months = _months_between(start, end - timedelta(microseconds=1))
+    present = set(existing)
+    tables = [partition_table(m) for m in months if m in present]
+    if not existing or month_key(start) < existing[0]:
+        tables.append(AuditLog.__table__)
+    if not tables:
+        # a quiet month between partitions, or one still to come
+        return []
+
+    selects = []
+    for table in tables:
+        c = table.c
+        stmt = select(*c, literal(table.name).label("partition")).where(
+            c.created_at >= start, c.created_at < end
+        )
+        if table_name is not None:
+            stmt = stmt.where(c.table_name == table_name)
+        if row_id is not None:
+            stmt = stmt.where(c.row_id == row_id)
+        if actor_id is not None:
+            stmt = stmt.where(c.actor_id == actor_id)
+        if action is not None:
+            stmt = stmt.where(c.action == action)
+        selects.append(stmt)
+    if len(selects) == 1:
+        query = selects[0].subquery()
+    else:
+        query = union_all(*selects).subquery()
+    rows = conn.execute(
+        select(query)
+        .order_by(query.c.created_at.desc(), query.c.id.desc())
+        .limit(limit)
+    ).mappings()
+    return [dict(r) for r in rows]
+
+
+def archive_partitions(
+    now: Optional[date] = None,
+    retention_months: int = AUDIT_RETENTION_MONTHS,
+    archive_dir: str = AUDIT_ARCHIVE_DIR,
+) -> List[str]:
+    """Export partitions older than the retention window and drop them.
+
+    Each partition becomes ``<archive_dir>/auditlog_YYYYMM.jsonl.gz`` (one
+    JSON object per row, in id order). The file is complete on disk before
+    the table is dropped. Returns the written paths.
+    """
+    now = now or datetime.utcnow().date()
+    index = now.year * 12 + now.month - 1 - retention_months
+    cutoff = f"{index // 12:04d}{index % 12 + 1:02d}"
+    os.makedirs(archive_dir, exist_ok=True)
+    with engine.connect() as conn:
+        months = [m for m in list_partitions(conn) if m < cutoff]
+    paths = []
+    for month in months:
+        table = partition_table(month)
+        path = os.path.join(archive_dir, f"{table.name}.jsonl.gz")
+        with engine.begin() as conn:
+            tmp = f"{path}.tmp"
+            with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+                for row in conn.execute(select(table).order_by(table.c.id)).mappings():
+                    fh.write(json.dumps(dict(row), default=str, ensure_ascii=False))
+                    fh.write("\n")
+            os.replace(tmp, path)
+            table.drop(conn)
+        with _partition_lock:
+            _created_partitions.discard(month)
+            _partition_metadata.remove(table)
+        paths.append(path)
+    return paths
@@ -1,27 +1,119 @@
 from datetime import datetime, timedelta
 import os
-from typing import Optional
+import time
+from typing import NamedTuple, Optional, Tuple
 
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import Session as SASession
 from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
 
+from .cache import TTLCache, cache_versions
 from .db import engine
 from .models import User
+from .passwords import (
+    LOGIN_MAX_FAILURES_PER_IP,
+    LOGIN_MAX_FAILURES_PER_USER,
+    PasswordQueueFull,
+    get_pwd_context,
+    hash_password,
+    login_limiter,
+    verify_and_update_async,
+)
 
 SECRET_KEY = os.getenv("APP_SECRET_KEY", "dev-secret-change-this")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 12
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
 # Cookie/session settings
 SESSION_COOKIE_NAME = "ap_session"
 SESSION_EXPIRE_SECONDS = 60 * 60 * 12
 
+# Authenticated users are cached per process by username; entries are
+# dropped when the user row changes and expire after the TTL regardless.
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+
+
+class AuthUser(NamedTuple):
+    """Lightweight, immutable view of the authenticated user."""
+
+    id: int
+    username: str
+    role: str
+    is_active: bool = True
+
+
+_user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+# verified session cookie -> AuthUser; each entry lives until its cookie
+# expires and the whole cache is dropped when any existing user changes
+_session_cache = TTLCache(USER_CACHE_SIZE, SESSION_EXPIRE_SECONDS)
+
+
+def get_auth_user(username: str) -> Optional[AuthUser]:
+    """Return the user for `username`, from the cache when possible."""
+    cache_versions.poll()
+    user = _user_cache.get(username)
+    if user is not None:
+        return user
+    with Session(engine) as session:
+        row = session.exec(
+            select(User.id, User.username, User.role, User.is_active).where(
+                User.username == username
+            )
+        ).first()
+    if row is None:
+        return None
+    user = AuthUser(row[0], row[1], row[2], row[3] is not False)
+    _user_cache.set(username, user)
+    return user
+
+
+def invalidate_user_cache(username: Optional[str] = None) -> None:
+    if username is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(username)
+    _session_cache.clear()
+
+
+# ORM writes to User (role change, deactivation, rename, delete) drop the
+# cached entries once committed, and bump the "users" cache version so the
+# other worker processes clear theirs. Bulk UPDATE statements bypass these
+# events and rely on the TTL.
+@event.listens_for(SASession, "after_flush")
+def _track_user_writes(session, flush_context):
+    changed = False
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            changed = True
+            names = session.info.setdefault("auth_users_changed", set())
+            names.add(obj.username)
+            names.update(sa_inspect(obj).attrs.username.history.deleted or ())
+    if changed:
+        cache_versions.bump(session.connection(), "users")
+
+
+@event.listens_for(SASession, "after_commit")
+def _invalidate_users_after_commit(session):
+    names = session.info.pop("auth_users_changed", None)
+    if names:
+        for username in names:
+            _user_cache.pop(username)
+        _session_cache.clear()
+
+
+@event.listens_for(SASession, "after_rollback")
+def _forget_users_after_rollback(session):
+    session.info.pop("auth_users_changed", None)
+
+
+cache_versions.register("users", invalidate_user_cache)
+
 
 def _sign_session(payload: str) -> str:
     """Sign a session payload using HMAC-SHA256 and SECRET_KEY.
@@ -56,37 +148,44 @@ def _unsign_session(token: str) -> Optional[str]:
 def create_session_cookie(user: User) -> str:
     """Create a signed session token for the given user.
 
-    The payload contains: user_id:issued_at
+    The payload contains: user_id:issued_at:session_epoch
     """
-    import time
-
-    payload = f"{user.id}:{int(time.time())}"
+    payload = f"{user.id}:{int(time.time())}:{user.session_epoch or 0}"
     return _sign_session(payload)
 
 
-def parse_session_cookie(token: str) -> Optional[int]:
-    """Return user_id if token valid and not expired, else None."""
-    import time
+def _parse_session(token: str) -> Optional[Tuple[int, int, int]]:
+    """Return (user_id, issued_at, session_epoch) if token valid and not expired.
 
+    Cookies issued before session epochs existed carry no epoch and count
+    as epoch 0.
+    """
     payload = _unsign_session(token)
     if not payload:
         return None
     try:
-        user_id_s, issued_s = payload.split(":", 1)
-        issued = int(issued_s)
-        if int(time.time()) - issued > SESSION_EXPIRE_SECONDS:
-            return None
-        return int(user_id_s)
+        parts = payload.split(":")
+        user_id, issued = int(parts[0]), int(parts[1])
+        epoch = int(parts[2]) if len(parts) > 2 else 0
     except Exception:
         return None
+    if int(time.time()) - issued > SESSION_EXPIRE_SECONDS:
+        return None
+    return user_id, issued, epoch
+
+
+def parse_session_cookie(token: str) -> Optional[int]:
+    """Return user_id if token valid and not expired, else None."""
+    session = _parse_session(token)
+    return session[0] if session else None
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return hash_password(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -97,6 +196,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire, "iat": now})
+    # jose (and its crypto backends) is imported on first use: it is one of
+    # the slowest imports at startup
+    from jose import jwt
+
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -104,19 +207,88 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 def authenticate_user(username: str, password: str) -> Optional[User]:
     with Session(engine) as session:
         user = session.exec(select(User).where(User.username == username)).first()
-        if not user:
+        if not user or user.is_active is False:
             return None
         if not verify_password(password, user.password_hash):
             return None
         return user
 
 
-def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+def _load_login_user(username: str) -> Optional[User]:
+    with Session(engine) as session:
+        return session.exec(select(User).where(User.username == username)).first()
+
+
+def _store_password_hash(user_id: int, password_hash: str) -> None:
+    with Session(engine) as session:
+        user = session.get(User, user_id)
+        if user:
+            user.password_hash = password_hash
+            session.add(user)
+            session.commit()
+
+
+async def authenticate_user_async(
+    username: str, password: str, client_ip: Optional[str] = None
+) -> Optional[User]:
+    """authenticate_user for the login endpoints, without blocking the server.
+
+    The hash is verified in the password process pool and upgraded when the
+    configured rounds changed. Raises HTTPException(429) while the username
+    or client IP has too many recent failures, and HTTPException(503) when
+    the verification queue is full.
+    """
+    keys = [(f"user:{username}", LOGIN_MAX_FAILURES_PER_USER)]
+    if client_ip:
+        keys.append((f"ip:{client_ip}", LOGIN_MAX_FAILURES_PER_IP))
+    for key, limit in keys:
+        wait = login_limiter.retry_after(key, limit)
+        if wait is not None:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many failed login attempts",
+                headers={"Retry-After": str(wait)},
+            )
+
+    user = await run_in_threadpool(_load_login_user, username)
+    valid, new_hash = False, None
+    if user is not None and user.is_active is not False:
+        try:
+            valid, new_hash = await verify_and_update_async(
+                password, user.password_hash
+            )
+        except PasswordQueueFull:
+            raise HTTPException(
+                status_code=503,
+                detail="Login service busy, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+    if not valid:
+        for key, _ in keys:
+            login_limiter.record_failure(key)
+        return None
+    login_limiter.reset(keys[0][0])
+    if new_hash:
+        await run_in_threadpool(_store_password_hash, user.id, new_hash)
+        user.password_hash = new_hash
+    return user
+
+
+def create_user_token(user: User) -> str:
+    """Access token carrying the user id and role next to the username."""
+    return create_access_token(
+        data={"sub": user.username, "uid": user.id, "role": user.role}
+    )
+
+
+def get_current_user(token: str = Depends(oauth2_scheme)) -> AuthUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -124,15 +296,20 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    with Session(engine) as session:
-        user = session.exec(select(User).where(User.username == username)).first()
-        if user is None:
-            raise credentials_exception
-        return user
+    user = get_auth_user(username)
+    if user is None or not user.is_active:
+        raise credentials_exception
+    # tokens minted before a role change (or for a re-created account with
+    # the same name) no longer match the user's claims
+    if payload.get("uid", user.id) != user.id:
+        raise credentials_exception
+    if payload.get("role", user.role) != user.role:
+        raise credentials_exception
+    return user
 
 
 def require_role(role: str):
-    def _role_checker(current_user: User = Depends(get_current_user)) -> User:
+    def _role_checker(current_user: AuthUser = Depends(get_current_user)) -> AuthUser:
         if current_user.role != role and current_user.role != "admin":
             raise HTTPException(status_code=403, detail="Insufficient privileges")
         return current_user
@@ -140,39 +317,52 @@ def require_role(role: str):
     return _role_checker
 
 
-def get_current_user_from_cookie(request: Request) -> Optional[User]:
+def get_current_user_from_cookie(request: Request) -> AuthUser:
     """Dependency to extract user from signed cookie (for HTML routes).
 
-    Returns User or raises HTTPException(401).
+    Verified cookies are cached until they expire, so page loads do not hit
+    the database for auth. Returns AuthUser or raises HTTPException(401).
     """
     cookie = request.cookies.get(SESSION_COOKIE_NAME)
     if not cookie:
         raise HTTPException(status_code=401, detail="Not authenticated")
-    user_id = parse_session_cookie(cookie)
-    if not user_id:
+    cache_versions.poll()
+    user = _session_cache.get(cookie)
+    if user is not None:
+        return user
+    session = _parse_session(cookie)
+    if not session:
         raise HTTPException(status_code=401, detail="Invalid session")
-    with Session(engine) as session:
-        # Avoid selecting columns that may be missing in older DBs; select core
-        # fields and construct a lightweight User-like object so tests and
-        # older DBs without `is_active` still work.
-        from sqlmodel import select as _select
-
-        row = session.exec(
-            _select(User.id, User.username, User.password_hash, User.role).where(
-                User.id == user_id
-            )
+    user_id, issued, epoch = session
+    with Session(engine) as db:
+        row = db.exec(
+            select(
+                User.id, User.username, User.role, User.is_active, User.session_epoch
+            ).where(User.id == user_id)
         ).first()
-        if not row:
-            raise HTTPException(status_code=401, detail="User inactive or not found")
-        u = User(id=row[0], username=row[1], password_hash=row[2], role=row[3])
-        # default to active when DB column is absent
-        if not hasattr(u, "is_active"):
-            setattr(u, "is_active", True)
-        return u
+    if not row or row[3] is False:
+        raise HTTPException(status_code=401, detail="User inactive or not found")
+    if row[4] != epoch:
+        raise HTTPException(status_code=401, detail="Session revoked")
+    user = AuthUser(row[0], row[1], row[2], True)
+    _session_cache.set(cookie, user, ttl=issued + SESSION_EXPIRE_SECONDS - time.time())
+    return user
+
+
+def revoke_user_sessions(user_id: int) -> Optional[int]:
+    """Invalidate every session cookie of a user; returns the new epoch."""
+    with Session(engine) as session:
+        user = session.get(User, user_id)
+        if not user:
+            return None
+        user.session_epoch = (user.session_epoch or 0) + 1
+        session.add(user)
+        session.commit()
+        return user.session_epoch
 
 
 def require_any_role(*roles: str):
-    def _checker(current_user: User = Depends(get_current_user)) -> User:
+    def _checker(current_user: AuthUser = Depends(get_current_user)) -> AuthUser:
         if current_user.role == "admin":
             return current_user
         if current_user.role not in roles:
@@ -185,7 +375,9 @@ def require_any_role(*roles: str):
 def require_role_cookie(role: str):
     """Role checker for cookie-based HTML routes."""
 
-    def _checker(current_user: User = Depends(get_current_user_from_cookie)) -> User:
+    def _checker(
+        current_user: AuthUser = Depends(get_current_user_from_cookie),
+    ) -> AuthUser:
         if current_user.role != role and current_user.role != "admin":
             raise HTTPException(status_code=403, detail="Insufficient privileges")
         return current_user
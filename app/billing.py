@@ -1,11 +1,29 @@
 import calendar
+from collections import defaultdict
 from datetime import date, timedelta
-from typing import List, Optional, Tuple
+from decimal import Decimal
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from sqlalchemy import and_, func, or_
 from sqlmodel import Session, select
 
-from .db import engine
-from .models import AuditLog, Bill, BillLine, Lease
+from .audit import record_audit
+from .db import chunked, engine
+from .models import (
+    Bill,
+    BillLine,
+    Building,
+    Community,
+    Lease,
+    Meter,
+    MeterReading,
+    Unit,
+)
+from .reports import bill_period, summary_add_bill
+from .tariffs import WaterPrice, get_tariff_table
+
+WATER_CHARGE_CODES = ("cold_water", "hot_water")
 
 
 def _add_months(d: date, months: int) -> date:
@@ -37,65 +55,231 @@ def compute_billing_cycle(lease_start: date, target: date) -> Tuple[date, date]:
     return cycle_start, cycle_end
 
 
+def _water_charge_code(meter_kind: str) -> Optional[str]:
+    # meters are stored as cold_water/hot_water (older rows: cold/hot)
+    if meter_kind.startswith("cold"):
+        return "cold_water"
+    if meter_kind.startswith("hot"):
+        return "hot_water"
+    return None
+
+
+def load_water_consumption(
+    session: Session, unit_ids: Iterable[int], periods: Iterable[str]
+) -> Dict[Tuple[int, str], Dict[str, Decimal]]:
+    """Return water consumption per (unit_id, period) and charge code.
+
+    Consumption of a meter for a period is its reading for that period minus
+    the previous reading (``LAG`` over the meter's readings ordered by
+    period), summed over the unit's meters of the same kind. Readings for
+    all requested units are fetched with one windowed query per chunk of
+    units; meters without a current or previous reading contribute nothing.
+    """
+    periods = set(periods)
+    out: Dict[Tuple[int, str], Dict[str, Decimal]] = defaultdict(
+        lambda: defaultdict(Decimal)
+    )
+    if not periods:
+        return out
+    for chunk in chunked(set(unit_ids)):
+        prev = (
+            func.lag(MeterReading.reading)
+            .over(partition_by=MeterReading.meter_id, order_by=MeterReading.period)
+            .label("prev")
+        )
+        windowed = (
+            select(
+                Meter.unit_id,
+                Meter.kind,
+                MeterReading.period,
+                MeterReading.reading,
+                prev,
+            )
+            .join(Meter, Meter.id == MeterReading.meter_id)
+            .where(Meter.unit_id.in_(chunk), MeterReading.period <= max(periods))
+            .subquery()
+        )
+        rows = session.exec(
+            select(
+                windowed.c.unit_id,
+                windowed.c.kind,
+                windowed.c.period,
+                windowed.c.reading,
+                windowed.c.prev,
+            ).where(windowed.c.period.in_(periods), windowed.c.prev.is_not(None))
+        ).all()
+        for unit_id, kind, period, reading, prev_reading in rows:
+            code = _water_charge_code(kind)
+            if code is None:
+                continue
+            used = Decimal(str(reading)) - Decimal(str(prev_reading))
+            out[(unit_id, period)][code] += used
+    return out
+
+
+def lease_active_on(target: date):
+    """SQL condition for leases covering `target` (an open end never ends)."""
+    return and_(
+        Lease.start_date <= target,
+        or_(Lease.end_date.is_(None), Lease.end_date >= target),
+    )
+
+
+def find_active_lease(session: Session, unit_id: int, target: date) -> Optional[Lease]:
+    """The unit's lease covering `target`, or None.
+
+    A range probe on `ix_lease_unit_dates`; leases cannot overlap, so at
+    most one matches (the latest start wins if old data says otherwise).
+    """
+    return session.exec(
+        select(Lease)
+        .where(Lease.unit_id == unit_id, lease_active_on(target))
+        .order_by(Lease.start_date.desc())
+        .limit(1)
+    ).first()
+
+
+def _unit_scope(session: Session, unit_id: int) -> Tuple[int, int]:
+    """Return (company_id, community_id) of a unit via building/community."""
+    row = session.exec(
+        select(Community.company_id, Community.id)
+        .join(Building, Building.community_id == Community.id)
+        .join(Unit, Unit.building_id == Building.id)
+        .where(Unit.id == unit_id)
+    ).first()
+    if not row:
+        raise ValueError("Unit not found")
+    return row[0], row[1]
+
+
+def insert_bill(session: Session, **values) -> Optional[Bill]:
+    """Insert a bill unless one exists for its (unit_id, cycle_start).
+
+    One ``INSERT ... ON CONFLICT (unit_id, cycle_start) DO NOTHING
+    RETURNING`` statement (SQLite >= 3.35, PostgreSQL), so concurrent
+    generators cannot both create the bill or fail on ``uq_bill_unit_cycle``.
+    Returns the new Bill, or None when the cycle was already billed.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = (
+        insert(Bill)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=["unit_id", "cycle_start"])
+        .returning(Bill)
+    )
+    return session.scalars(stmt).first()
+
+
+def _existing_bill(session: Session, unit_id: int, cycle_start: date) -> Bill:
+    return session.exec(
+        select(Bill).where(Bill.unit_id == unit_id, Bill.cycle_start == cycle_start)
+    ).one()
+
+
+def _create_bill(
+    session: Session,
+    unit_id: int,
+    lease: Lease,
+    cycle: Tuple[date, date],
+    company_id: int,
+    community_id: int,
+    water: Dict[str, Decimal],
+    price: Optional[WaterPrice],
+    actor_id: Optional[int],
+) -> Optional[Bill]:
+    # None when another run already created the bill for this cycle
+    cycle_start, cycle_end = cycle
+    bill = insert_bill(
+        session,
+        company_id=company_id,
+        community_id=community_id,
+        unit_id=unit_id,
+        cycle_start=cycle_start,
+        cycle_end=cycle_end,
+        status="draft",
+        total_amount=0,
+    )
+    if bill is None:
+        return None
+
+    # rent line (store unit_price and qty so it can be frozen later)
+    rent_line = BillLine(
+        bill_id=bill.id,
+        item_code="rent",
+        charge_code="rent",
+        amount=lease.rent_amount,
+        qty=1,
+        unit_price=lease.rent_amount,
+    )
+    session.add(rent_line)
+    total = Decimal(str(lease.rent_amount or 0))
+
+    # water lines; without a tariff the price is left at zero for review
+    prices = {
+        "cold_water": price.cold_price if price else Decimal("0"),
+        "hot_water": price.hot_price if price else Decimal("0"),
+    }
+    for code in WATER_CHARGE_CODES:
+        if code not in water:
+            continue
+        qty = water[code]
+        unit_price = prices[code]
+        amount = (qty * unit_price).quantize(Decimal("0.0001"))
+        session.add(
+            BillLine(
+                bill_id=bill.id,
+                item_code=code,
+                charge_code=code,
+                qty=qty,
+                unit_price=unit_price,
+                amount=amount,
+            )
+        )
+        total += amount
+
+    # compute total
+    bill.total_amount = total
+    session.add(bill)
+    summary_add_bill(session, bill)
+
+    record_audit(
+        session,
+        "create_bill",
+        table_name="bill",
+        row_id=bill.id,
+        after=json.dumps({"status": bill.status, "total_amount": str(total)}),
+        actor_id=actor_id,
+    )
+    return bill
+
+
 def generate_bill_for_unit(
     unit_id: int, target_date: date, actor_id: Optional[int] = None
 ) -> Bill:
     with Session(engine) as session:
-        lease = session.exec(select(Lease).where(Lease.unit_id == unit_id)).first()
+        lease = find_active_lease(session, unit_id, target_date)
         if not lease:
-            raise ValueError("No lease for unit")
+            raise ValueError("No active lease for unit")
         cycle_start, cycle_end = compute_billing_cycle(lease.start_date, target_date)
-        # ensure uniqueness
-        existing = session.exec(
-            select(Bill).where(Bill.unit_id == unit_id, Bill.cycle_start == cycle_start)
-        ).first()
-        if existing:
-            return existing
-
-        # determine company/community via unit->building->community->company
-        from .models import Building, Community, Company, Unit
-
-        unit = session.get(Unit, unit_id)
-        b = session.get(Building, unit.building_id)
-        comm = session.get(Community, b.community_id)
-        comp = session.get(Company, comm.company_id)
-
-        bill = Bill(
-            company_id=comp.id,
-            community_id=comm.id,
-            unit_id=unit_id,
-            cycle_start=cycle_start,
-            cycle_end=cycle_end,
-            status="draft",
-            total_amount=0,
+        company_id, community_id = _unit_scope(session, unit_id)
+        period = bill_period(cycle_start)
+        water = load_water_consumption(session, [unit_id], [period])
+        bill = _create_bill(
+            session,
+            unit_id,
+            lease,
+            (cycle_start, cycle_end),
+            company_id,
+            community_id,
+            water.get((unit_id, period), {}),
+            get_tariff_table().resolve(company_id, community_id, cycle_start),
+            actor_id,
         )
-        session.add(bill)
-        session.flush()
-
-        # rent line (store unit_price and qty so it can be frozen later)
-        rent_line = BillLine(
-            bill_id=bill.id,
-            item_code="rent",
-            charge_code="rent",
-            amount=lease.rent_amount,
-            qty=1,
-            unit_price=lease.rent_amount,
-        )
-        session.add(rent_line)
-
-        # compute total
-        bill.total_amount = lease.rent_amount
-        session.add(bill)
-
-        # audit
-        audit = AuditLog(
-            actor_id=actor_id,
-            action="create_bill",
-            before=None,
-            after=f"bill:{bill.id}",
-        )
-        session.add(audit)
-
+        if bill is None:
+            return _existing_bill(session, unit_id, cycle_start)
         session.commit()
         session.refresh(bill)
         return bill
@@ -104,16 +288,64 @@ def generate_bill_for_unit(
 def generate_batch_for_company(
     company_id: int, target_date: date, actor_id: Optional[int] = None
 ) -> List[Bill]:
+    """Generate (or return existing) bills for every leased unit of a company.
+
+    Only units with a lease active on `target_date` are billed; their
+    leases are resolved with one query for the whole company. Runs in one
+    session and transaction: existing bills, meter consumption and tariffs
+    for those units are loaded up front with batched queries instead of
+    per-unit lookups.
+    """
     bills = []
-    with Session(engine) as session:
-        leases = session.exec(select(Lease)).all()
-        for lease in leases:
-            try:
-                bill = generate_bill_for_unit(
-                    lease.unit_id, target_date, actor_id=actor_id
+    with Session(engine, expire_on_commit=False) as session:
+        rows = session.exec(
+            select(Lease, Community.id)
+            .join(Unit, Unit.id == Lease.unit_id)
+            .join(Building, Building.id == Unit.building_id)
+            .join(Community, Community.id == Building.community_id)
+            .where(Community.company_id == company_id, lease_active_on(target_date))
+            .order_by(Lease.unit_id, Lease.start_date.desc())
+        ).all()
+        # one lease per unit, matching find_active_lease
+        leases: Dict[int, Tuple[Lease, int]] = {}
+        for lease, community_id in rows:
+            leases.setdefault(lease.unit_id, (lease, community_id))
+        if not leases:
+            return bills
+
+        cycles = {
+            unit_id: compute_billing_cycle(lease.start_date, target_date)
+            for unit_id, (lease, _) in leases.items()
+        }
+        existing: Dict[Tuple[int, date], Bill] = {}
+        cycle_starts = {c[0] for c in cycles.values()}
+        for chunk in chunked(leases):
+            for b in session.exec(
+                select(Bill).where(
+                    Bill.unit_id.in_(chunk), Bill.cycle_start.in_(cycle_starts)
                 )
-                bills.append(bill)
-            except Exception:
-                session.rollback()
-                raise
+            ).all():
+                existing[(b.unit_id, b.cycle_start)] = b
+
+        periods = {bill_period(c[0]) for c in cycles.values()}
+        water = load_water_consumption(session, leases.keys(), periods)
+        tariffs = get_tariff_table()
+
+        for unit_id, (lease, community_id) in leases.items():
+            cycle = cycles[unit_id]
+            bill = existing.get((unit_id, cycle[0]))
+            if bill is None:
+                bill = _create_bill(
+                    session,
+                    unit_id,
+                    lease,
+                    cycle,
+                    company_id,
+                    community_id,
+                    water.get((unit_id, bill_period(cycle[0])), {}),
+                    tariffs.resolve(company_id, community_id, cycle[0]),
+                    actor_id,
+                ) or _existing_bill(session, unit_id, cycle[0])
+            bills.append(bill)
+        session.commit()
     return bills
@@ -0,0 +1,126 @@
+from collections import OrderedDict
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from sqlalchemy import Integer, String, cast, insert, select, update
+from sqlalchemy.engine import Connection
+
+from .db import engine
+from .models import AppConfig
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after `ttl` seconds.
+
+    Used for per-process hot-path lookups (authenticated users); values are
+    dropped explicitly on writes and expire on their own otherwise, so a
+    missed invalidation is bounded by the TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheVersions:
+    """Cross-process cache invalidation through counters in ``appconfig``.
+
+    Each worker process keeps its own caches. A writer bumps the counter
+    ``cache_version:<name>`` in the same transaction as the change, and
+    every process polls all counters at most once per `poll_interval`
+    (a single indexed SELECT), running the registered callbacks for names
+    whose counter moved. Other workers therefore see a change within
+    `poll_interval` seconds.
+    """
+
+    prefix = "cache_version:"
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._seen: Dict[str, Optional[str]] = {}
+        self._callbacks: Dict[str, List[Callable[[], None]]] = {}
+        self._next_poll = 0.0
+        self._lock = threading.Lock()
+
+    def register(self, name: str, callback: Callable[[], None]) -> None:
+        self._callbacks.setdefault(name, []).append(callback)
+
+    def bump(self, conn: Connection, name: str) -> None:
+        """Increment `name` on `conn`, inside the writer's transaction."""
+        table = AppConfig.__table__
+        key = self.prefix + name
+        updated = conn.execute(
+            update(table)
+            .where(table.c.key == key)
+            .values(value=cast(cast(table.c.value, Integer) + 1, String))
+        ).rowcount
+        if not updated:
+            # counters are seeded by migration 0019; only unmigrated
+            # (DB_AUTO_CREATE) databases get here
+            conn.execute(insert(table).values(key=key, value="1"))
+
+    def poll(self, force: bool = False) -> List[str]:
+        """Run callbacks for counters changed since the last poll."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now < self._next_poll:
+                return []
+            self._next_poll = now + self.poll_interval
+        table = AppConfig.__table__
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(table.c.key, table.c.value).where(
+                    table.c.key.startswith(self.prefix)
+                )
+            ).all()
+        current = {key[len(self.prefix) :]: value for key, value in rows}
+        with self._lock:
+            changed = [
+                name
+                for name in self._callbacks
+                if name in self._seen and self._seen[name] != current.get(name)
+            ]
+            for name in self._callbacks:
+                self._seen[name] = current.get(name)
+        for name in changed:
+            for callback in self._callbacks[name]:
+                callback()
+        return changed
+
+
+cache_versions = CacheVersions(float(os.getenv("CACHE_VERSION_POLL_SECONDS", "1.0")))
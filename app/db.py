@@ -1,7 +1,11 @@
+import logging
 import os
+import sqlite3
+from typing import Iterable, Optional
 
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlmodel import SQLModel, create_engine
 
 # Allow overriding the database URL via environment for tests/CI
@@ -14,13 +18,38 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
 )
 
+logger = logging.getLogger(__name__)
+
+# keep IN (...) lists well below SQLite's bound-parameter limit
+IN_CHUNK_SIZE = 500
+
+
+def chunked(values: Iterable, size: int = IN_CHUNK_SIZE):
+    """Yield lists of at most `size` items, for batched IN (...) lookups."""
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i : i + size]
+
+
+# WAL growth control: checkpoint automatically every N pages and truncate a
+# reset WAL file back to this many bytes (see app.maintenance for the
+# scheduled checkpoints)
+SQLITE_WAL_AUTOCHECKPOINT = int(os.getenv("SQLITE_WAL_AUTOCHECKPOINT", "1000"))
+SQLITE_JOURNAL_SIZE_LIMIT = int(
+    os.getenv("SQLITE_JOURNAL_SIZE_LIMIT", str(64 * 1024 * 1024))
+)
+
 
 @event.listens_for(Engine, "connect")
 def _set_sqlite_pragma(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
     # Enable WAL and foreign keys on each new connection
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA journal_mode=WAL;")
     cursor.execute("PRAGMA foreign_keys=ON;")
+    cursor.execute(f"PRAGMA wal_autocheckpoint={SQLITE_WAL_AUTOCHECKPOINT};")
+    cursor.execute(f"PRAGMA journal_size_limit={SQLITE_JOURNAL_SIZE_LIMIT};")
     cursor.close()
 
 
@@ -31,3 +60,89 @@ def init_db():
     # add the `remark` column to `unit` — run `alembic upgrade head` in
     # your environment to apply it. We avoid making schema changes at
     # runtime in `init_db()` to keep behavior predictable in production.
+
+
+# the expected revision is the head of alembic/versions next to this package
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ALEMBIC_CONFIG = os.getenv("ALEMBIC_CONFIG", os.path.join(_ROOT, "alembic.ini"))
+# accept a database migrated by newer code (rolling deploys), with a warning
+SCHEMA_ALLOW_UNKNOWN = os.getenv("SCHEMA_ALLOW_UNKNOWN", "0") == "1"
+# development fallback: create missing tables instead of refusing to start
+DB_AUTO_CREATE = os.getenv("DB_AUTO_CREATE", "0") == "1"
+
+
+class SchemaOutOfDate(Exception):
+    pass
+
+
+def schema_revision() -> Optional[str]:
+    """The revision stamped in ``alembic_version``, or None if unmigrated."""
+    with engine.connect() as conn:
+        try:
+            return conn.exec_driver_sql(
+                "SELECT version_num FROM alembic_version"
+            ).scalar()
+        except (OperationalError, ProgrammingError):
+            return None
+
+
+def _script_directory():
+    # alembic is imported lazily; it is only needed for this startup check
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(ALEMBIC_CONFIG)
+    location = config.get_main_option("script_location")
+    config.set_main_option(
+        "script_location",
+        os.path.join(os.path.dirname(os.path.abspath(ALEMBIC_CONFIG)), location),
+    )
+    return ScriptDirectory.from_config(config)
+
+
+def schema_head() -> str:
+    """The newest migration in the script directory, which this code expects."""
+    return _script_directory().get_current_head()
+
+
+def _is_known_revision(script, revision: str) -> bool:
+    from alembic.util import CommandError
+
+    try:
+        script.get_revision(revision)
+    except CommandError:
+        return False
+    return True
+
+
+def check_schema() -> Optional[str]:
+    """Startup check: one SELECT instead of create_all over every table.
+
+    Raises SchemaOutOfDate unless the database is at the head of the script
+    directory. A revision the script directory does not know was written by
+    newer code; with SCHEMA_ALLOW_UNKNOWN=1 (for workers still on the
+    previous release during a rolling deploy) it is accepted with a warning.
+    With DB_AUTO_CREATE=1 it runs `init_db` instead of raising.
+    """
+    revision = schema_revision()
+    script = _script_directory()
+    head = script.get_current_head()
+    if revision == head:
+        return revision
+    unknown = revision is not None and not _is_known_revision(script, revision)
+    if unknown and SCHEMA_ALLOW_UNKNOWN:
+        logger.warning(
+            "database schema is at unknown revision %s, this code expects %s; "
+            "starting because SCHEMA_ALLOW_UNKNOWN=1",
+            revision,
+            head,
+        )
+        return revision
+    if DB_AUTO_CREATE:
+        init_db()
+        return revision
+    state = "an unknown revision" if unknown else "behind"
+    raise SchemaOutOfDate(
+        f"database schema is at {revision or 'no revision'} ({state}), expected "
+        f"{head}; run `alembic upgrade head`"
+    )
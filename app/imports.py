@@ -1,16 +1,44 @@
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
 import csv
-from datetime import datetime
-from decimal import Decimal
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
 from io import TextIOWrapper
 import json
+import logging
+import os
+import threading
 import traceback
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import UploadFile
+from sqlalchemy import insert, update
 from sqlmodel import Session, select
 
-from .db import engine
-from .models import Building, Community, Company, ImportBatch, Lease, Tenant, Unit
+from .db import chunked, engine
+from .locks import acquire_lock, release_lock, worker_id
+from .models import (
+    Bill,
+    Building,
+    Community,
+    Company,
+    ImportBatch,
+    Lease,
+    Payment,
+    Tenant,
+    Unit,
+    find_lease_overlaps,
+)
+from .profiling import Profiler, profiling_enabled
+from .reports import apply_summary_delta, bill_period
+
+IMPORT_DIR = os.getenv("IMPORT_DIR", "./data/imports")
+# pending batches older than this lost their background task
+IMPORT_STALE_SECONDS = int(os.getenv("IMPORT_STALE_SECONDS", str(2 * 3600)))
+# a running import holds lock "import:<id>" and renews it every third of this
+IMPORT_LOCK_TTL = int(os.getenv("IMPORT_LOCK_TTL", "300"))
+
+logger = logging.getLogger(__name__)
 
 
 class ImportErrors(Exception):
@@ -107,10 +135,104 @@ def import_rooms_file(upload: UploadFile) -> Dict[str, int]:
     return {"created": created, "updated": updated}
 
 
+def _ranges_overlap(start, end, other_start, other_end) -> bool:
+    return (end is None or other_start is None or other_start <= end) and (
+        start is None or other_end is None or other_end >= start
+    )
+
+
+def _apply_lease_rows(
+    session: Session, pending: List[Tuple], errors: List[Dict[str, Any]]
+) -> Tuple[int, int]:
+    """Create or update the parsed lease rows, a chunk of rows at a time.
+
+    Leases are idempotent by unit_id + start_date: the matching lease is
+    updated and excluded from the overlap check. Each chunk costs one
+    lookup of existing leases, one of tenants and one `find_lease_overlaps`
+    join; rows of the same chunk are checked against each other in memory.
+    """
+    created = 0
+    updated = 0
+    for chunk in chunked(pending):
+        # earlier chunks must be visible to the overlap join
+        session.flush()
+        unit_ids = {r[1] for r in chunk}
+        existing = {
+            (lease.unit_id, lease.start_date): lease
+            for lease in session.exec(
+                select(Lease).where(
+                    Lease.unit_id.in_(list(unit_ids)),
+                    Lease.start_date.in_(list({r[2] for r in chunk})),
+                )
+            ).all()
+        }
+        tenants = {
+            (t.name, t.mobile): t
+            for t in session.exec(
+                select(Tenant).where(Tenant.name.in_(list({r[6] for r in chunk})))
+            ).all()
+        }
+        overlaps = find_lease_overlaps(
+            session,
+            [
+                (
+                    unit_id,
+                    start,
+                    end,
+                    getattr(existing.get((unit_id, start)), "id", None),
+                )
+                for _, unit_id, start, end, *_ in chunk
+            ],
+        )
+        accepted: Dict[int, Dict[Any, Any]] = defaultdict(dict)
+        for i, row in enumerate(chunk):
+            rownum, unit_id, start, end, rent, deposit, name, mobile = row
+            if i in overlaps or any(
+                _ranges_overlap(start, end, other_start, other_end)
+                for other_start, other_end in accepted[unit_id].items()
+                if other_start != start
+            ):
+                errors.append(
+                    {"row": rownum, "error": "lease date overlaps existing lease"}
+                )
+                continue
+            accepted[unit_id][start] = end
+
+            tenant = tenants.get((name, mobile))
+            if not tenant:
+                tenant = Tenant(name=name, mobile=mobile)
+                session.add(tenant)
+                session.flush()
+                tenants[(name, mobile)] = tenant
+
+            lease = existing.get((unit_id, start))
+            if not lease:
+                lease = Lease(
+                    unit_id=unit_id,
+                    tenant_id=tenant.id,
+                    start_date=start,
+                    end_date=end,
+                    rent_amount=rent,
+                    deposit_amount=deposit,
+                )
+                session.add(lease)
+                existing[(unit_id, start)] = lease
+                created += 1
+            else:
+                lease.tenant_id = tenant.id
+                lease.end_date = end
+                lease.rent_amount = rent
+                lease.deposit_amount = deposit
+                updated += 1
+    errors.sort(key=lambda e: e["row"])
+    return created, updated
+
+
 def import_leases_file(upload: UploadFile) -> Dict[str, int]:
     errors: List[Dict[str, Any]] = []
     created = 0
     updated = 0
+    pending: List[Tuple] = []
     with Session(engine) as session:
         try:
             with session.begin():
@@ -217,64 +339,20 @@ def import_leases_file(upload: UploadFile) -> Dict[str, int]:
                         errors.append({"row": rownum, "error": "invalid amount format"})
                         continue
 
-                    # check lease overlap for this unit
-                    existing_leases = session.exec(
-                        select(Lease).where(Lease.unit_id == u.id)
-                    ).all()
-                    overlap = False
-                    for el in existing_leases:
-                        if (el.start_date <= end_date) and (start_date <= el.end_date):
-                            # allow exact same start_date to be treated as idempotent update
-                            if el.start_date == start_date:
-                                # will update below
-                                continue
-                            overlap = True
-                            break
-                    if overlap:
-                        errors.append(
-                            {
-                                "row": rownum,
-                                "error": "lease date overlaps existing lease",
-                            }
+                    pending.append(
+                        (
+                            rownum,
+                            u.id,
+                            start_date,
+                            end_date,
+                            rent_amount,
+                            deposit_amount,
+                            tenant_name,
+                            tenant_mobile,
                         )
-                        continue
-
-                    # find or create tenant
-                    tenant = session.exec(
-                        select(Tenant).where(
-                            Tenant.name == tenant_name, Tenant.mobile == tenant_mobile
-                        )
-                    ).first()
-                    if not tenant:
-                        tenant = Tenant(name=tenant_name, mobile=tenant_mobile)
-                        session.add(tenant)
-                        session.flush()
-
-                    # idempotent by unit_id + start_date
-                    lease = session.exec(
-                        select(Lease).where(
-                            Lease.unit_id == u.id, Lease.start_date == start_date
-                        )
-                    ).first()
-                    if not lease:
-                        lease = Lease(
-                            unit_id=u.id,
-                            tenant_id=tenant.id,
-                            start_date=start_date,
-                            end_date=end_date,
-                            rent_amount=rent_amount,
-                            deposit_amount=deposit_amount,
-                        )
-                        session.add(lease)
-                        created += 1
-                    else:
-                        # update fields
-                        lease.tenant_id = tenant.id
-                        lease.end_date = end_date
-                        lease.rent_amount = rent_amount
-                        lease.deposit_amount = deposit_amount
-                        updated += 1
+                    )
 
+                created, updated = _apply_lease_rows(session, pending, errors)
                 if errors:
                     raise ImportErrors(errors)
         finally:
@@ -371,6 +449,7 @@ def process_leases_path(path: str) -> Dict[str, int]:
     errors: List[Dict[str, Any]] = []
     created = 0
     updated = 0
+    pending: List[Tuple] = []
     with Session(engine) as session:
         with session.begin():
             for rownum, row in _read_csv_from_path(path):
@@ -461,105 +540,408 @@ def process_leases_path(path: str) -> Dict[str, int]:
                     errors.append({"row": rownum, "error": "invalid amount format"})
                     continue
 
-                existing_leases = session.exec(
-                    select(Lease).where(Lease.unit_id == u.id)
-                ).all()
-                overlap = False
-                for el in existing_leases:
-                    if (el.start_date <= end_date) and (start_date <= el.end_date):
-                        if el.start_date == start_date:
-                            continue
-                        overlap = True
-                        break
-                if overlap:
-                    errors.append(
-                        {"row": rownum, "error": "lease date overlaps existing lease"}
-                    )
-                    continue
-
-                tenant = session.exec(
-                    select(Tenant).where(
-                        Tenant.name == tenant_name, Tenant.mobile == tenant_mobile
-                    )
-                ).first()
-                if not tenant:
-                    tenant = Tenant(name=tenant_name, mobile=tenant_mobile)
-                    session.add(tenant)
-                    session.flush()
-
-                lease = session.exec(
-                    select(Lease).where(
-                        Lease.unit_id == u.id, Lease.start_date == start_date
-                    )
-                ).first()
-                if not lease:
-                    lease = Lease(
-                        unit_id=u.id,
-                        tenant_id=tenant.id,
-                        start_date=start_date,
-                        end_date=end_date,
-                        rent_amount=rent_amount,
-                        deposit_amount=deposit_amount,
+                pending.append(
+                    (
+                        rownum,
+                        u.id,
+                        start_date,
+                        end_date,
+                        rent_amount,
+                        deposit_amount,
+                        tenant_name,
+                        tenant_mobile,
                     )
-                    session.add(lease)
-                    created += 1
-                else:
-                    lease.tenant_id = tenant.id
-                    lease.end_date = end_date
-                    lease.rent_amount = rent_amount
-                    lease.deposit_amount = deposit_amount
-                    updated += 1
+                )
 
+            created, updated = _apply_lease_rows(session, pending, errors)
             if errors:
                 raise ImportErrors(errors)
 
     return {"created": created, "updated": updated}
 
 
-def process_import_batch(batch_id: int, path: str):
-    # update batch status and run import, capturing results/errors
+def _parse_payment_row(rownum: int, row: Dict[str, str]):
+    """Validate one payments.csv row; return (record, error)."""
+    bill_id_s = row.get("bill_id")
+    unit_key = (
+        row.get("company_code"),
+        row.get("community_code"),
+        row.get("building_code"),
+        row.get("unit_no"),
+    )
+    cycle_start_s = row.get("cycle_start")
+    if not bill_id_s and not (all(unit_key) and cycle_start_s):
+        return None, {
+            "row": rownum,
+            "error": "bill_id or unit codes with cycle_start required",
+        }
+    try:
+        amount = Decimal(row.get("amount") or "")
+    except InvalidOperation:
+        return None, {"row": rownum, "error": "invalid amount format"}
+    # NaN and Infinity parse, but NaN raises on comparison
+    if not amount.is_finite():
+        return None, {"row": rownum, "error": "invalid amount format"}
+    if amount <= 0:
+        return None, {"row": rownum, "error": "amount must be positive"}
+    try:
+        bill_id = int(bill_id_s) if bill_id_s else None
+        cycle_start = (
+            datetime.strptime(cycle_start_s, "%Y-%m-%d").date()
+            if cycle_start_s
+            else None
+        )
+        received_s = row.get("received_at")
+        received_at = (
+            datetime.fromisoformat(received_s) if received_s else datetime.utcnow()
+        )
+    except ValueError:
+        return None, {
+            "row": rownum,
+            "error": "invalid bill_id or date format, expected YYYY-MM-DD",
+        }
+    return {
+        "row": rownum,
+        "bill_id": bill_id,
+        "unit_key": unit_key,
+        "cycle_start": cycle_start,
+        "amount": amount,
+        "method": row.get("method") or None,
+        "reference": row.get("reference") or None,
+        "received_at": received_at,
+    }, None
+
+
+def _load_bills_by_id(session: Session, ids) -> Dict[int, Bill]:
+    out: Dict[int, Bill] = {}
+    for chunk in chunked(ids):
+        for b in session.exec(select(Bill).where(Bill.id.in_(chunk))).all():
+            out[b.id] = b
+    return out
+
+
+def _load_units_by_key(session: Session, keys) -> Dict[Tuple[str, ...], int]:
+    """Map (company, community, building, unit_no) codes to unit ids."""
+    out: Dict[Tuple[str, ...], int] = {}
+    wanted = set(keys)
+    company_codes = {k[0] for k in wanted}
+    for chunk in chunked(company_codes):
+        rows = session.exec(
+            select(Company.code, Community.code, Building.code, Unit.unit_no, Unit.id)
+            .join(Community, Community.company_id == Company.id)
+            .join(Building, Building.community_id == Community.id)
+            .join(Unit, Unit.building_id == Building.id)
+            .where(Company.code.in_(chunk))
+        ).all()
+        for comp_code, comm_code, bld_code, unit_no, unit_id in rows:
+            key = (comp_code, comm_code, bld_code, unit_no)
+            if key in wanted:
+                out[key] = unit_id
+    return out
+
+
+def _load_bills_by_unit_cycle(session: Session, unit_ids, cycle_starts):
+    out: Dict[Tuple[int, Any], Bill] = {}
+    if not cycle_starts:
+        return out
+    for chunk in chunked(unit_ids):
+        rows = session.exec(
+            select(Bill).where(
+                Bill.unit_id.in_(chunk), Bill.cycle_start.in_(list(cycle_starts))
+            )
+        ).all()
+        for b in rows:
+            out[(b.unit_id, b.cycle_start)] = b
+    return out
+
+
+def _load_existing_references(session: Session, unit_ids) -> set:
+    out = set()
+    for chunk in chunked(unit_ids):
+        rows = session.exec(
+            select(Payment.unit_id, Payment.reference).where(
+                Payment.unit_id.in_(chunk), Payment.reference.is_not(None)
+            )
+        ).all()
+        out.update((u, ref) for u, ref in rows)
+    return out
+
+
+def process_payments_path(path: str) -> Dict[str, Any]:
+    """Import a cashier/bank payments CSV in a single transaction.
+
+    Columns: ``bill_id`` or ``company_code, community_code, building_code,
+    unit_no, cycle_start`` to locate the bill, plus ``amount`` and optional
+    ``method, reference, received_at``. Lookups are preloaded into dicts
+    with a handful of IN queries and matched rows are bulk-inserted. Rows
+    whose bill cannot be found are reported as ``unmatched`` and skipped;
+    rows whose ``reference`` was already imported for the same unit are
+    skipped as duplicates so re-importing a file is idempotent. Invalid
+    rows fail the whole batch like the other importers.
+    """
+    errors: List[Dict[str, Any]] = []
+    records: List[Dict[str, Any]] = []
+    for rownum, row in _read_csv_from_path(path):
+        rec, err = _parse_payment_row(rownum, row)
+        if err:
+            errors.append(err)
+        else:
+            records.append(rec)
+    if errors:
+        raise ImportErrors(errors)
+
+    unmatched: List[Dict[str, Any]] = []
+    duplicates = 0
+    with Session(engine) as session:
+        with session.begin():
+            bills_by_id = _load_bills_by_id(
+                session, {r["bill_id"] for r in records if r["bill_id"]}
+            )
+            units_by_key = _load_units_by_key(
+                session, {r["unit_key"] for r in records if not r["bill_id"]}
+            )
+            bills_by_unit_cycle = _load_bills_by_unit_cycle(
+                session,
+                set(units_by_key.values()),
+                {r["cycle_start"] for r in records if not r["bill_id"]},
+            )
+
+            matched: List[Tuple[Dict[str, Any], Bill]] = []
+            for rec in records:
+                if rec["bill_id"]:
+                    bill = bills_by_id.get(rec["bill_id"])
+                    reason = f"bill {rec['bill_id']} not found"
+                else:
+                    unit_id = units_by_key.get(rec["unit_key"])
+                    bill = bills_by_unit_cycle.get((unit_id, rec["cycle_start"]))
+                    if unit_id is None:
+                        reason = f"unit {'/'.join(rec['unit_key'])} not found"
+                    else:
+                        reason = f"no bill for cycle {rec['cycle_start']}"
+                if bill is None:
+                    unmatched.append({"row": rec["row"], "error": reason})
+                elif bill.status == "void":
+                    unmatched.append({"row": rec["row"], "error": "bill is void"})
+                else:
+                    matched.append((rec, bill))
+
+            seen = _load_existing_references(
+                session, {bill.unit_id for _, bill in matched}
+            )
+            rows = []
+            deltas: Dict[Tuple[Any, ...], Decimal] = defaultdict(Decimal)
+            for rec, bill in matched:
+                if rec["reference"]:
+                    key = (bill.unit_id, rec["reference"])
+                    if key in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(key)
+                rows.append(
+                    {
+                        "bill_id": bill.id,
+                        "unit_id": bill.unit_id,
+                        "amount": rec["amount"],
+                        "method": rec["method"],
+                        "reference": rec["reference"],
+                        "received_at": rec["received_at"],
+                    }
+                )
+                deltas[
+                    (
+                        bill.company_id,
+                        bill.community_id,
+                        bill_period(bill.cycle_start),
+                        bill.status,
+                    )
+                ] += rec["amount"]
+
+            if rows:
+                session.execute(insert(Payment), rows)
+            for (company_id, community_id, period, status), amount in deltas.items():
+                apply_summary_delta(
+                    session, company_id, community_id, period, status, paid=amount
+                )
+
+    return {
+        "created": len(rows),
+        "duplicates": duplicates,
+        "total_amount": str(sum((r["amount"] for r in rows), Decimal("0"))),
+        "unmatched": unmatched,
+    }
+
+
+def batch_upload_path(batch_id: int, filename: str) -> str:
+    return os.path.join(IMPORT_DIR, f"{batch_id}_{filename}")
+
+
+def _import_lock(batch_id: int) -> str:
+    return f"import:{batch_id}"
+
+
+@contextmanager
+def _heartbeat(name: str, owner: str):
+    """Renew lock `name` in a background thread while the block runs."""
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(IMPORT_LOCK_TTL / 3):
+            if not acquire_lock(name, IMPORT_LOCK_TTL, owner):
+                return
+
+    thread = threading.Thread(target=beat, name=f"{name}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _finish_batch(batch_id: int, owner: str, **values) -> bool:
+    """Write the final status unless the batch was taken over meanwhile."""
+    lock = _import_lock(batch_id)
+    if not acquire_lock(lock, IMPORT_LOCK_TTL, owner):
+        logger.warning("import batch %d was taken over; result dropped", batch_id)
+        return False
+    try:
+        with Session(engine) as session:
+            written = session.exec(
+                update(ImportBatch)
+                .where(ImportBatch.id == batch_id, ImportBatch.status == "processing")
+                .values(finished_at=datetime.utcnow(), **values)
+            ).rowcount
+            session.commit()
+    finally:
+        release_lock(lock, owner)
+    if not written:
+        logger.warning(
+            "import batch %d is no longer processing; result dropped", batch_id
+        )
+    return bool(written)
+
+
+def process_import_batch(batch_id: int, path: str, profile: Optional[bool] = None):
+    # update batch status and run import, capturing results/errors; with
+    # profiling on (see app.profiling) the summary is stored on the batch
     with Session(engine) as session:
         b0 = session.get(ImportBatch, batch_id)
         if not b0:
             return
         kind = b0.kind
-        b0.status = "processing"
-        b0.started_at = datetime.utcnow()
-        session.add(b0)
+    # the lock marks the batch as owned by a live worker; recovery only
+    # fails processing batches whose lock has expired
+    owner = f"{worker_id()}:{threading.get_ident()}"
+    lock = _import_lock(batch_id)
+    if not acquire_lock(lock, IMPORT_LOCK_TTL, owner):
+        return
+    with Session(engine) as session:
+        # claim the batch: only one process (the upload's worker or import
+        # recovery) may move it out of pending
+        claimed = session.exec(
+            update(ImportBatch)
+            .where(ImportBatch.id == batch_id, ImportBatch.status == "pending")
+            .values(status="processing", started_at=datetime.utcnow())
+        ).rowcount
         session.commit()
+    if not claimed:
+        release_lock(lock, owner)
+        return
 
+    profiler = Profiler() if profiling_enabled(profile) else None
     try:
-        if kind == "rooms":
-            res = process_rooms_path(path)
-        else:
-            res = process_leases_path(path)
+        with _heartbeat(lock, owner), profiler or nullcontext():
+            if kind == "rooms":
+                res = process_rooms_path(path)
+            elif kind == "payments":
+                res = process_payments_path(path)
+            else:
+                res = process_leases_path(path)
         # ensure result is JSON-serializable
         try:
             result_json = json.dumps(res, ensure_ascii=False)
         except Exception:
             # fallback to string representation
             result_json = json.dumps({"result": str(res)}, ensure_ascii=False)
-        with Session(engine) as session:
-            b = session.get(ImportBatch, batch_id)
-            b.status = "done"
-            b.finished_at = datetime.utcnow()
-            b.result = result_json
-            session.add(b)
-            session.commit()
+        values = {"status": "done", "result": result_json}
     except ImportErrors as ie:
-        with Session(engine) as session:
-            b = session.get(ImportBatch, batch_id)
-            b.status = "failed"
-            b.finished_at = datetime.utcnow()
-            b.errors = json.dumps(ie.errors, ensure_ascii=False)
-            session.add(b)
-            session.commit()
+        values = {
+            "status": "failed",
+            "errors": json.dumps(ie.errors, ensure_ascii=False),
+        }
     except Exception as e:
         tb = traceback.format_exc()
-        with Session(engine) as session:
-            b = session.get(ImportBatch, batch_id)
-            b.status = "failed"
-            b.finished_at = datetime.utcnow()
-            b.errors = json.dumps({"error": str(e), "trace": tb}, ensure_ascii=False)
-            session.add(b)
-            session.commit()
+        values = {
+            "status": "failed",
+            "errors": json.dumps({"error": str(e), "trace": tb}, ensure_ascii=False),
+        }
+    if profiler is not None:
+        values["profile"] = profiler.to_json()
+    _finish_batch(batch_id, owner, **values)
+
+
+def _fail_batch(session: Session, batch: ImportBatch, message: str, now) -> None:
+    batch.status = "failed"
+    batch.finished_at = now
+    batch.errors = json.dumps({"error": message}, ensure_ascii=False)
+    session.add(batch)
+
+
+def recover_import_batches(now: Optional[datetime] = None) -> Dict[str, List[int]]:
+    """Finish batches whose worker process went away.
+
+    Imports run as background tasks of the worker that received the upload
+    and are lost if it exits. Pending batches older than IMPORT_STALE_SECONDS
+    are processed here. A processing batch whose import lock has expired has
+    no live worker any more and is marked failed, since a partly applied
+    import cannot be resumed safely; taking the lock first keeps a late
+    worker from overwriting that status.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(seconds=IMPORT_STALE_SECONDS)
+    owner = f"{worker_id()}:recovery"
+    failed, requeue = [], []
+    with Session(engine) as session:
+        processing = session.exec(
+            select(ImportBatch.id).where(ImportBatch.status == "processing")
+        ).all()
+        for batch_id in processing:
+            lock = _import_lock(batch_id)
+            if not acquire_lock(lock, IMPORT_LOCK_TTL, owner):
+                continue
+            try:
+                stopped = session.exec(
+                    update(ImportBatch)
+                    .where(
+                        ImportBatch.id == batch_id,
+                        ImportBatch.status == "processing",
+                    )
+                    .values(
+                        status="failed",
+                        finished_at=now,
+                        errors=json.dumps(
+                            {"error": "worker stopped during import; upload again"},
+                            ensure_ascii=False,
+                        ),
+                    )
+                ).rowcount
+                session.commit()
+            finally:
+                release_lock(lock, owner)
+            if stopped:
+                failed.append(batch_id)
+        for b in session.exec(
+            select(ImportBatch).where(
+                ImportBatch.status == "pending", ImportBatch.created_at < cutoff
+            )
+        ).all():
+            path = batch_upload_path(b.id, b.filename)
+            if os.path.exists(path):
+                requeue.append((b.id, path))
+            else:
+                _fail_batch(session, b, "uploaded file is missing", now)
+                failed.append(b.id)
+        session.commit()
+    for batch_id, path in requeue:
+        process_import_batch(batch_id, path)
+    return {"failed": failed, "processed": [batch_id for batch_id, _ in requeue]}
@@ -0,0 +1,88 @@
+"""Named database locks with an expiry, shared by all worker processes.
+
+A lock row in ``joblock`` belongs to one owner until ``expires_at``. The
+owner renews it by acquiring again; any other process may take it over once
+it has expired, so a crashed worker never blocks the others for longer than
+the TTL.
+"""
+
+from datetime import datetime, timedelta
+import os
+import socket
+from typing import Any, Dict, Optional
+
+from sqlalchemy import case, delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .db import engine
+from .models import JobLock
+
+_table = JobLock.__table__
+
+
+def worker_id() -> str:
+    """Owner name for locks taken by this process."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_lock(
+    name: str,
+    ttl: float,
+    owner: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> bool:
+    """Take or renew lock `name` for `ttl` seconds; False if held elsewhere."""
+    owner = owner or worker_id()
+    now = now or datetime.utcnow()
+    expires = now + timedelta(seconds=ttl)
+    with engine.begin() as conn:
+        renewed = conn.execute(
+            update(_table)
+            .where(
+                _table.c.name == name,
+                or_(_table.c.owner == owner, _table.c.expires_at < now),
+            )
+            .values(
+                owner=owner,
+                acquired_at=case(
+                    (_table.c.owner == owner, _table.c.acquired_at), else_=now
+                ),
+                expires_at=expires,
+            )
+        ).rowcount
+    if renewed:
+        return True
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                insert(_table).values(
+                    name=name, owner=owner, acquired_at=now, expires_at=expires
+                )
+            )
+    except IntegrityError:
+        # another process created the row first
+        return False
+    return True
+
+
+def release_lock(name: str, owner: Optional[str] = None) -> bool:
+    owner = owner or worker_id()
+    with engine.begin() as conn:
+        deleted = conn.execute(
+            delete(_table).where(_table.c.name == name, _table.c.owner == owner)
+        ).rowcount
+    return bool(deleted)
+
+
+def lock_holder(name: str, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """The current (unexpired) holder of `name`, or None."""
+    now = now or datetime.utcnow()
+    with engine.connect() as conn:
+        row = (
+            conn.execute(
+                select(_table).where(_table.c.name == name, _table.c.expires_at >= now)
+            )
+            .mappings()
+            .first()
+        )
+    return dict(row) if row else None
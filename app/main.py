@@ -18,29 +18,53 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.templating import Jinja2Templates
+from pydantic import ValidationError
 from sqlmodel import Session, select
 
+from .api.audit import router as audit_router
 from .api.billing import router as billing_router
+from .api.jobs import router as jobs_router
+from .api.meters import router as meters_router
+from .api.metrics import router as metrics_router
+from .api.profiles import router as profiles_router
+from .api.reports import router as reports_router
+from .api.units import router as units_router
+from .audit import record_audit, shutdown_audit_writer
 from .auth import (
     SESSION_COOKIE_NAME,
-    authenticate_user,
-    create_access_token,
+    SESSION_EXPIRE_SECONDS,
+    AuthUser,
+    authenticate_user_async,
     create_session_cookie,
+    create_user_token,
     get_current_user,
     get_current_user_from_cookie,
     get_password_hash,
     require_role,
     require_role_cookie,
+    revoke_user_sessions,
 )
 from .billing import generate_batch_for_company, generate_bill_for_unit
-from .db import engine, init_db
-from .imports import process_import_batch
-from .models import AuditLog, Bill, BillLine, ImportBatch, User
+from .db import check_schema, engine
+from .models import Bill, BillLine, ImportBatch, User
+from .passwords import shutdown_password_pool
+from .payments import bill_paid_amount, record_payment
+from .profiling import profiled_run, profiling_enabled
+from .reports import summary_move_bill
+from .scheduler import start_scheduler, stop_scheduler
+from .schemas import PaymentCreate, PaymentResponse
 
 app = FastAPI(title="LAN Apartment Billing System")
 
 # include billing API
+app.include_router(audit_router)
 app.include_router(billing_router)
+app.include_router(jobs_router)
+app.include_router(meters_router)
+app.include_router(metrics_router)
+app.include_router(profiles_router)
+app.include_router(reports_router)
+app.include_router(units_router)
 
 templates = Jinja2Templates(directory="app/templates")
 
@@ -57,7 +81,8 @@ app.add_middleware(
 
 @app.on_event("startup")
 def on_startup():
-    init_db()
+    # refuses to start on an unmigrated database (see DB_AUTO_CREATE)
+    check_schema()
     # Ensure default admin exists for initial setup (password from env only)
     admin_user = os.getenv("ADMIN_USER", "admin")
     admin_pwd = os.getenv("ADMIN_PASSWORD")
@@ -74,6 +99,15 @@ def on_startup():
                 )
                 session.add(u)
                 session.commit()
+    # periodic billing and maintenance jobs; no-op unless SCHEDULER_ENABLED=1
+    start_scheduler()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    stop_scheduler()
+    shutdown_password_pool()
+    shutdown_audit_writer()
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -85,15 +119,13 @@ def index(request: Request):
     except Exception:
         current_user = None
     return templates.TemplateResponse(
-        "index.html", {"request": request, "current_user": current_user}
+        request, "index.html", {"current_user": current_user}
     )
 
 
 @app.get("/login", response_class=HTMLResponse)
 def login_get(request: Request, error: Optional[str] = None):
-    return templates.TemplateResponse(
-        "login.html", {"request": request, "error": error}
-    )
+    return templates.TemplateResponse(request, "login.html", {"error": error})
 
 
 @app.post("/login")
@@ -101,7 +133,13 @@ async def login_post(request: Request):
     form = await request.form()
     username = form.get("username")
     password = form.get("password")
-    user = authenticate_user(username, password)
+    try:
+        user = await authenticate_user_async(
+            username, password, request.client.host if request.client else None
+        )
+    except HTTPException as exc:
+        error = "throttled" if exc.status_code == 429 else "busy"
+        return RedirectResponse(url=f"/login?error={error}", status_code=303)
     if not user:
         return RedirectResponse(url="/login?error=invalid", status_code=303)
     token = create_session_cookie(user)
@@ -111,7 +149,7 @@ async def login_post(request: Request):
         value=token,
         httponly=True,
         samesite="lax",
-        max_age=60 * 60 * 12,
+        max_age=SESSION_EXPIRE_SECONDS,
     )
     return resp
 
@@ -125,10 +163,10 @@ def logout(request: Request):
 
 @app.get("/dashboard", response_class=HTMLResponse)
 def dashboard(
-    request: Request, current_user: User = Depends(require_role_cookie("clerk"))
+    request: Request, current_user: AuthUser = Depends(require_role_cookie("clerk"))
 ):
     return templates.TemplateResponse(
-        "dashboard.html", {"request": request, "current_user": current_user}
+        request, "dashboard.html", {"current_user": current_user}
     )
 
 
@@ -138,16 +176,22 @@ def health():
 
 
 @app.post("/api/auth/token")
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+async def login_for_access_token(
+    request: Request, form_data: OAuth2PasswordRequestForm = Depends()
+):
+    user = await authenticate_user_async(
+        form_data.username,
+        form_data.password,
+        request.client.host if request.client else None,
+    )
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_user_token(user)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @app.get("/api/users/me")
-def read_users_me(current_user: User = Depends(get_current_user)):
+def read_users_me(current_user: AuthUser = Depends(get_current_user)):
     return {"username": current_user.username, "role": current_user.role}
 
 
@@ -165,9 +209,21 @@ def create_user(username: str, password: str, role: str = "clerk"):
         return {"username": user.username, "role": user.role}
 
 
+@app.post(
+    "/api/users/{user_id}/revoke-sessions",
+    dependencies=[Depends(require_role("admin"))],
+)
+def api_revoke_sessions(user_id: int):
+    """Sign the user out of every browser session (bearer tokens unaffected)."""
+    epoch = revoke_user_sessions(user_id)
+    if epoch is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"user_id": user_id, "session_epoch": epoch}
+
+
 @app.post("/api/v1/bills/generate")
 def api_generate_bill(
-    unit_id: int, date: str, current_user: User = Depends(require_role("clerk"))
+    unit_id: int, date: str, current_user: AuthUser = Depends(require_role("clerk"))
 ):
     d = datetime.strptime(date, "%Y-%m-%d").date()
     bill = generate_bill_for_unit(unit_id, d, actor_id=current_user.id)
@@ -178,29 +234,36 @@ def api_generate_bill(
     }
 
 
+def _check_profile_request(profile: Optional[bool], user: AuthUser) -> None:
+    # profiles expose SQL and code paths; only admins may ask for one
+    if profile and user.role != "admin":
+        raise HTTPException(status_code=403, detail="profiling requires admin")
+
+
 @app.post("/api/v1/bills/generate-batch")
 def api_generate_batch(
-    company_id: int, date: str, current_user: User = Depends(require_role("clerk"))
+    company_id: int,
+    date: str,
+    profile: Optional[bool] = None,
+    current_user: AuthUser = Depends(require_role("clerk")),
 ):
+    _check_profile_request(profile, current_user)
     d = datetime.strptime(date, "%Y-%m-%d").date()
-    bills = generate_batch_for_company(company_id, d, actor_id=current_user.id)
-    return {"created": len(bills)}
-
-
-def _record_audit(
-    session: Session,
-    actor_id: int,
-    action: str,
-    before: Optional[str],
-    after: Optional[str],
-    ip: Optional[str] = None,
-):
-    al = AuditLog(actor_id=actor_id, action=action, before=before, after=after, ip=ip)
-    session.add(al)
+    if not profiling_enabled(profile):
+        bills = generate_batch_for_company(company_id, d, actor_id=current_user.id)
+        return {"created": len(bills)}
+    bills, run = profiled_run(
+        "generate_batch",
+        lambda: generate_batch_for_company(company_id, d, actor_id=current_user.id),
+        lambda bills: {"company_id": company_id, "date": date, "created": len(bills)},
+    )
+    return {"created": len(bills), "profile_run_id": run.id}
 
 
 @app.post("/api/v1/bills/{bill_id}/submit")
-def api_bill_submit(bill_id: int, current_user: User = Depends(require_role("clerk"))):
+def api_bill_submit(
+    bill_id: int, current_user: AuthUser = Depends(require_role("clerk"))
+):
     with Session(engine) as session:
         bill = session.get(Bill, bill_id)
         if not bill:
@@ -208,13 +271,20 @@ def api_bill_submit(bill_id: int, current_user: User = Depends(require_role("cle
         if bill.status != "draft":
             raise HTTPException(status_code=400, detail="Bill not in draft")
         before = json.dumps({"status": bill.status})
+        old_status = bill.status
         bill.status = "submitted"
-        _record_audit(
+        summary_move_bill(
+            session, bill, old_status, paid=bill_paid_amount(session, bill.id)
+        )
+        record_audit(
             session,
-            current_user.id,
             "submit",
-            before,
-            json.dumps({"status": bill.status}),
+            table_name="bill",
+            row_id=bill.id,
+            before=before,
+            after=json.dumps({"status": bill.status}),
+            actor_id=current_user.id,
+            actor=current_user.username,
         )
         session.add(bill)
         session.commit()
@@ -223,7 +293,7 @@ def api_bill_submit(bill_id: int, current_user: User = Depends(require_role("cle
 
 @app.post("/api/v1/bills/{bill_id}/approve")
 def api_bill_approve(
-    bill_id: int, current_user: User = Depends(require_role("finance"))
+    bill_id: int, current_user: AuthUser = Depends(require_role("finance"))
 ):
     with Session(engine) as session:
         bill = session.get(Bill, bill_id)
@@ -247,13 +317,20 @@ def api_bill_approve(
             )
         before = json.dumps({"status": bill.status})
         bill.frozen_snapshot = json.dumps(snapshot, ensure_ascii=False)
+        old_status = bill.status
         bill.status = "approved"
-        _record_audit(
+        summary_move_bill(
+            session, bill, old_status, paid=bill_paid_amount(session, bill.id)
+        )
+        record_audit(
             session,
-            current_user.id,
             "approve",
-            before,
-            json.dumps({"status": bill.status}),
+            table_name="bill",
+            row_id=bill.id,
+            before=before,
+            after=json.dumps({"status": bill.status}),
+            actor_id=current_user.id,
+            actor=current_user.username,
         )
         session.add(bill)
         session.commit()
@@ -261,7 +338,9 @@ def api_bill_approve(
 
 
 @app.post("/api/v1/bills/{bill_id}/issue")
-def api_bill_issue(bill_id: int, current_user: User = Depends(require_role("finance"))):
+def api_bill_issue(
+    bill_id: int, current_user: AuthUser = Depends(require_role("finance"))
+):
     with Session(engine) as session:
         bill = session.get(Bill, bill_id)
         if not bill:
@@ -269,13 +348,20 @@ def api_bill_issue(bill_id: int, current_user: User = Depends(require_role("fina
         if bill.status != "approved":
             raise HTTPException(status_code=400, detail="Bill not in approved state")
         before = json.dumps({"status": bill.status})
+        old_status = bill.status
         bill.status = "issued"
-        _record_audit(
+        summary_move_bill(
+            session, bill, old_status, paid=bill_paid_amount(session, bill.id)
+        )
+        record_audit(
             session,
-            current_user.id,
             "issue",
-            before,
-            json.dumps({"status": bill.status}),
+            table_name="bill",
+            row_id=bill.id,
+            before=before,
+            after=json.dumps({"status": bill.status}),
+            actor_id=current_user.id,
+            actor=current_user.username,
         )
         session.add(bill)
         session.commit()
@@ -283,19 +369,28 @@ def api_bill_issue(bill_id: int, current_user: User = Depends(require_role("fina
 
 
 @app.post("/api/v1/bills/{bill_id}/void")
-def api_bill_void(bill_id: int, current_user: User = Depends(require_role("admin"))):
+def api_bill_void(
+    bill_id: int, current_user: AuthUser = Depends(require_role("admin"))
+):
     with Session(engine) as session:
         bill = session.get(Bill, bill_id)
         if not bill:
             raise HTTPException(status_code=404, detail="Bill not found")
         before = json.dumps({"status": bill.status})
+        old_status = bill.status
         bill.status = "void"
-        _record_audit(
+        summary_move_bill(
+            session, bill, old_status, paid=bill_paid_amount(session, bill.id)
+        )
+        record_audit(
             session,
-            current_user.id,
             "void",
-            before,
-            json.dumps({"status": bill.status}),
+            table_name="bill",
+            row_id=bill.id,
+            before=before,
+            after=json.dumps({"status": bill.status}),
+            actor_id=current_user.id,
+            actor=current_user.username,
         )
         session.add(bill)
         session.commit()
@@ -306,10 +401,15 @@ def api_bill_void(bill_id: int, current_user: User = Depends(require_role("admin
 def api_import_rooms(
     file: UploadFile = File(...),
     background_tasks: BackgroundTasks = None,
-    current_user: User = Depends(require_role("clerk")),
+    profile: Optional[bool] = None,
+    current_user: AuthUser = Depends(require_role("clerk")),
 ):
+    _check_profile_request(profile, current_user)
     # persist upload and create ImportBatch, then schedule background processing
-    os.makedirs("./data/imports", exist_ok=True)
+    # the import machinery loads on the first upload, not at startup
+    from .imports import IMPORT_DIR, batch_upload_path, process_import_batch
+
+    os.makedirs(IMPORT_DIR, exist_ok=True)
     filename = file.filename or f"rooms-{uuid.uuid4().hex}.csv"
     with Session(engine) as session:
         batch = ImportBatch(filename=filename, kind="rooms", status="pending")
@@ -317,13 +417,13 @@ def api_import_rooms(
         session.commit()
         session.refresh(batch)
 
-    dest_path = os.path.join("./data/imports", f"{batch.id}_{filename}")
+    dest_path = batch_upload_path(batch.id, filename)
     with open(dest_path, "wb") as out_f:
         shutil.copyfileobj(file.file, out_f)
     file.file.close()
 
     # schedule background processing
-    background_tasks.add_task(process_import_batch, batch.id, dest_path)
+    background_tasks.add_task(process_import_batch, batch.id, dest_path, profile)
     return {"batch_id": batch.id}
 
 
@@ -331,9 +431,13 @@ def api_import_rooms(
 def api_import_leases(
     file: UploadFile = File(...),
     background_tasks: BackgroundTasks = None,
-    current_user: User = Depends(require_role("clerk")),
+    profile: Optional[bool] = None,
+    current_user: AuthUser = Depends(require_role("clerk")),
 ):
-    os.makedirs("./data/imports", exist_ok=True)
+    _check_profile_request(profile, current_user)
+    from .imports import IMPORT_DIR, batch_upload_path, process_import_batch
+
+    os.makedirs(IMPORT_DIR, exist_ok=True)
     filename = file.filename or f"leases-{uuid.uuid4().hex}.csv"
     with Session(engine) as session:
         batch = ImportBatch(filename=filename, kind="leases", status="pending")
@@ -341,12 +445,39 @@ def api_import_leases(
         session.commit()
         session.refresh(batch)
 
-    dest_path = os.path.join("./data/imports", f"{batch.id}_{filename}")
+    dest_path = batch_upload_path(batch.id, filename)
+    with open(dest_path, "wb") as out_f:
+        shutil.copyfileobj(file.file, out_f)
+    file.file.close()
+
+    background_tasks.add_task(process_import_batch, batch.id, dest_path, profile)
+    return {"batch_id": batch.id}
+
+
+@app.post("/api/v1/imports/payments", dependencies=[Depends(require_role("clerk"))])
+def api_import_payments(
+    file: UploadFile = File(...),
+    background_tasks: BackgroundTasks = None,
+    profile: Optional[bool] = None,
+    current_user: AuthUser = Depends(require_role("clerk")),
+):
+    _check_profile_request(profile, current_user)
+    from .imports import IMPORT_DIR, batch_upload_path, process_import_batch
+
+    os.makedirs(IMPORT_DIR, exist_ok=True)
+    filename = file.filename or f"payments-{uuid.uuid4().hex}.csv"
+    with Session(engine) as session:
+        batch = ImportBatch(filename=filename, kind="payments", status="pending")
+        session.add(batch)
+        session.commit()
+        session.refresh(batch)
+
+    dest_path = batch_upload_path(batch.id, filename)
     with open(dest_path, "wb") as out_f:
         shutil.copyfileobj(file.file, out_f)
     file.file.close()
 
-    background_tasks.add_task(process_import_batch, batch.id, dest_path)
+    background_tasks.add_task(process_import_batch, batch.id, dest_path, profile)
     return {"batch_id": batch.id}
 
 
@@ -354,7 +485,7 @@ def api_import_leases(
     "/api/v1/imports/batches/{batch_id}", dependencies=[Depends(require_role("clerk"))]
 )
 def api_get_import_batch(
-    batch_id: int, current_user: User = Depends(require_role("clerk"))
+    batch_id: int, current_user: AuthUser = Depends(require_role("clerk"))
 ):
     with Session(engine) as session:
         b = session.get(ImportBatch, batch_id)
@@ -370,36 +501,44 @@ def api_get_import_batch(
             "finished_at": str(b.finished_at) if b.finished_at else None,
             "result": json.loads(b.result) if b.result else None,
             "errors": json.loads(b.errors) if b.errors else None,
+            "profiled": b.profile is not None,
         }
 
 
-@app.post("/api/v1/payments")
+@app.post("/api/v1/payments", response_model=PaymentResponse)
 async def api_payments(
-    request: Request, current_user: User = Depends(require_role("clerk"))
+    request: Request, current_user: AuthUser = Depends(require_role("clerk"))
 ):
-    # Minimal payment endpoint for tests: accept JSON or form, return a payment id.
+    # accept JSON or form-encoded payloads (see docs/payments.md)
+    content_type = request.headers.get("content-type", "")
     try:
-        content_type = request.headers.get("content-type", "")
         if content_type.startswith("application/json"):
-            await request.json()
+            raw = await request.json()
         else:
-            form = await request.form()
-            _ = dict(form)
+            raw = dict(await request.form())
+        data = PaymentCreate(**raw)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_context=False))
     except Exception:
-        pass
-
-    # generate a simple id (not persisted) and return
-    import uuid
+        raise HTTPException(status_code=400, detail="invalid payment payload")
 
-    pid = uuid.uuid4().hex
-    return {"payment_id": pid}
+    with Session(engine) as session:
+        try:
+            payment = record_payment(session, data)
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        session.commit()
+        session.refresh(payment)
+        return {"payment_id": payment.id, "created_at": payment.received_at}
 
 
 @app.get("/api/v1/bills/{bill_id}/export")
 def api_export_bill(
     bill_id: int,
     export: str = "csv",
-    current_user: User = Depends(require_role("clerk")),
+    current_user: AuthUser = Depends(require_role("clerk")),
 ):
     if export != "csv":
         return {"error": "unsupported export"}
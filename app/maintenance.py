@@ -0,0 +1,97 @@
+"""SQLite WAL checkpointing and planner maintenance.
+
+`wal_autocheckpoint` only checkpoints when a commit happens to cross the
+page threshold and never shrinks the ``-wal`` file while readers keep it
+busy, so after large imports or billing runs it can grow to hundreds of
+MB. `run_wal_maintenance` runs a PASSIVE checkpoint (never waits on
+readers or writers) on every call and a TRUNCATE checkpoint, which resets
+the file to zero bytes, during the configured quiet hours.
+"""
+
+from datetime import datetime
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .db import engine
+from .metrics import metrics
+
+# local hours [start, end) in which TRUNCATE checkpoints may block briefly
+WAL_QUIET_HOURS = os.getenv("WAL_QUIET_HOURS", "1-5")
+# log a warning metric when the WAL grows past this size
+WAL_WARN_BYTES = int(os.getenv("WAL_WARN_BYTES", str(256 * 1024 * 1024)))
+
+
+def _is_sqlite_file() -> bool:
+    database = engine.url.database
+    return (
+        engine.url.get_backend_name() == "sqlite"
+        and bool(database)
+        and database != ":memory:"
+    )
+
+
+def wal_size_bytes() -> int:
+    path = f"{engine.url.database}-wal"
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def in_quiet_hours(now: Optional[datetime] = None, spec: str = WAL_QUIET_HOURS) -> bool:
+    if not spec:
+        return False
+    start, end = (int(h) for h in spec.split("-", 1))
+    hour = (now or datetime.now()).hour
+    if start <= end:
+        return start <= hour < end
+    # window across midnight, e.g. 23-4
+    return hour >= start or hour < end
+
+
+def checkpoint(mode: str = "PASSIVE") -> Tuple[int, int, int]:
+    """Run ``PRAGMA wal_checkpoint(mode)``; returns (busy, log, checkpointed)."""
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"unknown checkpoint mode {mode}")
+    with engine.connect() as conn:
+        row = conn.exec_driver_sql(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    return tuple(row)
+
+
+def run_wal_maintenance(now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Checkpoint the WAL (TRUNCATE in quiet hours, else PASSIVE)."""
+    if not _is_sqlite_file():
+        return {"skipped": "not a SQLite file database"}
+    size_before = wal_size_bytes()
+    mode = "TRUNCATE" if in_quiet_hours(now) else "PASSIVE"
+    started = time.monotonic()
+    busy, log_pages, done_pages = checkpoint(mode)
+    duration = time.monotonic() - started
+    size_after = wal_size_bytes()
+
+    metrics.inc(f"wal.checkpoint.{mode.lower()}")
+    if busy:
+        metrics.inc("wal.checkpoint.busy")
+    metrics.observe("wal.checkpoint_seconds", duration)
+    metrics.set("wal.size_bytes", size_after)
+    metrics.set("wal.size_warning", size_after > WAL_WARN_BYTES)
+    return {
+        "mode": mode,
+        "busy": bool(busy),
+        "log_pages": log_pages,
+        "checkpointed_pages": done_pages,
+        "wal_bytes_before": size_before,
+        "wal_bytes_after": size_after,
+        "duration": duration,
+    }
+
+
+def run_optimize() -> Dict[str, Any]:
+    """``PRAGMA optimize``: refresh planner statistics that look stale."""
+    if engine.url.get_backend_name() != "sqlite":
+        return {"skipped": "not SQLite"}
+    started = time.monotonic()
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA optimize")
+    duration = time.monotonic() - started
+    metrics.inc("sqlite.optimize")
+    metrics.observe("sqlite.optimize_seconds", duration)
+    return {"duration": duration}
@@ -0,0 +1,154 @@
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import func, insert
+from sqlmodel import Session, select
+
+from .db import chunked
+from .models import Meter, MeterReading
+from .schemas import MeterReadingIn
+
+
+class ReadingErrors(Exception):
+    def __init__(self, errors: List[Dict[str, Any]]):
+        self.errors = errors
+
+
+def _first_readings(
+    session: Session, meter_ids: Iterable[int], where, order_by
+) -> Dict[int, Tuple[str, Decimal]]:
+    # one windowed query per chunk of meters: the first row of each meter's
+    # partition in `order_by` order among the readings matching `where`
+    out: Dict[int, Tuple[str, Decimal]] = {}
+    for chunk in chunked(meter_ids):
+        rn = (
+            func.row_number()
+            .over(partition_by=MeterReading.meter_id, order_by=order_by)
+            .label("rn")
+        )
+        ranked = (
+            select(MeterReading.meter_id, MeterReading.period, MeterReading.reading, rn)
+            .where(MeterReading.meter_id.in_(chunk), where)
+            .subquery()
+        )
+        rows = session.exec(
+            select(ranked.c.meter_id, ranked.c.period, ranked.c.reading).where(
+                ranked.c.rn == 1
+            )
+        ).all()
+        for meter_id, p, reading in rows:
+            out[meter_id] = (p, Decimal(str(reading)))
+    return out
+
+
+def latest_readings(
+    session: Session, meter_ids: Iterable[int], period: str
+) -> Dict[int, Tuple[str, Decimal]]:
+    """Return each meter's latest reading at or before `period`.
+
+    One windowed query per chunk of meters (``ROW_NUMBER() OVER
+    (PARTITION BY meter_id ORDER BY period DESC)``) instead of one lookup
+    per meter. A returned period equal to `period` means the meter already
+    has a reading for it.
+    """
+    return _first_readings(
+        session, meter_ids, MeterReading.period <= period, MeterReading.period.desc()
+    )
+
+
+def next_readings(
+    session: Session, meter_ids: Iterable[int], period: str
+) -> Dict[int, Tuple[str, Decimal]]:
+    """Return each meter's earliest reading after `period`, for back-filling."""
+    return _first_readings(
+        session, meter_ids, MeterReading.period > period, MeterReading.period.asc()
+    )
+
+
+def capture_readings(
+    session: Session, period: str, readings: List[MeterReadingIn]
+) -> int:
+    """Validate and bulk-insert one period's readings for many meters.
+
+    All rows are checked in memory against a single preload of meters and
+    neighbouring readings: meters must exist, appear once per request, have
+    no reading for `period` yet and must lie between their previous reading
+    and the next one, when a past period is back-filled.
+    Any error rejects the whole request (ReadingErrors); otherwise the rows
+    are inserted with one executemany and the count is returned.
+    """
+    errors: List[Dict[str, Any]] = []
+    seen = set()
+    for idx, r in enumerate(readings):
+        if r.meter_id in seen:
+            errors.append(
+                {"index": idx, "meter_id": r.meter_id, "error": "duplicate meter"}
+            )
+        seen.add(r.meter_id)
+
+    existing_meters = set()
+    for chunk in chunked(seen):
+        existing_meters.update(
+            session.exec(select(Meter.id).where(Meter.id.in_(chunk))).all()
+        )
+    latest = latest_readings(session, seen, period)
+    following = next_readings(session, seen, period)
+
+    for idx, r in enumerate(readings):
+        if r.meter_id not in existing_meters:
+            errors.append(
+                {"index": idx, "meter_id": r.meter_id, "error": "meter not found"}
+            )
+            continue
+        nxt = following.get(r.meter_id)
+        if nxt is not None and r.reading > nxt[1]:
+            errors.append(
+                {
+                    "index": idx,
+                    "meter_id": r.meter_id,
+                    "error": (
+                        f"reading {r.reading} is higher than {nxt[1]} "
+                        f"recorded for {nxt[0]}"
+                    ),
+                }
+            )
+            continue
+        prev = latest.get(r.meter_id)
+        if prev is None:
+            continue
+        prev_period, prev_reading = prev
+        if prev_period == period:
+            errors.append(
+                {
+                    "index": idx,
+                    "meter_id": r.meter_id,
+                    "error": f"reading for {period} already exists",
+                }
+            )
+        elif r.reading < prev_reading:
+            errors.append(
+                {
+                    "index": idx,
+                    "meter_id": r.meter_id,
+                    "error": (
+                        f"reading {r.reading} is lower than {prev_reading} "
+                        f"recorded for {prev_period}"
+                    ),
+                }
+            )
+    if errors:
+        raise ReadingErrors(errors)
+
+    session.execute(
+        insert(MeterReading),
+        [
+            {
+                "meter_id": r.meter_id,
+                "period": period,
+                "reading": r.reading,
+                "read_at": r.read_at,
+            }
+            for r in readings
+        ],
+    )
+    return len(readings)
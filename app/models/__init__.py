@@ -1,4 +1,6 @@
 from .billing import (
+    BILL_SUMMARY_SCOPE,
+    BillSummary,
     BillTemplate,
     BillTemplateLine,
 )
@@ -14,14 +16,20 @@ from .domain import (
     Community,
     Company,
     ImportBatch,
+    JobLock,
+    JobRun,
     Lease,
     Meter,
     MeterReading,
+    Payment,
     TariffWater,
     Tenant,
     Unit,
     User,
     assert_no_lease_overlap,
+    assert_no_tariff_overlap,
+    find_lease_overlaps,
+    find_overlapping_lease,
 )
 
 __all__ = [
@@ -37,13 +45,21 @@ __all__ = [
     "ChargeItem",
     "Bill",
     "BillLine",
+    "Payment",
     "Adjustment",
     "User",
     "AuditLog",
     "AppConfig",
     "ImportBatch",
+    "JobLock",
+    "JobRun",
     "BillTemplate",
     "BillTemplateLine",
+    "BillSummary",
+    "BILL_SUMMARY_SCOPE",
     "BillStatus",
     "assert_no_lease_overlap",
+    "find_overlapping_lease",
+    "find_lease_overlaps",
+    "assert_no_tariff_overlap",
 ]
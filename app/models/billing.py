@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 from datetime import datetime
+from decimal import Decimal
 from typing import List, Optional
 
+from sqlalchemy import Column, Index, Numeric, UniqueConstraint, func, literal_column
 from sqlalchemy.orm import relationship as sa_relationship
 from sqlmodel import Field, Relationship, SQLModel
 
@@ -34,3 +36,49 @@ class BillTemplateLine(SQLModel, table=True):
         back_populates="items",
         sa_relationship=sa_relationship("BillTemplate", back_populates="items"),
     )
+
+
+class BillSummary(SQLModel, table=True):
+    """Materialized bill totals per company/community/period/status.
+
+    Rows are maintained incrementally by `app.reports` whenever a bill is
+    created, changes status or receives a payment; `period` is the
+    ``YYYY-MM`` month of the bill's `cycle_start`.
+    """
+
+    __table_args__ = (
+        UniqueConstraint(
+            "company_id",
+            "community_id",
+            "period",
+            "status",
+            name="uq_billsummary_scope",
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    company_id: Optional[int] = Field(default=None, index=True)
+    community_id: Optional[int] = Field(default=None)
+    period: str = Field(nullable=False)
+    status: str = Field(nullable=False)
+    bill_count: int = Field(default=0)
+    total_amount: Decimal = Field(
+        default=Decimal("0.0"),
+        sa_column=Column("total_amount", Numeric(18, 4), nullable=False),
+    )
+    paid_amount: Decimal = Field(
+        default=Decimal("0.0"),
+        sa_column=Column("paid_amount", Numeric(18, 4), nullable=False),
+    )
+
+
+# uq_billsummary_scope treats NULL scopes as distinct, so rows for bills
+# without a company/community would never collide. This index folds NULL to
+# 0 and is the conflict target of the upsert in app.reports.
+BILL_SUMMARY_SCOPE = (
+    func.coalesce(BillSummary.__table__.c.company_id, literal_column("0")),
+    func.coalesce(BillSummary.__table__.c.community_id, literal_column("0")),
+    BillSummary.__table__.c.period,
+    BillSummary.__table__.c.status,
+)
+Index("ux_billsummary_scope", *BILL_SUMMARY_SCOPE, unique=True)
@@ -3,9 +3,24 @@ from __future__ import annotations
 from datetime import date, datetime
 from decimal import Decimal
 from enum import Enum
-from typing import List, Optional
-
-from sqlalchemy import Column, Integer, Numeric, Text, UniqueConstraint
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import (
+    DDL,
+    Column,
+    Date,
+    Index,
+    Integer,
+    MetaData,
+    Numeric,
+    Table,
+    Text,
+    UniqueConstraint,
+    and_,
+    event,
+    func,
+    or_,
+)
 from sqlalchemy.orm import relationship as sa_relationship
 from sqlmodel import Field, Relationship, Session as SQLSession, SQLModel, select
 
@@ -80,6 +95,11 @@ class Tenant(SQLModel, table=True):
 
 
 class Lease(SQLModel, table=True):
+    __table_args__ = (
+        # active-lease, overlap and unit history lookups all scan by unit
+        Index("ix_lease_unit_dates", "unit_id", "start_date", "end_date"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     unit_id: int = Field(foreign_key="unit.id")
     tenant_id: int = Field(foreign_key="tenant.id")
@@ -96,6 +116,28 @@ class Lease(SQLModel, table=True):
     )
 
 
+# Databases built by create_all (tests, DB_AUTO_CREATE) get the same SQLite
+# non-overlap triggers as migration 0013_add_lease_no_overlap; PostgreSQL
+# relies on the migration's exclusion constraint.
+_LEASE_OVERLAP_SQL = (
+    "SELECT 1 FROM lease AS l WHERE l.unit_id = NEW.unit_id"
+    " AND (NEW.end_date IS NULL OR l.start_date <= NEW.end_date)"
+    " AND (l.end_date IS NULL OR l.end_date >= NEW.start_date)"
+)
+for _ddl in (
+    "CREATE TRIGGER IF NOT EXISTS trg_lease_no_overlap_insert BEFORE INSERT "
+    f"ON lease WHEN EXISTS ({_LEASE_OVERLAP_SQL}) "
+    "BEGIN SELECT RAISE(ABORT, 'lease overlaps existing lease'); END",
+    "CREATE TRIGGER IF NOT EXISTS trg_lease_no_overlap_update "
+    "BEFORE UPDATE OF unit_id, start_date, end_date ON lease "
+    f"WHEN EXISTS ({_LEASE_OVERLAP_SQL} AND l.id != NEW.id) "
+    "BEGIN SELECT RAISE(ABORT, 'lease overlaps existing lease'); END",
+):
+    event.listen(
+        Lease.__table__, "after_create", DDL(_ddl).execute_if(dialect="sqlite")
+    )
+
+
 class Meter(SQLModel, table=True):
     __table_args__ = (
         UniqueConstraint("unit_id", "kind", "slot", name="uq_meter_unit_kind_slot"),
@@ -108,6 +150,10 @@ class Meter(SQLModel, table=True):
 
 
 class MeterReading(SQLModel, table=True):
+    __table_args__ = (
+        UniqueConstraint("meter_id", "period", name="uq_meterreading_meter_period"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     meter_id: int = Field(foreign_key="meter.id")
     period: str = Field(nullable=False, index=True)
@@ -116,11 +162,19 @@ class MeterReading(SQLModel, table=True):
 
 
 class TariffWater(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_tariffwater_community_from", "community_id", "effective_from"),
+        Index("ix_tariffwater_company_from", "company_id", "effective_from"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     company_id: Optional[int] = Field(default=None, foreign_key="company.id")
     community_id: Optional[int] = Field(default=None, foreign_key="community.id")
     cold_price: Decimal = Field(default=Decimal("0.0"))
     hot_price: Decimal = Field(default=Decimal("0.0"))
+    # validity period (inclusive); None means open-ended on that side
+    effective_from: Optional[date] = None
+    effective_to: Optional[date] = None
 
 
 class ChargeItem(SQLModel, table=True):
@@ -132,6 +186,8 @@ class ChargeItem(SQLModel, table=True):
 class Bill(SQLModel, table=True):
     __table_args__ = (
         UniqueConstraint("unit_id", "cycle_start", name="uq_bill_unit_cycle"),
+        # arrears report aggregates issued bills per unit
+        Index("ix_bill_status_unit", "status", "unit_id"),
     )
     id: Optional[int] = Field(default=None, primary_key=True)
     unit_id: int = Field(foreign_key="unit.id")
@@ -178,6 +234,22 @@ class BillLine(SQLModel, table=True):
     )
 
 
+class Payment(SQLModel, table=True):
+    __table_args__ = (Index("ix_payment_unit_received", "unit_id", "received_at"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # nullable: a payment can be a unit-level credit not tied to one bill
+    bill_id: Optional[int] = Field(default=None, foreign_key="bill.id", index=True)
+    unit_id: Optional[int] = Field(default=None, foreign_key="unit.id", index=True)
+    amount: Decimal = Field(
+        default=Decimal("0.0"),
+        sa_column=Column("amount", Numeric(18, 4), nullable=False),
+    )
+    method: Optional[str] = Field(default=None)
+    reference: Optional[str] = Field(default=None)
+    received_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class Adjustment(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     bill_line_id: Optional[int] = Field(default=None, foreign_key="billline.id")
@@ -192,16 +264,27 @@ class User(SQLModel, table=True):
     role: str
     # indicate whether the account is active; default True to allow login
     is_active: bool = Field(default=True)
+    # bumped to revoke all of the user's session cookies
+    session_epoch: int = Field(default=0)
 
 
 class AuditLog(SQLModel, table=True):
+    # rows written before monthly partitioning (see app.audit); new rows go
+    # to auditlog_YYYYMM tables with the same columns and indexes
+    __table_args__ = (
+        Index("ix_auditlog_table_row", "table_name", "row_id"),
+        Index("ix_auditlog_actor_created", "actor_id", "created_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     # default to empty string so existing DB schemas with NOT NULL
     # constraints still accept inserts from older code paths
     table_name: str = Field(default="")
     row_id: Optional[int]
+    action: str = Field(default="")
     before: Optional[str]
     after: Optional[str]
+    actor_id: Optional[int] = None
     actor: Optional[str]
     ip: Optional[str]
     trace_id: Optional[str]
@@ -217,41 +300,188 @@ class AppConfig(SQLModel, table=True):
 class ImportBatch(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     filename: str
-    kind: str  # rooms | leases
+    kind: str  # rooms | leases | payments
     status: str = Field(default="pending")  # pending, processing, done, failed
     created_at: datetime = Field(default_factory=datetime.utcnow)
     started_at: Optional[datetime] = None
     finished_at: Optional[datetime] = None
     result: Optional[str] = Field(default=None, sa_column=Column(Text))
     errors: Optional[str] = Field(default=None, sa_column=Column(Text))
+    # JSON summary from app.profiling when the import ran with profiling on
+    profile: Optional[str] = Field(default=None, sa_column=Column(Text))
 
 
-def assert_no_lease_overlap(
+class JobLock(SQLModel, table=True):
+    # named lease held by one worker process until expires_at (see app.locks)
+    name: str = Field(primary_key=True)
+    owner: str
+    acquired_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime
+
+
+class JobRun(SQLModel, table=True):
+    __table_args__ = (Index("ix_jobrun_job_started", "job_id", "started_at"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    job_id: str
+    trigger: str = Field(default="scheduled")  # scheduled | manual | missed
+    status: str = Field(default="running")  # running, success, failed, missed
+    owner: Optional[str] = None
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    result: Optional[str] = Field(default=None, sa_column=Column(Text))
+    error: Optional[str] = Field(default=None, sa_column=Column(Text))
+    profile: Optional[str] = Field(default=None, sa_column=Column(Text))
+
+
+def _lease_overlaps(unit_id, start_date, end_date):
+    """SQL condition for leases of `unit_id` overlapping [start, end].
+
+    Overlap definition: existing.start <= end_date and (existing.end is None
+    or existing.end >= start_date). None is open-ended on either side.
+    """
+    conds = [Lease.unit_id == unit_id]
+    if end_date is not None:
+        conds.append(Lease.start_date <= end_date)
+    if start_date is not None:
+        conds.append(or_(Lease.end_date.is_(None), Lease.end_date >= start_date))
+    return and_(*conds)
+
+
+def find_overlapping_lease(
     session: SQLSession,
     unit_id: int,
     start_date,
     end_date,
     exclude_id: Optional[int] = None,
-) -> None:
-    """Raise ValueError if a lease for the same unit overlaps the given period.
+) -> Optional[int]:
+    """Return the id of a lease overlapping the period, or None.
 
-    Overlap definition: existing.start <= end_date and (existing.end is None or existing.end >= start_date)
-    Treat None as open-ended.
+    One ``LIMIT 1`` probe (EXISTS semantics) served by `ix_lease_unit_dates`
+    instead of loading the unit's leases into Python.
     """
-    # Fetch existing leases for the unit (optionally excluding one id).
-    stmt = select(Lease).where(Lease.unit_id == unit_id)
+    stmt = select(Lease.id).where(_lease_overlaps(unit_id, start_date, end_date))
     if exclude_id is not None:
         stmt = stmt.where(Lease.id != exclude_id)
+    return session.exec(stmt.limit(1)).first()
 
-    existing = session.exec(stmt).all()
-    # Normalize open-ended dates by mapping None -> extreme values so comparisons are simple.
-    for ex in existing:
-        ex_start = ex.start_date
-        ex_end = ex.end_date or date.max
 
-        sd = start_date or date.min
-        ed = end_date or date.max
+def assert_no_lease_overlap(
+    session: SQLSession,
+    unit_id: int,
+    start_date,
+    end_date,
+    exclude_id: Optional[int] = None,
+) -> None:
+    """Raise ValueError if a lease for the same unit overlaps the given period."""
+    existing = find_overlapping_lease(
+        session, unit_id, start_date, end_date, exclude_id=exclude_id
+    )
+    if existing is not None:
+        raise ValueError(f"Lease overlaps existing lease id={existing}")
+
+
+# Candidates for find_lease_overlaps are staged in a temporary table (SQLite
+# cannot select from a VALUES list with column aliases); it lives in its own
+# MetaData so create_all never makes it a real table.
+_candidate_metadata = MetaData()
+_lease_candidate = Table(
+    "lease_candidate",
+    _candidate_metadata,
+    Column("idx", Integer, primary_key=True),
+    Column("unit_id", Integer, nullable=False),
+    Column("start_date", Date),
+    Column("end_date", Date),
+    Column("exclude_id", Integer),
+    prefixes=["TEMPORARY"],
+)
+
+
+def find_lease_overlaps(
+    session: SQLSession,
+    candidates: Iterable[Tuple[int, Optional[date], Optional[date], Optional[int]]],
+) -> Dict[int, int]:
+    """Check many (unit_id, start, end, exclude_id) candidates at once.
+
+    Returns {candidate index: overlapping lease id} for the candidates that
+    overlap an existing lease; a single join against the staged candidates
+    replaces one probe per row.
+    """
+    rows = [
+        {
+            "idx": i,
+            "unit_id": unit_id,
+            "start_date": start,
+            "end_date": end,
+            "exclude_id": exclude_id,
+        }
+        for i, (unit_id, start, end, exclude_id) in enumerate(candidates)
+    ]
+    if not rows:
+        return {}
+    conn = session.connection()
+    c = _lease_candidate.c
+    _lease_candidate.create(conn, checkfirst=True)
+    try:
+        conn.execute(_lease_candidate.insert(), rows)
+        stmt = (
+            select(c.idx, func.min(Lease.id))
+            .select_from(_lease_candidate)
+            .join(
+                Lease,
+                and_(
+                    Lease.unit_id == c.unit_id,
+                    or_(c.end_date.is_(None), Lease.start_date <= c.end_date),
+                    or_(
+                        c.start_date.is_(None),
+                        Lease.end_date.is_(None),
+                        Lease.end_date >= c.start_date,
+                    ),
+                    or_(c.exclude_id.is_(None), Lease.id != c.exclude_id),
+                ),
+            )
+            .group_by(c.idx)
+        )
+        return {idx: lease_id for idx, lease_id in conn.execute(stmt)}
+    finally:
+        _lease_candidate.drop(conn)
+
+
+def assert_no_tariff_overlap(
+    session: SQLSession,
+    company_id: Optional[int],
+    community_id: Optional[int],
+    effective_from: Optional[date],
+    effective_to: Optional[date],
+    exclude_id: Optional[int] = None,
+) -> None:
+    """Raise ValueError if a tariff of the same scope overlaps the period.
 
-        # Overlap exists unless one interval is strictly before the other.
-        if not (ex_end < sd or ed < ex_start):
-            raise ValueError(f"Lease overlaps existing lease id={ex.id}")
+    The scope is the community when set, otherwise the company. Same
+    open-ended overlap rule as leases: None dates extend to infinity.
+    """
+    if community_id is not None:
+        stmt = select(TariffWater.id).where(TariffWater.community_id == community_id)
+    else:
+        stmt = select(TariffWater.id).where(
+            TariffWater.company_id == company_id, TariffWater.community_id.is_(None)
+        )
+    if exclude_id is not None:
+        stmt = stmt.where(TariffWater.id != exclude_id)
+    if effective_to is not None:
+        stmt = stmt.where(
+            or_(
+                TariffWater.effective_from.is_(None),
+                TariffWater.effective_from <= effective_to,
+            )
+        )
+    if effective_from is not None:
+        stmt = stmt.where(
+            or_(
+                TariffWater.effective_to.is_(None),
+                TariffWater.effective_to >= effective_from,
+            )
+        )
+    existing = session.exec(stmt.limit(1)).first()
+    if existing is not None:
+        raise ValueError(f"Tariff overlaps existing tariff id={existing}")
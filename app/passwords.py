@@ -0,0 +1,173 @@
+"""Password hashing, offloaded verification and login attempt limiting.
+
+Hash verification is CPU bound (pbkdf2); logins run it in a small
+dedicated process pool behind a bounded queue so a burst of logins cannot
+occupy the request threadpool that the rest of the API shares. This module
+is imported by the pool's worker processes, so it must stay free of app
+imports (models, database).
+"""
+
+import asyncio
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import threading
+import time
+from typing import Deque, Optional, Tuple
+
+# Raising PASSWORD_ROUNDS makes existing (weaker) hashes "need update"; they
+# are re-hashed transparently on the next successful login.
+PASSWORD_ROUNDS = int(os.getenv("PASSWORD_ROUNDS", "29000"))
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", "2"))
+# verifications queued or running at once; beyond this logins get 503
+PASSWORD_QUEUE_SIZE = int(os.getenv("PASSWORD_QUEUE_SIZE", "32"))
+
+LOGIN_WINDOW_SECONDS = int(os.getenv("LOGIN_WINDOW_SECONDS", "300"))
+LOGIN_MAX_FAILURES_PER_USER = int(os.getenv("LOGIN_MAX_FAILURES_PER_USER", "5"))
+LOGIN_MAX_FAILURES_PER_IP = int(os.getenv("LOGIN_MAX_FAILURES_PER_IP", "20"))
+# keys tracked at once; beyond this, new keys go untracked until others expire
+LOGIN_LIMITER_MAX_KEYS = int(os.getenv("LOGIN_LIMITER_MAX_KEYS", "10000"))
+
+_pwd_context = None
+
+
+def get_pwd_context():
+    """The passlib CryptContext, built on first use (passlib is slow to import)."""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        _pwd_context = CryptContext(
+            schemes=["pbkdf2_sha256"],
+            deprecated="auto",
+            pbkdf2_sha256__default_rounds=PASSWORD_ROUNDS,
+            pbkdf2_sha256__min_rounds=PASSWORD_ROUNDS,
+        )
+    return _pwd_context
+
+
+class PasswordQueueFull(Exception):
+    """Raised when too many verifications are already pending."""
+
+
+def hash_password(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+
+def verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """Return (valid, new_hash); new_hash is set when the hash needs rehashing."""
+    try:
+        return get_pwd_context().verify_and_update(password, hashed)
+    except (ValueError, TypeError):
+        # unknown or malformed hash
+        return False, None
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(PASSWORD_QUEUE_SIZE)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs threads (the server) is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=PASSWORD_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_password_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def verify_and_update_async(
+    password: str, hashed: str
+) -> Tuple[bool, Optional[str]]:
+    """verify_and_update in the password pool; raises PasswordQueueFull.
+
+    With PASSWORD_WORKERS=0 verification runs in the default thread
+    executor instead (single-process deployments, debugging).
+    """
+    if not _slots.acquire(blocking=False):
+        raise PasswordQueueFull()
+    try:
+        loop = asyncio.get_running_loop()
+        pool = _get_pool() if PASSWORD_WORKERS > 0 else None
+        return await loop.run_in_executor(pool, verify_and_update, password, hashed)
+    finally:
+        _slots.release()
+
+
+class LoginLimiter:
+    """Sliding-window count of failed logins per key (username, client IP).
+
+    Keys are kept in order of their newest failure, so keys whose window
+    has passed are dropped from the front on every failure. At most
+    `maxkeys` keys are tracked.
+    """
+
+    def __init__(self, window: float, maxkeys: int = LOGIN_LIMITER_MAX_KEYS):
+        self.window = window
+        self.maxkeys = maxkeys
+        self._failures: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prune(self, key: str, now: float) -> Deque[float]:
+        q = self._failures.get(key)
+        if q is None:
+            return deque()
+        while q and q[0] <= now - self.window:
+            q.popleft()
+        if not q:
+            del self._failures[key]
+        return q
+
+    def retry_after(self, key: str, limit: int) -> Optional[int]:
+        """Seconds until `key` may try again, or None when not blocked."""
+        now = time.monotonic()
+        with self._lock:
+            q = self._prune(key, now)
+            if len(q) < limit:
+                return None
+            return max(1, int(q[-limit] + self.window - now) + 1)
+
+    def record_failure(self, key: str) -> bool:
+        """Count a failure for `key`; False if it could not be tracked.
+
+        A key is only ever dropped once its window has passed, so a flood of
+        failures for other keys cannot lift a live lockout. When all
+        `maxkeys` slots hold live keys, a new key is not tracked.
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._failures:
+                oldest, failures = next(iter(self._failures.items()))
+                if failures[-1] > now - self.window:
+                    break
+                del self._failures[oldest]
+            q = self._prune(key, now)
+            if key not in self._failures and len(self._failures) >= self.maxkeys:
+                return False
+            q.append(now)
+            self._failures[key] = q
+            self._failures.move_to_end(key)
+            return True
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._failures)
+
+
+login_limiter = LoginLimiter(LOGIN_WINDOW_SECONDS)
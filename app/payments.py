@@ -0,0 +1,55 @@
+from decimal import Decimal
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from .models import Bill, Payment, Unit
+from .reports import summary_add_payment
+from .schemas import PaymentCreate
+
+
+def bill_paid_amount(session: Session, bill_id: int) -> Decimal:
+    """Sum of payments recorded against one bill (uses `ix_payment_bill_id`)."""
+    total = session.exec(
+        select(func.coalesce(func.sum(Payment.amount), 0)).where(
+            Payment.bill_id == bill_id
+        )
+    ).one()
+    return Decimal(str(total))
+
+
+def record_payment(session: Session, data: PaymentCreate) -> Payment:
+    """Persist a payment and add it to the bill summary.
+
+    Bill payments also carry the bill's `unit_id` so unit-level aggregation
+    (arrears) never needs to join back through `bill`. Raises LookupError
+    when the referenced bill/unit is missing and ValueError for payloads
+    that cannot be applied.
+    """
+    bill = None
+    unit_id = data.unit_id
+    if data.bill_id is not None:
+        bill = session.get(Bill, data.bill_id)
+        if not bill:
+            raise LookupError("bill not found")
+        if bill.status == "void":
+            raise ValueError("cannot pay a void bill")
+        if unit_id is not None and unit_id != bill.unit_id:
+            raise ValueError("unit_id does not match bill")
+        unit_id = bill.unit_id
+    elif unit_id is None:
+        raise ValueError("bill_id or unit_id is required")
+    elif not session.get(Unit, unit_id):
+        raise LookupError("unit not found")
+
+    payment = Payment(
+        bill_id=bill.id if bill else None,
+        unit_id=unit_id,
+        amount=data.amount,
+        method=data.method,
+        reference=data.reference,
+    )
+    session.add(payment)
+    if bill is not None:
+        summary_add_payment(session, bill, data.amount)
+    return payment
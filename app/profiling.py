@@ -0,0 +1,181 @@
+"""Opt-in profiling of import batches and billing runs.
+
+With PROFILE_JOBS=1 (or ``profile=true`` on an admin request) the work is
+run under cProfile and tracemalloc while a cursor listener counts SQL
+statements. The summary -- top functions by cumulative time, a statement
+histogram and peak traced memory -- is stored as JSON in the ``profile``
+column of the ``importbatch`` or ``jobrun`` row and served by
+``/api/v1/profiles``.
+
+Only the profiling thread's statements and calls are counted. Peak memory
+is process-wide, so it includes other requests running at the same time.
+"""
+
+import cProfile
+from datetime import datetime
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import traceback
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+from .db import engine
+from .locks import worker_id
+from .models import JobRun
+
+PROFILE_JOBS = os.getenv("PROFILE_JOBS", "0") == "1"
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "30"))
+# statements are grouped by their text with whitespace and IN lists folded
+PROFILE_SQL_TOP = int(os.getenv("PROFILE_SQL_TOP", "30"))
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_IN_LIST = re.compile(r"\((?:\?, )+\?\)")
+_SPACE = re.compile(r"\s+")
+
+
+def profiling_enabled(requested: Optional[bool] = None) -> bool:
+    """An explicit request wins; otherwise the PROFILE_JOBS setting."""
+    return PROFILE_JOBS if requested is None else bool(requested)
+
+
+def normalize_statement(statement: str) -> str:
+    return _IN_LIST.sub("(?...)", _SPACE.sub(" ", statement).strip())
+
+
+def _where(filename: str, line: int, name: str) -> str:
+    if filename.startswith(_ROOT + os.sep):
+        filename = os.path.relpath(filename, _ROOT)
+    elif os.sep in filename:
+        filename = os.path.join(*filename.split(os.sep)[-2:])
+    return f"{filename}:{line}({name})"
+
+
+class Profiler:
+    """Context manager collecting a profile of the code it wraps."""
+
+    def __init__(self, top: Optional[int] = None):
+        self.top = top or PROFILE_TOP
+        self._profile = cProfile.Profile()
+        self._thread = None
+        self._sql: Dict[str, List[float]] = {}
+        self._started = 0.0
+        self._traced = False
+        self.seconds = 0.0
+        self.peak_memory = None
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread:
+            conn.info.setdefault(("profile", id(self)), []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get(("profile", id(self)))
+        if threading.get_ident() != self._thread or not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        entry = self._sql.setdefault(normalize_statement(statement), [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+
+    def __enter__(self):
+        self._thread = threading.get_ident()
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        # leave tracing on if someone else started it
+        self._traced = tracemalloc.is_tracing()
+        if self._traced:
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+        self._started = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self._profile.disable()
+        self.seconds = time.perf_counter() - self._started
+        self.peak_memory = tracemalloc.get_traced_memory()[1]
+        if not self._traced:
+            tracemalloc.stop()
+        event.remove(engine, "before_cursor_execute", self._before)
+        event.remove(engine, "after_cursor_execute", self._after)
+        return False
+
+    def top_functions(self) -> List[Dict[str, Any]]:
+        stats = pstats.Stats(self._profile).stats
+        rows = sorted(stats.items(), key=lambda kv: kv[1][3], reverse=True)
+        return [
+            {
+                "function": _where(*func),
+                "calls": nc,
+                "primitive_calls": cc,
+                "total_seconds": round(tt, 6),
+                "cumulative_seconds": round(ct, 6),
+            }
+            for func, (cc, nc, tt, ct, _callers) in rows[: self.top]
+        ]
+
+    def sql_histogram(self) -> List[Dict[str, Any]]:
+        rows = sorted(self._sql.items(), key=lambda kv: kv[1][1], reverse=True)
+        return [
+            {"statement": stmt, "count": count, "seconds": round(seconds, 6)}
+            for stmt, (count, seconds) in rows[:PROFILE_SQL_TOP]
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "seconds": round(self.seconds, 6),
+            "peak_memory_bytes": self.peak_memory,
+            "sql_statements": sum(count for count, _ in self._sql.values()),
+            "sql_seconds": round(sum(s for _, s in self._sql.values()), 6),
+            "sql": self.sql_histogram(),
+            "top_functions": self.top_functions(),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), ensure_ascii=False)
+
+
+def profiled_run(
+    job_id: str,
+    fn: Callable[[], Any],
+    describe: Optional[Callable[[Any], Any]] = None,
+) -> Tuple[Any, JobRun]:
+    """Call `fn` under a Profiler and record it as a manual ``jobrun`` row.
+
+    Used for work without a batch record of its own, such as batch billing
+    from the API. `describe` turns the return value into the run's JSON
+    result. Exceptions are recorded and re-raised.
+    """
+    with Session(engine, expire_on_commit=False) as session:
+        run = JobRun(job_id=job_id, trigger="manual", owner=worker_id())
+        session.add(run)
+        session.commit()
+    profiler = Profiler()
+    result, error = None, None
+    try:
+        with profiler:
+            result = fn()
+    except Exception as e:
+        error = json.dumps(
+            {"error": str(e), "trace": traceback.format_exc()}, ensure_ascii=False
+        )
+        raise
+    finally:
+        with Session(engine, expire_on_commit=False) as session:
+            run = session.get(JobRun, run.id)
+            run.status = "failed" if error else "success"
+            run.finished_at = datetime.utcnow()
+            if error is None and describe is not None:
+                run.result = json.dumps(describe(result), ensure_ascii=False)
+            run.error = error
+            run.profile = profiler.to_json()
+            session.add(run)
+            session.commit()
+    return result, run
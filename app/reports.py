@@ -0,0 +1,480 @@
+from collections import defaultdict
+from datetime import date, datetime, time
+from decimal import Decimal
+import heapq
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, or_
+from sqlmodel import Session, select
+
+from .models import (
+    BILL_SUMMARY_SCOPE,
+    Bill,
+    BillSummary,
+    Building,
+    Community,
+    Lease,
+    Payment,
+    Unit,
+)
+
+# bill states that count towards what a unit owes
+ARREARS_STATUSES = ("issued",)
+
+
+def bill_period(cycle_start: date) -> str:
+    """Return the ``YYYY-MM`` summary period a bill cycle belongs to."""
+    return cycle_start.strftime("%Y-%m")
+
+
+def _status_value(status) -> str:
+    return getattr(status, "value", status)
+
+
+def _dec(value) -> Decimal:
+    return Decimal(str(value)) if value is not None else Decimal("0")
+
+
+def apply_summary_delta(
+    session: Session,
+    company_id: Optional[int],
+    community_id: Optional[int],
+    period: str,
+    status: str,
+    count: int = 0,
+    total=0,
+    paid=0,
+) -> None:
+    """Add the given deltas to one `BillSummary` row, creating it if missing.
+
+    A single ``INSERT ... ON CONFLICT DO UPDATE`` on `ux_billsummary_scope`
+    (NULL scopes included), so concurrent writers add to the same row
+    instead of losing an increment or racing to insert it. The caller owns
+    the transaction so the aggregate changes commit (or roll back) together
+    with the bill change that caused them.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    table = BillSummary.__table__
+    stmt = insert(table).values(
+        company_id=company_id,
+        community_id=community_id,
+        period=period,
+        status=status,
+        bill_count=count,
+        total_amount=_dec(total),
+        paid_amount=_dec(paid),
+    )
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=list(BILL_SUMMARY_SCOPE),
+            set_={
+                "bill_count": table.c.bill_count + stmt.excluded.bill_count,
+                "total_amount": table.c.total_amount + stmt.excluded.total_amount,
+                "paid_amount": table.c.paid_amount + stmt.excluded.paid_amount,
+            },
+        )
+    )
+
+
+def summary_add_bill(session: Session, bill: Bill) -> None:
+    """Count a newly created bill in its status bucket."""
+    apply_summary_delta(
+        session,
+        bill.company_id,
+        bill.community_id,
+        bill_period(bill.cycle_start),
+        _status_value(bill.status),
+        count=1,
+        total=bill.total_amount,
+    )
+
+
+def summary_move_bill(session: Session, bill: Bill, old_status, paid=0) -> None:
+    """Move a bill (and the amount already paid on it) between status buckets."""
+    old_status = _status_value(old_status)
+    new_status = _status_value(bill.status)
+    if old_status == new_status:
+        return
+    period = bill_period(bill.cycle_start)
+    apply_summary_delta(
+        session,
+        bill.company_id,
+        bill.community_id,
+        period,
+        old_status,
+        count=-1,
+        total=-_dec(bill.total_amount),
+        paid=-_dec(paid),
+    )
+    apply_summary_delta(
+        session,
+        bill.company_id,
+        bill.community_id,
+        period,
+        new_status,
+        count=1,
+        total=bill.total_amount,
+        paid=paid,
+    )
+
+
+def summary_add_payment(session: Session, bill: Bill, amount) -> None:
+    """Add a payment made against `bill` to its current status bucket."""
+    apply_summary_delta(
+        session,
+        bill.company_id,
+        bill.community_id,
+        bill_period(bill.cycle_start),
+        _status_value(bill.status),
+        paid=amount,
+    )
+
+
+def rebuild_bill_summary(session: Session) -> int:
+    """Recompute every `BillSummary` row from the `bill` table.
+
+    Used for backfills and to repair drift after bills were changed outside
+    the service functions. Returns the number of summary rows written.
+    """
+    group_cols = (Bill.company_id, Bill.community_id, Bill.cycle_start, Bill.status)
+    rows = session.exec(
+        select(
+            *group_cols,
+            func.count(Bill.id),
+            func.coalesce(func.sum(Bill.total_amount), 0),
+        ).group_by(*group_cols)
+    ).all()
+    paid_rows = session.exec(
+        select(*group_cols, func.sum(Payment.amount))
+        .join(Payment, Payment.bill_id == Bill.id)
+        .group_by(*group_cols)
+    ).all()
+
+    buckets: Dict[tuple, List[Any]] = defaultdict(
+        lambda: [0, Decimal("0"), Decimal("0")]
+    )
+    for company_id, community_id, cycle_start, status, count, total in rows:
+        key = (company_id, community_id, bill_period(cycle_start), status)
+        buckets[key][0] += count
+        buckets[key][1] += _dec(total)
+    for company_id, community_id, cycle_start, status, paid in paid_rows:
+        key = (company_id, community_id, bill_period(cycle_start), status)
+        buckets[key][2] += _dec(paid)
+
+    session.exec(delete(BillSummary))
+    for (company_id, community_id, period, status), (
+        count,
+        total,
+        paid,
+    ) in buckets.items():
+        session.add(
+            BillSummary(
+                company_id=company_id,
+                community_id=community_id,
+                period=period,
+                status=status,
+                bill_count=count,
+                total_amount=total,
+                paid_amount=paid,
+            )
+        )
+    return len(buckets)
+
+
+def cycle_summary(
+    session: Session,
+    company_id: Optional[int] = None,
+    community_id: Optional[int] = None,
+    period: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Return per community/period totals read from the aggregate table."""
+    stmt = select(BillSummary)
+    if company_id is not None:
+        stmt = stmt.where(BillSummary.company_id == company_id)
+    if community_id is not None:
+        stmt = stmt.where(BillSummary.community_id == community_id)
+    if period is not None:
+        stmt = stmt.where(BillSummary.period == period)
+    stmt = stmt.order_by(
+        BillSummary.period, BillSummary.company_id, BillSummary.community_id
+    )
+
+    out: Dict[tuple, Dict[str, Any]] = {}
+    for row in session.exec(stmt).all():
+        if not row.bill_count:
+            continue
+        key = (row.company_id, row.community_id, row.period)
+        entry = out.get(key)
+        if entry is None:
+            entry = out[key] = {
+                "company_id": row.company_id,
+                "community_id": row.community_id,
+                "period": row.period,
+                "bill_count": 0,
+                "total_amount": Decimal("0"),
+                "paid_amount": Decimal("0"),
+                "statuses": {},
+            }
+        entry["bill_count"] += row.bill_count
+        entry["total_amount"] += _dec(row.total_amount)
+        entry["paid_amount"] += _dec(row.paid_amount)
+        entry["statuses"][row.status] = {
+            "bill_count": row.bill_count,
+            "total_amount": str(_dec(row.total_amount)),
+            "paid_amount": str(_dec(row.paid_amount)),
+        }
+
+    result = []
+    for entry in out.values():
+        entry["total_amount"] = str(entry["total_amount"])
+        entry["paid_amount"] = str(entry["paid_amount"])
+        result.append(entry)
+    return result
+
+
+def _parse_cursor(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    if not cursor:
+        return None
+    community_id, unit_id = cursor.split(":", 1)
+    return int(community_id), int(unit_id)
+
+
+# units scanned per query while filling a page of the arrears report
+ARREARS_SCAN_WINDOW = 500
+
+
+def arrears_report(
+    session: Session,
+    company_id: Optional[int] = None,
+    community_id: Optional[int] = None,
+    building_id: Optional[int] = None,
+    as_of: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    """List units with an outstanding balance, ordered by (community, unit).
+
+    Billed amounts come from bills in `ARREARS_STATUSES` (optionally only
+    those whose cycle ended before `as_of`); payments are aggregated per
+    unit, counting unit-level credits and payments on those same bills
+    (optionally only those received before `as_of`). Pagination is a
+    keyset on ``(community_id, unit_id)`` passed as ``"c:u"``.
+
+    Scope filters, the cursor and a LIMIT are applied to the units first;
+    bills and payments are aggregated only for that window of units. Units
+    without arrears do not fill the page, so further windows are read
+    until the page is full or the units run out. Raises ValueError for a
+    malformed cursor.
+    """
+    after = _parse_cursor(cursor)
+    window = max(limit + 1, ARREARS_SCAN_WINDOW)
+    items: List[Dict[str, Any]] = []
+    while len(items) <= limit:
+        units_q = (
+            select(
+                Community.company_id.label("company_id"),
+                Community.id.label("community_id"),
+                Building.id.label("building_id"),
+                Unit.id.label("unit_id"),
+                Unit.unit_no.label("unit_no"),
+            )
+            .join(Building, Building.id == Unit.building_id)
+            .join(Community, Community.id == Building.community_id)
+        )
+        if company_id is not None:
+            units_q = units_q.where(Community.company_id == company_id)
+        if community_id is not None:
+            units_q = units_q.where(Community.id == community_id)
+        if building_id is not None:
+            units_q = units_q.where(Building.id == building_id)
+        if after is not None:
+            units_q = units_q.where(
+                or_(
+                    Community.id > after[0],
+                    and_(Community.id == after[0], Unit.id > after[1]),
+                )
+            )
+        units = units_q.order_by(Community.id, Unit.id).limit(window).subquery("units")
+        unit_ids = select(units.c.unit_id)
+
+        billed_q = select(
+            Bill.unit_id.label("unit_id"),
+            func.sum(Bill.total_amount).label("billed"),
+            func.count(Bill.id).label("bills"),
+            func.min(Bill.cycle_start).label("oldest_cycle"),
+        ).where(Bill.unit_id.in_(unit_ids), Bill.status.in_(ARREARS_STATUSES))
+        if as_of is not None:
+            billed_q = billed_q.where(Bill.cycle_end < as_of)
+        billed = billed_q.group_by(Bill.unit_id).subquery("billed")
+
+        paid_q = (
+            select(
+                Payment.unit_id.label("unit_id"),
+                func.sum(Payment.amount).label("paid"),
+            )
+            .outerjoin(Bill, Bill.id == Payment.bill_id)
+            .where(
+                Payment.unit_id.in_(unit_ids),
+                or_(Payment.bill_id.is_(None), Bill.status.in_(ARREARS_STATUSES)),
+            )
+        )
+        if as_of is not None:
+            paid_q = paid_q.where(
+                Payment.received_at < datetime.combine(as_of, time.min)
+            )
+        paid = paid_q.group_by(Payment.unit_id).subquery("paid")
+
+        rows = session.exec(
+            select(
+                units.c.company_id,
+                units.c.community_id,
+                units.c.building_id,
+                units.c.unit_id,
+                units.c.unit_no,
+                billed.c.billed,
+                func.coalesce(paid.c.paid, 0),
+                billed.c.bills,
+                billed.c.oldest_cycle,
+            )
+            .select_from(units)
+            .outerjoin(billed, billed.c.unit_id == units.c.unit_id)
+            .outerjoin(paid, paid.c.unit_id == units.c.unit_id)
+            .order_by(units.c.community_id, units.c.unit_id)
+        ).all()
+        for row in rows:
+            billed_amount = _dec(row[5])
+            paid_sum = _dec(row[6])
+            if row[5] is None or billed_amount - paid_sum <= 0:
+                continue
+            items.append(
+                {
+                    "company_id": row[0],
+                    "community_id": row[1],
+                    "building_id": row[2],
+                    "unit_id": row[3],
+                    "unit_no": row[4],
+                    "billed": str(billed_amount),
+                    "paid": str(paid_sum),
+                    "outstanding": str(billed_amount - paid_sum),
+                    "bills": row[7],
+                    "oldest_cycle": str(row[8]) if row[8] else None,
+                }
+            )
+        if len(rows) < window:
+            break
+        after = (rows[-1][1], rows[-1][3])
+
+    next_cursor = None
+    if len(items) > limit:
+        last = items[limit - 1]
+        next_cursor = f"{last['community_id']}:{last['unit_id']}"
+    return {"items": items[:limit], "next_cursor": next_cursor}
+
+
+def _parse_history_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, str, int]]:
+    if not cursor:
+        return None
+    ts_s, kind, id_s = cursor.split("|")
+    return datetime.fromisoformat(ts_s), kind, int(id_s)
+
+
+def _before_cursor(ts_col, id_col, kind: str, after, is_date: bool):
+    """Predicate for rows of one history branch that sort after the cursor.
+
+    The stream is ordered newest first by ``(timestamp, kind, id)``; dates
+    count as midnight. Each branch has a constant kind, so the tuple
+    comparison reduces to a range on the branch's own indexed columns.
+    """
+    cts, ckind, cid = after
+    if is_date:
+        day = cts.date()
+        at_midnight = cts.time() == time.min
+        earlier = ts_col < day if at_midnight else ts_col <= day
+        same = ts_col == day if at_midnight else None
+    else:
+        earlier = ts_col < cts
+        same = ts_col == cts
+    if same is None or kind > ckind:
+        return earlier
+    if kind < ckind:
+        return or_(earlier, same)
+    return or_(earlier, and_(same, id_col < cid))
+
+
+def unit_history(
+    session: Session,
+    unit_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Dict[str, Any]:
+    """Merged, newest-first stream of a unit's leases, bills and payments.
+
+    Every branch runs one `LIMIT limit+1` query on its ``(unit_id, date)``
+    index and the results are merged in Python, so the cost of a page does
+    not grow with the depth of the history. Raises ValueError for a
+    malformed cursor.
+    """
+    after = _parse_history_cursor(cursor)
+    branches = (
+        ("lease", Lease, Lease.start_date, True),
+        ("bill", Bill, Bill.cycle_start, True),
+        ("payment", Payment, Payment.received_at, False),
+    )
+    streams = []
+    for kind, model, ts_col, is_date in branches:
+        stmt = select(model).where(model.unit_id == unit_id)
+        if after is not None:
+            stmt = stmt.where(_before_cursor(ts_col, model.id, kind, after, is_date))
+        stmt = stmt.order_by(ts_col.desc(), model.id.desc()).limit(limit + 1)
+        rows = session.exec(stmt).all()
+        streams.append(
+            [
+                (
+                    (
+                        datetime.combine(getattr(r, ts_col.key), time.min)
+                        if is_date
+                        else getattr(r, ts_col.key)
+                    ),
+                    kind,
+                    r.id,
+                    r,
+                )
+                for r in rows
+            ]
+        )
+
+    merged = list(heapq.merge(*streams, key=lambda e: e[:3], reverse=True))
+    items = []
+    for ts, kind, _, row in merged[:limit]:
+        if kind == "lease":
+            item = {
+                "tenant_id": row.tenant_id,
+                "start_date": str(row.start_date),
+                "end_date": str(row.end_date) if row.end_date else None,
+                "rent_amount": str(_dec(row.rent_amount)),
+            }
+        elif kind == "bill":
+            item = {
+                "cycle_start": str(row.cycle_start),
+                "cycle_end": str(row.cycle_end),
+                "status": _status_value(row.status),
+                "total_amount": str(_dec(row.total_amount)),
+            }
+        else:
+            item = {
+                "bill_id": row.bill_id,
+                "amount": str(_dec(row.amount)),
+                "method": row.method,
+                "reference": row.reference,
+            }
+        item.update({"kind": kind, "id": row.id, "date": ts.isoformat()})
+        items.append(item)
+
+    next_cursor = None
+    if len(merged) > limit:
+        ts, kind, row_id, _ = merged[limit - 1]
+        next_cursor = f"{ts.isoformat()}|{kind}|{row_id}"
+    return {"unit_id": unit_id, "items": items, "next_cursor": next_cursor}
@@ -0,0 +1,326 @@
+"""In-process APScheduler for periodic billing and maintenance jobs.
+
+Jobs: monthly batch billing per company, summary rebuild, audit archiving,
+online backups, WAL checkpoints, ``PRAGMA optimize`` and recovery of import
+batches orphaned by a stopped worker.
+
+Disabled unless SCHEDULER_ENABLED=1 so tests and one-off scripts never
+start background threads. Cron expressions use SCHEDULER_TIMEZONE.
+
+Every worker process may run a scheduler, but only the holder of the
+``scheduler-leader`` lock (app.locks) executes scheduled jobs; the others
+skip them. Each run is recorded in ``jobrun``. Cron runs missed while no
+process was up are caught up once on startup if they are still within the
+job's misfire grace time.
+"""
+
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+import json
+import os
+import traceback
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from .audit import archive_partitions
+from .backup import backup_database
+from .billing import generate_batch_for_company
+from .db import engine
+from .locks import acquire_lock, release_lock, worker_id
+from .maintenance import run_optimize, run_wal_maintenance
+from .metrics import metrics
+from .models import Company, JobRun
+from .profiling import Profiler, profiling_enabled
+from .reports import rebuild_bill_summary
+
+if TYPE_CHECKING:
+    # apscheduler is imported when a scheduler is built, not at app import
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.base import BaseTrigger
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "0") == "1"
+SCHEDULER_TIMEZONE = os.getenv("SCHEDULER_TIMEZONE", "Asia/Shanghai")
+SCHEDULER_MISFIRE_GRACE = int(os.getenv("SCHEDULER_MISFIRE_GRACE", str(6 * 3600)))
+# the leader renews its lock every LEADER_TTL / 3 seconds
+LEADER_LOCK = "scheduler-leader"
+LEADER_TTL = int(os.getenv("SCHEDULER_LEADER_TTL", "90"))
+# upper bound for one job run; the per-job lock expires after this
+JOB_LOCK_TTL = int(os.getenv("JOB_LOCK_TTL", str(2 * 3600)))
+JOB_HISTORY_DAYS = int(os.getenv("JOB_HISTORY_DAYS", "90"))
+
+BILLING_CRON = os.getenv("BILLING_CRON", "0 3 1 * *")
+SUMMARY_CRON = os.getenv("SUMMARY_CRON", "15 3 * * *")
+AUDIT_ARCHIVE_CRON = os.getenv("AUDIT_ARCHIVE_CRON", "45 3 1 * *")
+BACKUP_CRON = os.getenv("BACKUP_CRON", "30 2 * * *")
+WAL_CHECKPOINT_MINUTES = int(os.getenv("WAL_CHECKPOINT_MINUTES", "5"))
+OPTIMIZE_CRON = os.getenv("OPTIMIZE_CRON", "0 4 * * *")
+IMPORT_RECOVERY_MINUTES = int(os.getenv("IMPORT_RECOVERY_MINUTES", "10"))
+
+_scheduler: Optional["BackgroundScheduler"] = None
+
+
+def run_monthly_billing() -> Dict[str, Any]:
+    """Generate the current cycle's bills for every company.
+
+    Companies are billed independently; already generated bills are
+    returned unchanged, so a re-run after a partial failure is safe.
+    """
+    target = datetime.now(ZoneInfo(SCHEDULER_TIMEZONE)).date()
+    with Session(engine) as session:
+        company_ids = session.exec(select(Company.id).order_by(Company.id)).all()
+    created, failed = {}, {}
+    for company_id in company_ids:
+        try:
+            created[company_id] = len(generate_batch_for_company(company_id, target))
+        except Exception as e:
+            failed[company_id] = str(e)
+    if failed:
+        raise RuntimeError(f"billing failed for companies {failed}; done {created}")
+    return {"date": target.isoformat(), "bills": created}
+
+
+def run_summary_rebuild() -> Dict[str, Any]:
+    with Session(engine) as session:
+        rows = rebuild_bill_summary(session)
+        session.commit()
+    return {"rows": rows}
+
+
+def run_audit_archive() -> Dict[str, Any]:
+    return {"archived": archive_partitions()}
+
+
+def run_import_recovery() -> Dict[str, Any]:
+    # imported here so startup does not load the import machinery
+    from .imports import recover_import_batches
+
+    return recover_import_batches()
+
+
+# job id -> callable returning a JSON-serializable result
+JOBS: Dict[str, Callable[[], Any]] = {
+    "monthly_billing": run_monthly_billing,
+    "summary_rebuild": run_summary_rebuild,
+    "audit_archive": run_audit_archive,
+    "backup": backup_database,
+    "wal_checkpoint": run_wal_maintenance,
+    "sqlite_optimize": run_optimize,
+    "import_recovery": run_import_recovery,
+}
+
+# misfire grace per job where the default is too short; billing is
+# idempotent and must not be skipped for a whole month
+MISFIRE_GRACE = {"monthly_billing": 3 * 24 * 3600, "audit_archive": 3 * 24 * 3600}
+
+
+def _cron(expr: str) -> Optional["BaseTrigger"]:
+    from apscheduler.triggers.cron import CronTrigger
+
+    return CronTrigger.from_crontab(expr, timezone=SCHEDULER_TIMEZONE) if expr else None
+
+
+def job_triggers() -> Dict[str, "BaseTrigger"]:
+    """Configured trigger per job id; jobs with an empty schedule are off."""
+    from apscheduler.triggers.interval import IntervalTrigger
+
+    triggers = {
+        "monthly_billing": _cron(BILLING_CRON),
+        "summary_rebuild": _cron(SUMMARY_CRON),
+        "audit_archive": _cron(AUDIT_ARCHIVE_CRON),
+        "backup": _cron(BACKUP_CRON),
+        "wal_checkpoint": (
+            IntervalTrigger(minutes=WAL_CHECKPOINT_MINUTES)
+            if WAL_CHECKPOINT_MINUTES > 0
+            else None
+        ),
+        "sqlite_optimize": _cron(OPTIMIZE_CRON),
+        "import_recovery": (
+            IntervalTrigger(minutes=IMPORT_RECOVERY_MINUTES)
+            if IMPORT_RECOVERY_MINUTES > 0
+            else None
+        ),
+    }
+    return {job_id: t for job_id, t in triggers.items() if t is not None}
+
+
+def _finish_run(
+    run_id: int, status: str, result=None, error=None, profile=None
+) -> JobRun:
+    with Session(engine, expire_on_commit=False) as session:
+        run = session.get(JobRun, run_id)
+        run.status = status
+        run.finished_at = datetime.utcnow()
+        run.profile = profile
+        if result is not None:
+            try:
+                run.result = json.dumps(result, ensure_ascii=False, default=str)
+            except Exception:
+                run.result = json.dumps({"result": str(result)}, ensure_ascii=False)
+        run.error = error
+        session.add(run)
+        # bounded history: only this job's rows, via ix_jobrun_job_started
+        cutoff = datetime.utcnow() - timedelta(days=JOB_HISTORY_DAYS)
+        session.exec(
+            delete(JobRun).where(
+                JobRun.job_id == run.job_id, JobRun.started_at < cutoff
+            )
+        )
+        session.commit()
+    return run
+
+
+def run_job(job_id: str, trigger: str = "scheduled") -> Optional[JobRun]:
+    """Run `job_id` once and record it in ``jobrun``.
+
+    Scheduled runs are skipped unless this process is the leader. Returns
+    None without running when the job is already running anywhere.
+    """
+    owner = worker_id()
+    if trigger == "scheduled" and not acquire_lock(LEADER_LOCK, LEADER_TTL, owner):
+        metrics.inc("jobs.skipped_not_leader")
+        return None
+    lock = f"job:{job_id}"
+    if not acquire_lock(lock, JOB_LOCK_TTL, owner):
+        metrics.inc(f"jobs.{job_id}.overlap")
+        return None
+    try:
+        with Session(engine, expire_on_commit=False) as session:
+            run = JobRun(job_id=job_id, trigger=trigger, owner=owner)
+            session.add(run)
+            session.commit()
+        started = datetime.utcnow()
+        # PROFILE_JOBS=1 stores a profile of every run (app.profiling)
+        profiler = Profiler() if profiling_enabled() else None
+        try:
+            with profiler or nullcontext():
+                result = JOBS[job_id]()
+        except Exception as e:
+            error = json.dumps(
+                {"error": str(e), "trace": traceback.format_exc()}, ensure_ascii=False
+            )
+            profile = profiler.to_json() if profiler else None
+            run = _finish_run(run.id, "failed", error=error, profile=profile)
+        else:
+            profile = profiler.to_json() if profiler else None
+            run = _finish_run(run.id, "success", result=result, profile=profile)
+        metrics.inc(f"jobs.{job_id}.{run.status}")
+        metrics.observe(
+            f"jobs.{job_id}.seconds", (datetime.utcnow() - started).total_seconds()
+        )
+        return run
+    finally:
+        release_lock(lock, owner)
+
+
+def _record_missed(event) -> None:
+    # only the leader records misses, so each one is logged once
+    if not acquire_lock(LEADER_LOCK, LEADER_TTL):
+        return
+    scheduled = event.scheduled_run_time.astimezone(timezone.utc).replace(tzinfo=None)
+    with Session(engine) as session:
+        session.add(
+            JobRun(
+                job_id=event.job_id,
+                trigger="missed",
+                status="missed",
+                owner=worker_id(),
+                started_at=scheduled,
+                finished_at=scheduled,
+            )
+        )
+        session.commit()
+    metrics.inc(f"jobs.{event.job_id}.missed")
+
+
+def missed_runs(
+    scheduler: "BackgroundScheduler", now: Optional[datetime] = None
+) -> List[str]:
+    """Cron jobs whose last slot within their grace time has no recorded run."""
+    from apscheduler.triggers.cron import CronTrigger
+
+    now = now or datetime.now(ZoneInfo(SCHEDULER_TIMEZONE))
+    due = []
+    with Session(engine) as session:
+        for job in scheduler.get_jobs():
+            if not isinstance(job.trigger, CronTrigger):
+                continue
+            since = now - timedelta(seconds=job.misfire_grace_time)
+            slot = None
+            fire = job.trigger.get_next_fire_time(None, since)
+            while fire is not None and fire <= now:
+                slot = fire
+                fire = job.trigger.get_next_fire_time(fire, fire + timedelta(seconds=1))
+            if slot is None:
+                continue
+            slot_utc = slot.astimezone(timezone.utc).replace(tzinfo=None)
+            ran = session.exec(
+                select(JobRun.id)
+                .where(
+                    JobRun.job_id == job.id,
+                    JobRun.started_at >= slot_utc,
+                    JobRun.status != "missed",
+                )
+                .limit(1)
+            ).first()
+            if ran is None:
+                due.append(job.id)
+    return due
+
+
+def create_scheduler() -> "BackgroundScheduler":
+    from apscheduler.events import EVENT_JOB_MISSED
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.interval import IntervalTrigger
+
+    scheduler = BackgroundScheduler(
+        timezone=SCHEDULER_TIMEZONE,
+        job_defaults={
+            # run a backlog of missed fire times once, not once per slot
+            "coalesce": True,
+            "misfire_grace_time": SCHEDULER_MISFIRE_GRACE,
+            "max_instances": 1,
+        },
+    )
+    for job_id, trigger in job_triggers().items():
+        scheduler.add_job(
+            run_job,
+            trigger,
+            args=[job_id],
+            id=job_id,
+            misfire_grace_time=MISFIRE_GRACE.get(job_id, SCHEDULER_MISFIRE_GRACE),
+        )
+    scheduler.add_job(
+        acquire_lock,
+        IntervalTrigger(seconds=max(1, LEADER_TTL // 3)),
+        args=[LEADER_LOCK, LEADER_TTL],
+        id="leader_heartbeat",
+    )
+    scheduler.add_listener(_record_missed, EVENT_JOB_MISSED)
+    return scheduler
+
+
+def get_scheduler() -> Optional["BackgroundScheduler"]:
+    return _scheduler
+
+
+def start_scheduler() -> Optional["BackgroundScheduler"]:
+    global _scheduler
+    if not SCHEDULER_ENABLED or _scheduler is not None:
+        return _scheduler
+    _scheduler = create_scheduler()
+    _scheduler.start()
+    now = datetime.now(ZoneInfo(SCHEDULER_TIMEZONE))
+    for job_id in missed_runs(_scheduler, now):
+        _scheduler.modify_job(job_id, next_run_time=now)
+    return _scheduler
+
+
+def stop_scheduler() -> None:
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.shutdown(wait=False)
+        _scheduler = None
+        release_lock(LEADER_LOCK)
@@ -1,6 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -16,3 +16,14 @@ class PaymentCreate(BaseModel):
 class PaymentResponse(BaseModel):
     payment_id: int
     created_at: Optional[datetime] = None
+
+
+class MeterReadingIn(BaseModel):
+    meter_id: int
+    reading: Decimal = Field(..., ge=0, description="Cumulative meter reading")
+    read_at: Optional[datetime] = None
+
+
+class MeterReadingBulk(BaseModel):
+    period: str = Field(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="YYYY-MM")
+    readings: List[MeterReadingIn] = Field(..., min_length=1)
@@ -0,0 +1,146 @@
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SASession
+from sqlmodel import Session, select
+
+from .cache import cache_versions
+from .db import engine
+from .models import TariffWater, assert_no_tariff_overlap
+
+
+class WaterPrice(NamedTuple):
+    tariff_id: int
+    cold_price: Decimal
+    hot_price: Decimal
+
+
+class _Intervals:
+    """Non-overlapping validity periods of one scope, sorted by start."""
+
+    def __init__(self):
+        self.starts: List[date] = []
+        self.ends: List[date] = []
+        self.prices: List[WaterPrice] = []
+
+    def add(self, start: date, end: date, price: WaterPrice) -> None:
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.prices.insert(i, price)
+
+    def at(self, on: date) -> Optional[WaterPrice]:
+        # last period starting on/before `on`; periods never overlap
+        # (assert_no_tariff_overlap), so it is the only candidate
+        i = bisect_right(self.starts, on) - 1
+        if i >= 0 and on <= self.ends[i]:
+            return self.prices[i]
+        return None
+
+
+class TariffTable:
+    """Snapshot of all water tariffs, resolved community-over-company.
+
+    Built from a single query; each scope keeps its validity periods sorted
+    so a lookup is a dict hit plus a bisect, and a billing run over many
+    units and cycles does not query tariffs per unit.
+    """
+
+    def __init__(self, tariffs: Iterable[TariffWater]):
+        self.by_community: Dict[int, _Intervals] = defaultdict(_Intervals)
+        self.by_company: Dict[int, _Intervals] = defaultdict(_Intervals)
+        for t in tariffs:
+            price = WaterPrice(
+                t.id, Decimal(str(t.cold_price)), Decimal(str(t.hot_price))
+            )
+            start = t.effective_from or date.min
+            end = t.effective_to or date.max
+            if t.community_id is not None:
+                self.by_community[t.community_id].add(start, end, price)
+            elif t.company_id is not None:
+                self.by_company[t.company_id].add(start, end, price)
+
+    def resolve(
+        self, company_id: Optional[int], community_id: Optional[int], on: date
+    ) -> Optional[WaterPrice]:
+        """Price in effect on `on`; the company tariff covers community gaps."""
+        price = None
+        if community_id in self.by_community:
+            price = self.by_community[community_id].at(on)
+        if price is None and company_id in self.by_company:
+            price = self.by_company[company_id].at(on)
+        return price
+
+
+_lock = threading.Lock()
+_cached: Optional[TariffTable] = None
+
+
+def load_tariff_table(session: Session) -> TariffTable:
+    return TariffTable(session.exec(select(TariffWater)).all())
+
+
+def get_tariff_table() -> TariffTable:
+    """Return the process-wide tariff table, loading it on first use."""
+    global _cached
+    # drops the table when another worker process changed tariffs
+    cache_versions.poll()
+    table = _cached
+    if table is None:
+        with _lock:
+            if _cached is None:
+                with Session(engine) as session:
+                    _cached = load_tariff_table(session)
+            table = _cached
+    return table
+
+
+def invalidate_tariff_cache() -> None:
+    global _cached
+    with _lock:
+        _cached = None
+
+
+# Any ORM write to TariffWater drops the cache once the transaction commits,
+# so readers never cache a state that is later rolled back, and bumps the
+# "tariffs" cache version in the same transaction for the other worker
+# processes. Inserted and updated tariffs are checked for overlaps after the
+# flush, so rows added together in one flush are checked against each other.
+@event.listens_for(SASession, "after_flush")
+def _track_tariff_writes(session, flush_context):
+    changed = False
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, TariffWater):
+            continue
+        changed = True
+        if obj not in session.deleted:
+            assert_no_tariff_overlap(
+                session,
+                obj.company_id,
+                obj.community_id,
+                obj.effective_from,
+                obj.effective_to,
+                exclude_id=obj.id,
+            )
+    if changed:
+        session.info["tariffs_changed"] = True
+        cache_versions.bump(session.connection(), "tariffs")
+
+
+@event.listens_for(SASession, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("tariffs_changed", False):
+        invalidate_tariff_cache()
+
+
+@event.listens_for(SASession, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("tariffs_changed", None)
+
+
+cache_versions.register("tariffs", invalidate_tariff_cache)
@@ -0,0 +1,93 @@
+"""Measure cold-start cost of the app: import time and the startup hook.
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters and
+prints the median wall time plus the modules with the largest cumulative
+import time. Usage:
+
+    python scripts/bench_startup.py [--runs 5] [--top 20] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_MEASURE = """
+import time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+app.main.on_startup()
+t2 = time.perf_counter()
+print(f"{t1 - t0:.6f} {t2 - t1:.6f}")
+"""
+
+
+def measure_once(env):
+    out = subprocess.run(
+        [sys.executable, "-c", _MEASURE],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_s, startup_s = out.stdout.split()[-2:]
+    return float(import_s), float(startup_s)
+
+
+def import_profile(env):
+    """(module, self_us, cumulative_us) from -X importtime, top-level first."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("DB_AUTO_CREATE", "1")
+    samples = [measure_once(env) for _ in range(args.runs)]
+    profile = import_profile(env)
+    slowest = sorted(profile, key=lambda r: r[2], reverse=True)[: args.top]
+    result = {
+        "runs": args.runs,
+        "import_seconds": statistics.median(s[0] for s in samples),
+        "startup_seconds": statistics.median(s[1] for s in samples),
+        "slowest_imports": [
+            {"module": m, "self_us": s, "cumulative_us": c} for m, s, c in slowest
+        ],
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"import app.main: {result['import_seconds'] * 1000:.1f} ms (median)")
+    print(f"on_startup:      {result['startup_seconds'] * 1000:.1f} ms (median)")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for m, s, c in slowest:
+        print(f"{c / 1000:14.1f} {s / 1000:8.1f}  {m}")
+
+
+if __name__ == "__main__":
+    main()
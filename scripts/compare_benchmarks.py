@@ -0,0 +1,67 @@
+"""Compare two benchmark result files written by tests/benchmarks.
+
+    python scripts/compare_benchmarks.py OLD.json NEW.json [--threshold 0.10]
+
+Prints the median time (or requests/second for load runs) of each benchmark
+in both files and the relative change; exits 1 when any benchmark got
+slower by more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+
+
+def _metric(entry):
+    # timed benchmarks: lower median is better; load runs: higher rps is
+    if "median" in entry:
+        return entry["median"], False
+    return entry.get("rps"), True
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:.4f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    with open(args.old, encoding="utf-8") as fh:
+        old = json.load(fh)
+    with open(args.new, encoding="utf-8") as fh:
+        new = json.load(fh)
+    before = {b["name"]: b for b in old["benchmarks"]}
+
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    print(f"{'benchmark':40} {'old':>12} {'new':>12} {'change':>8}")
+    regressed = []
+    for entry in new["benchmarks"]:
+        value, higher_is_better = _metric(entry)
+        prev = before.get(entry["name"])
+        prev_value = _metric(prev)[0] if prev is not None else None
+        if prev_value is None or value is None:
+            label = "new" if prev is None else "-"
+            print(
+                f"{entry['name']:40} {_fmt(prev_value):>12} {_fmt(value):>12} "
+                f"{label:>8}"
+            )
+            continue
+        change = (value - prev_value) / prev_value if prev_value else 0.0
+        worse = -change if higher_is_better else change
+        if worse > args.threshold:
+            regressed.append(entry["name"])
+        print(
+            f"{entry['name']:40} {_fmt(prev_value):>12} {_fmt(value):>12} "
+            f"{change:+8.1%}"
+        )
+    if regressed:
+        print(f"slower than {args.threshold:.0%}: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""Generate a synthetic portfolio for performance work.
+
+N companies x M communities x buildings x units, each unit with a current
+lease (some with an earlier, ended lease), cold/hot water meters, monthly
+readings, a water tariff per company and bills for the last months. The
+output is deterministic for a given --seed.
+
+    # CSV files in the rooms/leases import formats
+    python scripts/generate_data.py --format csv --out data/generated
+
+    # straight into a SQLite database (migrated first), bulk inserts
+    python scripts/generate_data.py --format sqlite --db data/perf.db \
+        --companies 5 --communities 4 --buildings 10 --units 50
+"""
+
+import argparse
+import csv
+from datetime import date, timedelta
+from decimal import Decimal
+import os
+import random
+import sys
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# insert order; parents before children
+TABLES = [
+    "company",
+    "community",
+    "building",
+    "unit",
+    "tenant",
+    "lease",
+    "meter",
+    "meterreading",
+    "tariffwater",
+    "bill",
+    "billline",
+]
+ROOMS_HEADER = ["company_code", "community_code", "building_code", "unit_no", "remark"]
+LEASES_HEADER = [
+    "company_code",
+    "community_code",
+    "building_code",
+    "unit_no",
+    "tenant_name",
+    "tenant_mobile",
+    "start_date",
+    "end_date",
+    "rent_amount",
+    "deposit_amount",
+]
+CENT = Decimal("0.01")
+
+
+def _add_months(d: date, months: int) -> date:
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def build_portfolio(
+    companies: int = 2,
+    communities: int = 2,
+    buildings: int = 3,
+    units: int = 20,
+    months: int = 12,
+    bill_months: int = 3,
+    end_month: date = date(2025, 12, 1),
+    ended_ratio: float = 0.2,
+    seed: int = 42,
+    prefix: str = "GEN",
+    start_ids: Optional[Dict[str, int]] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Rows per table name, with explicit primary keys.
+
+    Ids start at `start_ids[table]` (default 1) so the rows can be bulk
+    inserted next to existing data. Readings cover the `months` months up
+    to `end_month`; bills are made for the last `bill_months` of them, the
+    newest month as drafts and the rest issued.
+    """
+    from app.billing import compute_billing_cycle
+
+    rnd = random.Random(seed)
+    next_id = dict(start_ids or {})
+    rows: Dict[str, List[Dict[str, Any]]] = {t: [] for t in TABLES}
+
+    def add(table, **values):
+        values["id"] = next_id.get(table, 1)
+        next_id[table] = values["id"] + 1
+        rows[table].append(values)
+        return values
+
+    periods = [_add_months(end_month, -i) for i in reversed(range(months))]
+    first_month = periods[0]
+    for c in range(companies):
+        company = add("company", code=f"{prefix}{c:03d}", name=f"{prefix} Company {c}")
+        price = {
+            "cold_water": Decimal(rnd.randint(300, 500)) / 100,
+            "hot_water": Decimal(rnd.randint(800, 1200)) / 100,
+        }
+        add(
+            "tariffwater",
+            company_id=company["id"],
+            community_id=None,
+            cold_price=price["cold_water"],
+            hot_price=price["hot_water"],
+            effective_from=None,
+            effective_to=None,
+        )
+        for m in range(communities):
+            community = add(
+                "community",
+                company_id=company["id"],
+                code=f"CM{m:02d}",
+                name=f"Community {c}-{m}",
+            )
+            for b in range(buildings):
+                building = add(
+                    "building",
+                    community_id=community["id"],
+                    code=f"B{b:02d}",
+                    name=f"Building {b}",
+                )
+                for u in range(units):
+                    unit = add(
+                        "unit",
+                        building_id=building["id"],
+                        unit_no=f"{u // 10 + 1}{u % 10 + 1:02d}",
+                        remark=None,
+                    )
+                    unit["_codes"] = (
+                        company["code"],
+                        community["code"],
+                        building["code"],
+                    )
+                    # current lease starts up to 6 months before the first
+                    # reading month and runs two years
+                    start = first_month - timedelta(days=rnd.randint(0, 180))
+                    day = min(start.day, 28)
+                    leases = []
+                    if rnd.random() < ended_ratio:
+                        prev_start = date(start.year - 1, start.month, day)
+                        leases.append((prev_start, start - timedelta(days=1)))
+                    end = date(start.year + 2, start.month, day) - timedelta(days=1)
+                    leases.append((start, end))
+                    rent = Decimal(rnd.randrange(800, 3000, 50))
+                    for lease_start, lease_end in leases:
+                        tenant = add(
+                            "tenant",
+                            name=f"Tenant {unit['id']}-{len(rows['lease'])}",
+                            mobile=f"139{rnd.randrange(10**8):08d}",
+                        )
+                        lease = add(
+                            "lease",
+                            unit_id=unit["id"],
+                            tenant_id=tenant["id"],
+                            start_date=lease_start,
+                            end_date=lease_end,
+                            rent_amount=rent,
+                            deposit_amount=rent,
+                        )
+                    meters = {}
+                    for kind in ("cold_water", "hot_water"):
+                        meter = add("meter", unit_id=unit["id"], kind=kind, slot=1)
+                        reading = Decimal(rnd.randint(0, 500))
+                        usage = {}
+                        for period in periods:
+                            used = Decimal(
+                                rnd.randint(2, 15 if kind == "cold_water" else 6)
+                            )
+                            reading += used
+                            usage[period] = used
+                            add(
+                                "meterreading",
+                                meter_id=meter["id"],
+                                period=period.strftime("%Y-%m"),
+                                reading=reading,
+                                read_at=None,
+                            )
+                        meters[kind] = usage
+                    for i, month in enumerate(periods[len(periods) - bill_months :]):
+                        cycle_start, cycle_end = compute_billing_cycle(
+                            lease["start_date"], month.replace(day=15)
+                        )
+                        bill = add(
+                            "bill",
+                            unit_id=unit["id"],
+                            cycle_start=cycle_start,
+                            cycle_end=cycle_end,
+                            status="draft" if i == bill_months - 1 else "issued",
+                            company_id=company["id"],
+                            community_id=community["id"],
+                            total_amount=Decimal("0"),
+                            frozen_snapshot=None,
+                            template_id=None,
+                        )
+                        total = rent
+                        add(
+                            "billline",
+                            bill_id=bill["id"],
+                            item_code="rent",
+                            charge_code="rent",
+                            qty=Decimal("1"),
+                            unit_price=rent,
+                            amount=rent,
+                        )
+                        period_month = cycle_start.replace(day=1)
+                        for kind, usage in meters.items():
+                            # first reading month has no previous reading
+                            if period_month not in usage or period_month == first_month:
+                                continue
+                            qty = usage[period_month]
+                            amount = (qty * price[kind]).quantize(CENT)
+                            add(
+                                "billline",
+                                bill_id=bill["id"],
+                                item_code=kind,
+                                charge_code=kind,
+                                qty=qty,
+                                unit_price=price[kind],
+                                amount=amount,
+                            )
+                            total += amount
+                        bill["total_amount"] = total
+    return rows
+
+
+def next_ids(conn) -> Dict[str, int]:
+    """First free primary key per table, for building rows beside live data."""
+    from sqlalchemy import func, select
+    from sqlmodel import SQLModel
+
+    import app.models  # noqa: F401  (registers the tables)
+
+    tables = SQLModel.metadata.tables
+    return {
+        name: (conn.execute(select(func.max(tables[name].c.id))).scalar() or 0) + 1
+        for name in TABLES
+    }
+
+
+def write_sqlite(engine, rows: Dict[str, List[Dict[str, Any]]], chunk: int = 5000):
+    """Bulk insert `rows` and rebuild the bill summary; returns row counts."""
+    from sqlalchemy import insert
+    from sqlmodel import Session, SQLModel
+
+    import app.models  # noqa: F401
+    from app.reports import rebuild_bill_summary
+
+    tables = SQLModel.metadata.tables
+    with engine.begin() as conn:
+        for name in TABLES:
+            columns = set(tables[name].c.keys())
+            data = [{k: v for k, v in r.items() if k in columns} for r in rows[name]]
+            for i in range(0, len(data), chunk):
+                conn.execute(insert(tables[name]), data[i : i + chunk])
+    if rows["bill"]:
+        with Session(engine) as session:
+            rebuild_bill_summary(session)
+            session.commit()
+    return {name: len(rows[name]) for name in TABLES}
+
+
+def write_csv(out_dir: str, rows: Dict[str, List[Dict[str, Any]]]) -> Dict[str, str]:
+    """rooms.csv and leases.csv in the process_rooms_path/leases formats."""
+    os.makedirs(out_dir, exist_ok=True)
+    units = {u["id"]: u for u in rows["unit"]}
+    tenants = {t["id"]: t for t in rows["tenant"]}
+    rooms_path = os.path.join(out_dir, "rooms.csv")
+    with open(rooms_path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(ROOMS_HEADER)
+        for u in rows["unit"]:
+            writer.writerow([*u["_codes"], u["unit_no"], u["remark"] or ""])
+    leases_path = os.path.join(out_dir, "leases.csv")
+    with open(leases_path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(LEASES_HEADER)
+        for lease in rows["lease"]:
+            unit = units[lease["unit_id"]]
+            tenant = tenants[lease["tenant_id"]]
+            writer.writerow(
+                [
+                    *unit["_codes"],
+                    unit["unit_no"],
+                    tenant["name"],
+                    tenant["mobile"],
+                    lease["start_date"].isoformat(),
+                    lease["end_date"].isoformat(),
+                    lease["rent_amount"],
+                    lease["deposit_amount"],
+                ]
+            )
+    return {"rooms": rooms_path, "leases": leases_path}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--format", choices=["csv", "sqlite"], default="csv")
+    parser.add_argument("--out", default="data/generated", help="CSV directory")
+    parser.add_argument("--db", default="data/generated.db", help="SQLite file")
+    parser.add_argument("--companies", type=int, default=2)
+    parser.add_argument("--communities", type=int, default=2, help="per company")
+    parser.add_argument("--buildings", type=int, default=3, help="per community")
+    parser.add_argument("--units", type=int, default=20, help="per building")
+    parser.add_argument("--months", type=int, default=12, help="meter readings")
+    parser.add_argument("--bill-months", type=int, default=3)
+    parser.add_argument("--end-month", default="2025-12", help="YYYY-MM")
+    parser.add_argument("--ended-ratio", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--prefix", default="GEN", help="company code prefix")
+    args = parser.parse_args()
+
+    engine = None
+    start_ids = None
+    if args.format == "sqlite":
+        from alembic import command
+        from alembic.config import Config
+
+        url = f"sqlite:///{os.path.abspath(args.db)}"
+        # app.db reads DATABASE_URL at import
+        os.environ["DATABASE_URL"] = url
+        os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+        cfg = Config(os.path.join(ROOT, "alembic.ini"))
+        cfg.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+        cfg.set_main_option("sqlalchemy.url", url)
+        command.upgrade(cfg, "head")
+
+        from app.db import engine
+
+        with engine.connect() as conn:
+            start_ids = next_ids(conn)
+
+    year, month = (int(x) for x in args.end_month.split("-"))
+    rows = build_portfolio(
+        companies=args.companies,
+        communities=args.communities,
+        buildings=args.buildings,
+        units=args.units,
+        months=args.months,
+        bill_months=min(args.bill_months, args.months),
+        end_month=date(year, month, 1),
+        ended_ratio=args.ended_ratio,
+        seed=args.seed,
+        prefix=args.prefix,
+        start_ids=start_ids,
+    )
+    if engine is not None:
+        counts = write_sqlite(engine, rows)
+        print(f"wrote {args.db}: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+    else:
+        paths = write_csv(args.out, rows)
+        print(
+            f"wrote {paths['rooms']} ({len(rows['unit'])} units), "
+            f"{paths['leases']} ({len(rows['lease'])} leases)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Throughput of the bill endpoints with 1..N uvicorn worker processes.
+
+Builds a throwaway SQLite database (migrated, seeded with units, leases and
+generated bills), then for each worker count starts
+`uvicorn app.main:app --workers K`, drives it with concurrent clients for a
+fixed time and reports requests/second and latency. Usage:
+
+    python scripts/load_test.py [--workers 1,2,4] [--duration 10]
+                                [--concurrency 32] [--units 200] [--json]
+
+The client is a single asyncio process; if its CPU saturates before the
+server does, numbers for high worker counts flatten out.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_USER = "loadtest"
+ADMIN_PASSWORD = "loadtest-pw"
+
+_SEED = """
+from datetime import date
+from decimal import Decimal
+from sqlmodel import Session
+from app.auth import get_password_hash
+from app.billing import generate_batch_for_company
+from app.db import engine
+from app.models import Building, Community, Company, Lease, Tenant, Unit, User
+
+units = int({units})
+with Session(engine) as s:
+    s.add(User(username={user!r}, password_hash=get_password_hash({pw!r}),
+               role="admin"))
+    comp = Company(code="LOAD", name="Load test")
+    s.add(comp)
+    s.flush()
+    comm = Community(company_id=comp.id, code="LC", name="Load community")
+    s.add(comm)
+    s.flush()
+    bld = Building(community_id=comm.id, code="LB", name="Load building")
+    s.add(bld)
+    s.flush()
+    for i in range(units):
+        unit = Unit(building_id=bld.id, unit_no=str(1000 + i))
+        tenant = Tenant(name=f"tenant {{i}}", mobile=None)
+        s.add(unit)
+        s.add(tenant)
+        s.flush()
+        s.add(Lease(unit_id=unit.id, tenant_id=tenant.id,
+                    start_date=date(2026, 1, 1), end_date=None,
+                    rent_amount=Decimal("1000")))
+    s.commit()
+    company_id = comp.id
+bills = generate_batch_for_company(company_id, date(2026, 3, 1))
+print(",".join(str(b.id) for b in bills))
+"""
+
+
+def _env(db_path):
+    env = dict(os.environ)
+    env.update(
+        DATABASE_URL=f"sqlite:///{db_path}",
+        SCHEDULER_ENABLED="0",
+        AUDIT_SYNC="0",
+        # keep logins cheap; the test measures bill endpoints
+        PASSWORD_ROUNDS="1000",
+        PASSWORD_WORKERS="0",
+    )
+    return env
+
+
+def prepare_database(db_path, units):
+    env = _env(db_path)
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+    )
+    seed = _SEED.format(units=units, user=ADMIN_USER, pw=ADMIN_PASSWORD)
+    out = subprocess.run(
+        [sys.executable, "-c", seed],
+        cwd=ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return [int(x) for x in out.stdout.strip().splitlines()[-1].split(",")]
+
+
+async def _wait_ready(client, base, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(f"{base}/api/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def drive(base, bill_ids, duration, concurrency):
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        await _wait_ready(client, base)
+        r = await client.post(
+            f"{base}/api/auth/token",
+            data={"username": ADMIN_USER, "password": ADMIN_PASSWORD},
+        )
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        latencies, errors = [], 0
+        stop = time.monotonic() + duration
+
+        async def one_client():
+            nonlocal errors
+            rnd = random.Random()
+            while time.monotonic() < stop:
+                if rnd.random() < 0.8:
+                    url = f"{base}/api/v1/bills/{rnd.choice(bill_ids)}/export"
+                else:
+                    url = f"{base}/api/v1/reports/cycles"
+                t0 = time.perf_counter()
+                try:
+                    resp = await client.get(url, headers=headers)
+                    ok = resp.status_code == 200
+                except Exception:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - t0)
+                else:
+                    errors += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(one_client() for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+        "p95_ms": (
+            latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else None
+        ),
+    }
+
+
+def run_with_workers(db_path, workers, port, bill_ids, args):
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--workers",
+            str(workers),
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT,
+        env=_env(db_path),
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        result = asyncio.run(drive(base, bill_ids, args.duration, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    result["workers"] = workers
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--workers", default=f"1,2,{max(2, os.cpu_count() or 2)}", help="e.g. 1,2,4"
+    )
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--units", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args()
+
+    counts = sorted({int(w) for w in args.workers.split(",")})
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "load.db")
+        bill_ids = prepare_database(db_path, args.units)
+        results = [
+            run_with_workers(db_path, k, args.port, bill_ids, args) for k in counts
+        ]
+
+    base_rps = results[0]["rps"] or 1
+    for r in results:
+        r["speedup"] = r["rps"] / base_rps
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(
+        f"{'workers':>7} {'req/s':>9} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} errors"
+    )
+    for r in results:
+        print(
+            f"{r['workers']:>7} {r['rps']:9.1f} {r['speedup']:8.2f} "
+            f"{r['p50_ms'] or 0:8.1f} {r['p95_ms'] or 0:8.1f} {r['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Benchmark fixtures: synthetic portfolio, timing helper and JSON output.
+
+Benchmarks only run with RUN_BENCHMARKS=1, e.g.
+
+    RUN_BENCHMARKS=1 BENCH_UNITS=100 python -m pytest tests/benchmarks -q
+
+Results go to BENCH_OUTPUT (default ``data/benchmarks/bench-<time>.json``);
+compare two runs with ``python scripts/compare_benchmarks.py old new``.
+"""
+
+from datetime import date, datetime
+import json
+import os
+from pathlib import Path
+import platform
+import sqlite3
+import statistics
+import subprocess
+import time
+import uuid
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.auth import create_user_token, get_password_hash
+from app.db import engine
+from app.models import BillTemplate, BillTemplateLine, ChargeItem, User
+from scripts.generate_data import build_portfolio, next_ids, write_sqlite
+
+RUN_BENCHMARKS = os.getenv("RUN_BENCHMARKS") == "1"
+# portfolio size: companies x communities x buildings x units
+SIZES = {
+    "companies": int(os.getenv("BENCH_COMPANIES", "2")),
+    "communities": int(os.getenv("BENCH_COMMUNITIES", "2")),
+    "buildings": int(os.getenv("BENCH_BUILDINGS", "3")),
+    "units": int(os.getenv("BENCH_UNITS", "25")),
+    "months": int(os.getenv("BENCH_MONTHS", "6")),
+}
+BENCH_ROUNDS = int(os.getenv("BENCH_ROUNDS", "3"))
+BENCH_SEED = int(os.getenv("BENCH_SEED", "42"))
+# readings cover the months up to and including this one
+LAST_READING_MONTH = date(2025, 12, 1)
+
+_results = []
+
+
+def pytest_collection_modifyitems(config, items):
+    if RUN_BENCHMARKS:
+        return
+    skip = pytest.mark.skip(reason="benchmarks run only with RUN_BENCHMARKS=1")
+    here = Path(__file__).parent
+    for item in items:
+        if here in Path(str(item.fspath)).parents:
+            item.add_marker(skip)
+
+
+def _git_commit():
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+        return f"{sha}-dirty" if dirty else sha
+    except Exception:
+        return None
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+    out = os.getenv("BENCH_OUTPUT") or os.path.join(
+        "data", "benchmarks", f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    payload = {
+        "commit": _git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "sizes": SIZES,
+        "benchmarks": _results,
+    }
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2)
+
+
+class Bench:
+    """Times a callable over several rounds, pytest-benchmark style."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.extra = {}
+
+    def __call__(self, fn, *args, rounds=None, setup=None, **kwargs):
+        """Call `fn` `rounds` times; `setup(i)` may supply per-round args."""
+        rounds = rounds or BENCH_ROUNDS
+        times, result = [], None
+        for i in range(rounds):
+            call_args = setup(i) if setup else args
+            started = time.perf_counter()
+            result = fn(*call_args, **kwargs)
+            times.append(time.perf_counter() - started)
+        self.record(
+            rounds=rounds,
+            min=min(times),
+            max=max(times),
+            mean=statistics.mean(times),
+            median=statistics.median(times),
+            stddev=statistics.stdev(times) if rounds > 1 else 0.0,
+        )
+        return result
+
+    def record(self, **stats):
+        _results.append({"name": self.name, **stats, "extra": dict(self.extra)})
+
+
+@pytest.fixture
+def bench(request):
+    return Bench(request.node.name)
+
+
+def seed_portfolio(sizes=SIZES, prefix=None):
+    """Bulk insert a generated portfolio (scripts/generate_data.py); return its ids."""
+    prefix = prefix or f"B{uuid.uuid4().hex[:6]}"
+    with engine.connect() as conn:
+        start_ids = next_ids(conn)
+    rows = build_portfolio(
+        companies=sizes["companies"],
+        communities=sizes["communities"],
+        buildings=sizes["buildings"],
+        units=sizes["units"],
+        months=sizes["months"],
+        bill_months=0,
+        end_month=LAST_READING_MONTH,
+        seed=BENCH_SEED,
+        prefix=prefix,
+        start_ids=start_ids,
+    )
+    write_sqlite(engine, rows)
+    return {
+        "prefix": prefix,
+        "company_ids": [r["id"] for r in rows["company"]],
+        "unit_ids": [r["id"] for r in rows["unit"]],
+        "months": sorted({r["period"] for r in rows["meterreading"]}),
+    }
+
+
+@pytest.fixture(scope="session")
+def portfolio():
+    return seed_portfolio()
+
+
+@pytest.fixture(scope="session")
+def templates():
+    """A handful of bill templates with a few lines each."""
+    prefix = uuid.uuid4().hex[:6]
+    with engine.begin() as conn:
+        item = ChargeItem.__table__
+        conn.execute(
+            insert(item),
+            [{"code": f"{prefix}-I{n}", "description": None} for n in range(10)],
+        )
+        item_ids = conn.execute(
+            select(item.c.id).where(item.c.code.startswith(f"{prefix}-"))
+        ).scalars()
+        item_ids = list(item_ids)
+        template = BillTemplate.__table__
+        conn.execute(
+            insert(template),
+            [
+                {
+                    "name": f"{prefix}-T{n}",
+                    "is_active": True,
+                    "created_at": datetime.utcnow(),
+                }
+                for n in range(30)
+            ],
+        )
+        template_ids = conn.execute(
+            select(template.c.id).where(template.c.name.startswith(f"{prefix}-"))
+        ).scalars()
+        conn.execute(
+            insert(BillTemplateLine.__table__),
+            [
+                {
+                    "template_id": tid,
+                    "charge_item_id": iid,
+                    "is_required": False,
+                    "sort_order": n,
+                }
+                for tid in template_ids
+                for n, iid in enumerate(item_ids[:5])
+            ],
+        )
+
+
+@pytest.fixture(scope="session")
+def admin_headers():
+    from sqlmodel import Session
+
+    with Session(engine) as s:
+        user = User(
+            username=f"bench-{uuid.uuid4().hex[:6]}",
+            password_hash=get_password_hash("pw"),
+            role="admin",
+        )
+        s.add(user)
+        s.commit()
+        s.refresh(user)
+        return {"Authorization": f"Bearer {create_user_token(user)}"}
@@ -0,0 +1,89 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.billing import generate_batch_for_company
+from app.db import engine
+from app.main import app
+from app.models import Bill
+
+
+def test_generate_batch_for_company(bench, portfolio):
+    company_id = portfolio["company_ids"][0]
+    # a new month per round, so every round creates its bills
+    targets = [date(2025, 12 - i, 15) for i in range(3)]
+    bench.extra.update(
+        units=len(portfolio["unit_ids"]) // len(portfolio["company_ids"])
+    )
+    bills = bench(
+        generate_batch_for_company,
+        rounds=len(targets),
+        setup=lambda i: (company_id, targets[i]),
+    )
+    assert bills
+
+
+def test_generate_batch_existing_bills(bench, portfolio):
+    # second pass over a billed month: only the existence checks remain
+    company_id = portfolio["company_ids"][-1]
+    generate_batch_for_company(company_id, date(2025, 11, 15))
+    bench(generate_batch_for_company, company_id, date(2025, 11, 15))
+
+
+def _company_bill_ids(company_id, status="draft", limit=50):
+    with Session(engine) as s:
+        return s.exec(
+            select(Bill.id)
+            .where(Bill.company_id == company_id, Bill.status == status)
+            .order_by(Bill.id)
+            .limit(limit)
+        ).all()
+
+
+def test_template_listing(bench, templates, admin_headers):
+    client = TestClient(app)
+    r = bench(client.get, "/api/v1/templates/", headers=admin_headers)
+    assert r.status_code == 200
+
+
+def test_bill_export(bench, portfolio, admin_headers):
+    company_id = portfolio["company_ids"][0]
+    generate_batch_for_company(company_id, date(2025, 12, 15))
+    bill_ids = _company_bill_ids(company_id)
+    client = TestClient(app)
+
+    def export_all():
+        for bill_id in bill_ids:
+            assert (
+                client.get(
+                    f"/api/v1/bills/{bill_id}/export", headers=admin_headers
+                ).status_code
+                == 200
+            )
+
+    bench.extra.update(bills=len(bill_ids))
+    bench(export_all)
+
+
+def test_bill_transitions(bench, portfolio, admin_headers):
+    company_id = portfolio["company_ids"][-1]
+    generate_batch_for_company(company_id, date(2025, 10, 15))
+    bill_ids = _company_bill_ids(company_id, limit=20 * 3)
+    client = TestClient(app)
+    per_round = len(bill_ids) // 3
+
+    def transition(ids):
+        for bill_id in ids:
+            for step in ("submit", "approve", "issue"):
+                r = client.post(
+                    f"/api/v1/bills/{bill_id}/{step}", headers=admin_headers
+                )
+                assert r.status_code == 200, r.text
+
+    bench.extra.update(bills_per_round=per_round)
+    bench(
+        transition,
+        rounds=3,
+        setup=lambda i: (bill_ids[i * per_round : (i + 1) * per_round],),
+    )
@@ -0,0 +1,44 @@
+import uuid
+
+from app.imports import process_leases_path, process_rooms_path
+
+ROWS = 200
+
+
+def _rooms_csv(tmp_path, prefix, n=ROWS):
+    path = tmp_path / f"rooms-{prefix}.csv"
+    lines = ["company_code,community_code,building_code,unit_no,remark"]
+    lines += [f"{prefix},CM,B{i // 50},{100 + i},bench" for i in range(n)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def _leases_csv(tmp_path, prefix, n=ROWS):
+    path = tmp_path / f"leases-{prefix}.csv"
+    lines = [
+        "company_code,community_code,building_code,unit_no,tenant_name,"
+        "tenant_mobile,start_date,end_date,rent_amount,deposit_amount"
+    ]
+    lines += [
+        f"{prefix},CM,B{i // 50},{100 + i},Tenant {i},138{i:08d},"
+        "2026-01-01,2026-12-31,1200,500"
+        for i in range(n)
+    ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_rooms_import(bench, tmp_path):
+    files = [_rooms_csv(tmp_path, f"BR{uuid.uuid4().hex[:6]}") for _ in range(3)]
+    bench.extra.update(rows=ROWS)
+    result = bench(process_rooms_path, rounds=3, setup=lambda i: (files[i],))
+    assert result["created"] == ROWS
+
+
+def test_leases_import(bench, tmp_path):
+    prefixes = [f"BL{uuid.uuid4().hex[:6]}" for _ in range(3)]
+    for prefix in prefixes:
+        process_rooms_path(_rooms_csv(tmp_path, prefix))
+    files = [_leases_csv(tmp_path, prefix) for prefix in prefixes]
+    bench.extra.update(rows=ROWS)
+    bench(process_leases_path, rounds=3, setup=lambda i: (files[i],))
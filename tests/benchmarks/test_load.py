@@ -0,0 +1,66 @@
+"""In-process load generator: concurrent httpx clients against the ASGI app."""
+
+import asyncio
+from datetime import date
+import os
+import random
+import statistics
+import time
+
+import httpx
+from sqlmodel import Session, select
+
+from app.billing import generate_batch_for_company
+from app.db import engine
+from app.main import app
+from app.models import Bill
+
+LOAD_SECONDS = float(os.getenv("BENCH_LOAD_SECONDS", "5"))
+LOAD_CONCURRENCY = int(os.getenv("BENCH_LOAD_CONCURRENCY", "16"))
+
+
+async def run_load(paths, headers, seconds, concurrency):
+    """Issue GETs for random `paths` until `seconds` elapse; return stats."""
+    transport = httpx.ASGITransport(app=app)
+    latencies, errors = [], 0
+    stop = time.monotonic() + seconds
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+
+        async def worker(n):
+            nonlocal errors
+            rnd = random.Random(n)
+            while time.monotonic() < stop:
+                started = time.perf_counter()
+                r = await c.get(rnd.choice(paths), headers=headers)
+                if r.status_code == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000,
+    }
+
+
+def test_read_mix_load(bench, portfolio, templates, admin_headers):
+    company_id = portfolio["company_ids"][0]
+    generate_batch_for_company(company_id, date(2025, 12, 15))
+    with Session(engine) as s:
+        bill_ids = s.exec(
+            select(Bill.id).where(Bill.company_id == company_id).limit(200)
+        ).all()
+    paths = [f"/api/v1/bills/{i}/export" for i in bill_ids]
+    paths += ["/api/v1/templates/", "/api/v1/reports/cycles"]
+
+    stats = asyncio.run(run_load(paths, admin_headers, LOAD_SECONDS, LOAD_CONCURRENCY))
+    bench.extra.update(seconds=LOAD_SECONDS, concurrency=LOAD_CONCURRENCY)
+    bench.record(**stats)
+    assert stats["errors"] == 0
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 import shutil
+import tempfile
 
 from alembic import command
 from alembic.config import Config
@@ -21,6 +22,11 @@ if test_db_path.exists():
 
 test_db_url = f"sqlite:///{str(test_db_path)}"
 os.environ["DATABASE_URL"] = test_db_url
+# uploads go to a scratch dir so test runs leave ./data/imports alone
+import_dir = tempfile.mkdtemp(prefix="imports-")
+os.environ["IMPORT_DIR"] = import_dir
+# write audit rows right after commit so tests can assert on them
+os.environ.setdefault("AUDIT_SYNC", "1")
 
 # Run alembic migrations once at import time so `app` imports see the schema.
 cfg = Config("alembic.ini")
@@ -38,3 +44,4 @@ def prepare_test_db():
             test_db_path.unlink()
     except Exception:
         pass
+    shutil.rmtree(import_dir, ignore_errors=True)
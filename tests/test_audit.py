@@ -0,0 +1,249 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import uuid
+
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from app.audit import AuditWriter, audit_row, record_audit, search_audit
+from app.billing import generate_bill_for_unit
+from app.db import engine, init_db
+from app.models import Building, Community, Company, Lease, Tenant, Unit
+
+
+def setup_module(module):
+    init_db()
+
+
+def search(**filters):
+    now = datetime.utcnow()
+    with engine.connect() as conn:
+        return search_audit(
+            conn, now - timedelta(days=1), now + timedelta(days=1), **filters
+        )
+
+
+def make_leased_unit():
+    uniq = uuid.uuid4().hex[:8]
+    with Session(engine) as s:
+        comp = Company(code=f"AU-{uniq}", name="Audit Co")
+        s.add(comp)
+        s.flush()
+        comm = Community(company_id=comp.id, code=f"AUC-{uniq}", name="Comm")
+        s.add(comm)
+        s.flush()
+        bld = Building(community_id=comm.id, code=f"AUB-{uniq}", name="Bld")
+        s.add(bld)
+        s.flush()
+        t = Tenant(name=f"audit-{uniq}")
+        s.add(t)
+        s.flush()
+        u = Unit(building_id=bld.id, unit_no="A1")
+        s.add(u)
+        s.flush()
+        s.add(
+            Lease(
+                unit_id=u.id,
+                tenant_id=t.id,
+                start_date=date(2026, 1, 1),
+                end_date=date(2026, 12, 31),
+                rent_amount=Decimal("100"),
+            )
+        )
+        s.commit()
+        return u.id
+
+
+def test_bill_creation_is_audited_after_commit():
+    unit_id = make_leased_unit()
+    bill = generate_bill_for_unit(unit_id, date(2026, 2, 1), actor_id=42)
+    rows = search(table_name="bill", row_id=bill.id)
+    assert [(r["action"], r["actor_id"]) for r in rows] == [("create_bill", 42)]
+
+
+def test_rolled_back_work_leaves_no_audit_row():
+    marker = f"rollback-{uuid.uuid4().hex}"
+    with Session(engine) as s:
+        record_audit(s, "noop", table_name=marker)
+        s.rollback()
+    with Session(engine) as s:
+        record_audit(s, "noop", table_name=marker)
+        s.commit()
+    assert len(search(table_name=marker)) == 1
+
+
+def test_writer_batches_rows_into_multi_row_inserts():
+    marker = f"batch-{uuid.uuid4().hex}"
+    writer = AuditWriter(batch_size=5, flush_seconds=60, maxsize=100)
+    inserts = []
+
+    def _count(conn, cursor, statement, params, context, executemany):
+        if statement.startswith("INSERT INTO auditlog_"):
+            inserts.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        writer.submit([audit_row("a", table_name=marker) for _ in range(12)])
+        assert writer.flush()
+    finally:
+        writer.stop()
+        event.remove(engine, "before_cursor_execute", _count)
+
+    assert len(search(table_name=marker)) == 12
+    # two full batches of 5 plus the remainder forced out by flush()
+    assert len(inserts) == 3
+
+
+def test_writer_retries_failed_batches_and_logs_lost_rows(monkeypatch, caplog):
+    from app import audit
+    from app.metrics import metrics
+
+    monkeypatch.setattr(audit, "AUDIT_RETRY_SECONDS", 0)
+    real_write = audit.write_audit_rows
+    calls = []
+
+    def flaky(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        real_write(rows)
+
+    marker = f"retry-{uuid.uuid4().hex}"
+    writer = AuditWriter(batch_size=3, flush_seconds=60, maxsize=100)
+    monkeypatch.setattr(audit, "write_audit_rows", flaky)
+    try:
+        writer.submit([audit_row("a", table_name=marker) for _ in range(3)])
+        assert writer.flush()
+    finally:
+        writer.stop()
+    assert calls == [3, 3]
+    assert len(search(table_name=marker)) == 3
+
+    def broken(rows):
+        raise RuntimeError("disk I/O error")
+
+    lost = metrics.snapshot()["counters"].get("audit.rows_lost", 0)
+    monkeypatch.setattr(audit, "write_audit_rows", broken)
+    writer = AuditWriter(batch_size=2, flush_seconds=60, maxsize=100)
+    try:
+        writer.submit([audit_row("a", table_name=marker) for _ in range(2)])
+        assert writer.flush()
+    finally:
+        writer.stop()
+    assert metrics.snapshot()["counters"]["audit.rows_lost"] == lost + 2
+    assert "dropped 2 audit rows" in caplog.text
+
+
+def test_partitions_are_append_only_searchable_and_archivable(tmp_path):
+    import gzip
+    import json
+
+    import pytest
+    from sqlalchemy.exc import DatabaseError
+
+    from app.audit import archive_partitions, list_partitions, write_audit_rows
+
+    old = audit_row("old", table_name="bill", row_id=1, actor_id=7)
+    old["created_at"] = datetime(2019, 3, 5, 12, 0)
+    new = audit_row("new", table_name="bill", row_id=1, actor_id=7)
+    new["created_at"] = datetime(2019, 4, 1, 0, 0)
+    write_audit_rows([old, new])
+
+    statements = []
+
+    def _capture(conn, cursor, statement, params, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        with engine.connect() as conn:
+            rows = search_audit(
+                conn, datetime(2019, 3, 1), datetime(2019, 4, 1), actor_id=7
+            )
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+    assert [r["action"] for r in rows] == ["old"]
+    assert rows[0]["partition"] == "auditlog_201903"
+    query = statements[-1]
+    assert "auditlog_201903" in query and "auditlog_201904" not in query
+
+    with engine.begin() as conn:
+        with pytest.raises(DatabaseError):
+            conn.exec_driver_sql("DELETE FROM auditlog_201903")
+
+    paths = archive_partitions(
+        now=date(2019, 5, 15), retention_months=1, archive_dir=str(tmp_path)
+    )
+    assert [p.rsplit("/", 1)[-1] for p in paths] == ["auditlog_201903.jsonl.gz"]
+    with gzip.open(paths[0], "rt", encoding="utf-8") as fh:
+        archived = [json.loads(line) for line in fh]
+    assert [r["action"] for r in archived] == ["old"]
+    with engine.connect() as conn:
+        assert "201903" not in list_partitions(conn)
+        assert "201904" in list_partitions(conn)
+
+
+def test_search_of_months_without_a_partition_is_empty():
+    from app.audit import write_audit_rows
+
+    rows = []
+    for month in (1, 3):
+        row = audit_row("gap", table_name="bill", row_id=2)
+        row["created_at"] = datetime(2020, month, 10)
+        rows.append(row)
+    write_audit_rows(rows)
+
+    with engine.connect() as conn:
+        assert search_audit(conn, datetime(2020, 2, 1), datetime(2020, 3, 1)) == []
+        assert search_audit(conn, datetime(2099, 5, 1), datetime(2099, 6, 1)) == []
+        found = search_audit(conn, datetime(2020, 1, 1), datetime(2020, 4, 1))
+    assert [r["partition"] for r in found] == ["auditlog_202003", "auditlog_202001"]
+
+
+def test_audit_search_endpoint():
+    from fastapi.testclient import TestClient
+
+    from app.auth import get_password_hash
+    from app.main import app
+    from app.models import User
+
+    with Session(engine) as s:
+        if not s.exec(select(User).where(User.username == "auditadmin")).first():
+            s.add(
+                User(
+                    username="auditadmin",
+                    password_hash=get_password_hash("pw"),
+                    role="admin",
+                )
+            )
+            s.commit()
+    client = TestClient(app)
+    r = client.post(
+        "/api/auth/token", data={"username": "auditadmin", "password": "pw"}
+    )
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    unit_id = make_leased_unit()
+    bill = generate_bill_for_unit(unit_id, date(2026, 2, 1))
+    today = datetime.utcnow().date().isoformat()
+    r = client.get(
+        "/api/v1/audit/",
+        params={"start": today, "end": today, "table_name": "bill", "row_id": bill.id},
+        headers=headers,
+    )
+    assert r.status_code == 200
+    assert [row["action"] for row in r.json()] == ["create_bill"]
+
+    r = client.get(
+        "/api/v1/audit/",
+        params={"start": "2099-05-01", "end": "2099-05-31"},
+        headers=headers,
+    )
+    assert r.status_code == 200 and r.json() == []
+
+    r = client.get(
+        "/api/v1/audit/",
+        params={"start": today, "end": "2000-01-01"},
+        headers=headers,
+    )
+    assert r.status_code == 400
@@ -100,3 +100,225 @@ def test_cookie_login_failed():
     assert r.status_code in (303, 307)
     # no session cookie set
     assert "ap_session" not in client.cookies
+
+
+def _token(client, username, password):
+    r = client.post(
+        "/api/auth/token", data={"username": username, "password": password}
+    )
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_bearer_auth_uses_user_cache_and_claims():
+    from jose import jwt
+    from sqlalchemy import event
+
+    from app.auth import ALGORITHM, SECRET_KEY
+
+    client = TestClient(app)
+    with Session(engine) as session:
+        if not session.exec(select(User).where(User.username == "cacheuser")).first():
+            session.add(
+                User(
+                    username="cacheuser",
+                    password_hash=get_password_hash("pw"),
+                    role="clerk",
+                )
+            )
+            session.commit()
+    headers = _token(client, "cacheuser", "pw")
+    claims = jwt.decode(
+        headers["Authorization"].split()[1], SECRET_KEY, algorithms=[ALGORITHM]
+    )
+    assert claims["role"] == "clerk" and claims["uid"]
+
+    statements = []
+
+    def _count(conn, cursor, statement, params, context, executemany):
+        statements.append(statement)
+
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        r = client.get("/api/users/me", headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    assert r.json() == {"username": "cacheuser", "role": "clerk"}
+    assert not any('FROM "user"' in s or "FROM user" in s for s in statements)
+
+    # a role change drops the cached user and invalidates older tokens
+    with Session(engine) as session:
+        u = session.exec(select(User).where(User.username == "cacheuser")).one()
+        u.role = "finance"
+        session.add(u)
+        session.commit()
+    assert client.get("/api/users/me", headers=headers).status_code == 401
+    headers = _token(client, "cacheuser", "pw")
+    assert client.get("/api/users/me", headers=headers).json()["role"] == "finance"
+
+    # deactivated users are rejected at once and cannot log in again
+    with Session(engine) as session:
+        u = session.exec(select(User).where(User.username == "cacheuser")).one()
+        u.is_active = False
+        session.add(u)
+        session.commit()
+    assert client.get("/api/users/me", headers=headers).status_code == 401
+    r = client.post("/api/auth/token", data={"username": "cacheuser", "password": "pw"})
+    assert r.status_code == 400
+
+
+def test_ttl_cache_evicts_oldest_and_expires():
+    from app.cache import TTLCache
+
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    cache.set("d", 4, ttl=0)
+    assert cache.get("d") is None
+
+
+def test_cookie_sessions_are_cached_and_revocable():
+    from sqlalchemy import event
+
+    client = TestClient(app)
+    with Session(engine) as session:
+        for name, role in (("cookieclerk", "clerk"), ("cookieadmin", "admin")):
+            if not session.exec(select(User).where(User.username == name)).first():
+                session.add(
+                    User(
+                        username=name, password_hash=get_password_hash("pw"), role=role
+                    )
+                )
+        session.commit()
+        clerk_id = session.exec(
+            select(User.id).where(User.username == "cookieclerk")
+        ).one()
+
+    client.post("/login", data={"username": "cookieclerk", "password": "pw"})
+    assert client.get("/dashboard").status_code == 200
+
+    statements = []
+
+    def _count(conn, cursor, statement, params, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        assert client.get("/dashboard").status_code == 200
+        assert client.get("/").status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    assert statements == []
+
+    admin = _token(client, "cookieadmin", "pw")
+    r = client.post(f"/api/users/{clerk_id}/revoke-sessions", headers=admin)
+    assert r.status_code == 200
+    r = client.get("/dashboard")
+    assert r.status_code == 401
+    assert r.json()["detail"] == "Session revoked"
+
+    # a fresh login carries the new epoch
+    client.post("/login", data={"username": "cookieclerk", "password": "pw"})
+    assert client.get("/dashboard").status_code == 200
+    r = client.post("/api/users/999999/revoke-sessions", headers=admin)
+    assert r.status_code == 404
+
+
+def test_login_rehashes_weaker_password_hash():
+    from passlib.hash import pbkdf2_sha256
+
+    from app.passwords import PASSWORD_ROUNDS
+
+    client = TestClient(app)
+    with Session(engine) as session:
+        if not session.exec(select(User).where(User.username == "rehash")).first():
+            session.add(
+                User(
+                    username="rehash",
+                    password_hash=pbkdf2_sha256.using(rounds=1000).hash("pw"),
+                    role="clerk",
+                )
+            )
+            session.commit()
+
+    _token(client, "rehash", "pw")
+    with Session(engine) as session:
+        stored = session.exec(
+            select(User.password_hash).where(User.username == "rehash")
+        ).one()
+    assert f"$pbkdf2-sha256${PASSWORD_ROUNDS}$" in stored
+    _token(client, "rehash", "pw")
+
+
+def test_login_attempt_limit_and_busy_queue(monkeypatch):
+    import threading
+
+    import app.passwords as passwords
+
+    client = TestClient(app)
+    with Session(engine) as session:
+        if not session.exec(select(User).where(User.username == "limited")).first():
+            session.add(
+                User(
+                    username="limited",
+                    password_hash=get_password_hash("pw"),
+                    role="clerk",
+                )
+            )
+            session.commit()
+
+    bad = {"username": "limited", "password": "wrong"}
+    for _ in range(passwords.LOGIN_MAX_FAILURES_PER_USER):
+        assert client.post("/api/auth/token", data=bad).status_code == 400
+    r = client.post("/api/auth/token", data={"username": "limited", "password": "pw"})
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) > 0
+    r = client.post("/login", data=bad, follow_redirects=False)
+    assert r.headers["location"] == "/login?error=throttled"
+    passwords.login_limiter.reset("user:limited")
+    passwords.login_limiter.reset("ip:testclient")
+
+    # no free verification slots -> 503 instead of queueing behind the burst
+    monkeypatch.setattr(passwords, "_slots", threading.BoundedSemaphore(1))
+    passwords._slots.acquire()
+    r = client.post("/api/auth/token", data={"username": "limited", "password": "pw"})
+    assert r.status_code == 503
+
+
+def test_login_limiter_bounds_tracked_keys(monkeypatch):
+    from app import passwords
+
+    clock = [1000.0]
+    monkeypatch.setattr(passwords.time, "monotonic", lambda: clock[0])
+    limiter = passwords.LoginLimiter(window=60, maxkeys=3)
+    for n in range(3):
+        assert limiter.record_failure(f"ip:{n}")
+    assert not limiter.record_failure("ip:3")
+    assert len(limiter) == 3
+    assert limiter.retry_after("ip:3", 1) is None
+    assert limiter.retry_after("ip:0", 1) is not None
+
+    # keys whose newest failure left the window are dropped on the next failure
+    clock[0] += 61
+    assert limiter.record_failure("ip:new")
+    assert len(limiter) == 1
+
+
+def test_locked_key_survives_a_flood_of_other_keys(monkeypatch):
+    from app import passwords
+
+    clock = [1000.0]
+    monkeypatch.setattr(passwords.time, "monotonic", lambda: clock[0])
+    limiter = passwords.LoginLimiter(window=60, maxkeys=100)
+    for _ in range(5):
+        limiter.record_failure("user:victim")
+    for n in range(1000):
+        clock[0] += 0.01
+        limiter.record_failure(f"user:random{n}")
+    assert len(limiter) == 100
+    assert limiter.retry_after("user:victim", 5) is not None
@@ -0,0 +1,64 @@
+from datetime import datetime
+import gzip
+import sqlite3
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.auth import get_password_hash
+from app.backup import backup_database, list_backups
+from app.db import engine, init_db
+from app.main import app
+from app.metrics import metrics
+from app.models import User
+
+
+def setup_module(module):
+    init_db()
+
+
+def test_backup_copies_rotates_and_reports_metrics(tmp_path):
+    first = backup_database(
+        dest_dir=str(tmp_path), keep=2, compress=False, now=datetime(2026, 1, 1)
+    )
+    with sqlite3.connect(first["path"]) as conn:
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master")}
+        assert "bill" in tables
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+
+    backup_database(dest_dir=str(tmp_path), keep=2, now=datetime(2026, 1, 2))
+    third = backup_database(dest_dir=str(tmp_path), keep=2, now=datetime(2026, 1, 3))
+    assert third["removed"] == [first["path"]]
+    kept = list_backups(str(tmp_path), "test")
+    assert [p.rsplit("-", 2)[-2] for p in kept] == ["20260102", "20260103"]
+
+    with gzip.open(third["path"], "rb") as fh:
+        assert fh.read(16) == b"SQLite format 3\x00"
+
+    snap = metrics.snapshot()
+    assert snap["counters"]["backup.success"] >= 3
+    assert snap["gauges"]["backup.size_bytes"] == third["size"]
+    assert snap["timings"]["backup.duration_seconds"]["count"] >= 3
+
+
+def test_metrics_endpoint_is_admin_only():
+    with Session(engine) as s:
+        for name, role in (("metricsadmin", "admin"), ("metricsclerk", "clerk")):
+            if not s.exec(select(User).where(User.username == name)).first():
+                s.add(
+                    User(
+                        username=name, password_hash=get_password_hash("pw"), role=role
+                    )
+                )
+        s.commit()
+    client = TestClient(app)
+
+    def headers(name):
+        r = client.post("/api/auth/token", data={"username": name, "password": "pw"})
+        return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    r = client.get("/api/v1/metrics/", headers=headers("metricsadmin"))
+    assert r.status_code == 200
+    assert set(r.json()) >= {"counters", "gauges", "timings"}
+    r = client.get("/api/v1/metrics/", headers=headers("metricsclerk"))
+    assert r.status_code == 403
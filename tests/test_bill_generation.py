@@ -0,0 +1,127 @@
+from datetime import date, timedelta
+import threading
+import uuid
+
+import pytest
+from sqlmodel import Session, func, select
+
+from app.billing import (
+    compute_billing_cycle,
+    find_active_lease,
+    generate_batch_for_company,
+    generate_bill_for_unit,
+    insert_bill,
+)
+from app.db import engine, init_db
+from app.models import Bill, BillLine
+from scripts.generate_data import build_portfolio, next_ids, write_sqlite
+
+
+def setup_module(module):
+    init_db()
+
+
+def _portfolio(units=4, **kwargs):
+    with engine.connect() as conn:
+        start_ids = next_ids(conn)
+    rows = build_portfolio(
+        companies=1,
+        communities=1,
+        buildings=1,
+        units=units,
+        months=3,
+        bill_months=0,
+        prefix=f"BG{uuid.uuid4().hex[:6]}",
+        start_ids=start_ids,
+        **kwargs,
+    )
+    write_sqlite(engine, rows)
+    return rows
+
+
+def _bill_count(unit_ids):
+    with Session(engine) as s:
+        return s.exec(
+            select(func.count()).select_from(Bill).where(Bill.unit_id.in_(unit_ids))
+        ).one()
+
+
+def test_insert_bill_does_nothing_on_duplicate_cycle():
+    rows = _portfolio(units=1)
+    unit = rows["unit"][0]
+    values = dict(
+        unit_id=unit["id"],
+        company_id=rows["company"][0]["id"],
+        community_id=rows["community"][0]["id"],
+        cycle_start=date(2025, 12, 1),
+        cycle_end=date(2025, 12, 31),
+        status="draft",
+        total_amount=0,
+    )
+    with Session(engine) as s:
+        bill = insert_bill(s, **values)
+        assert bill is not None and bill.id is not None
+        assert insert_bill(s, **values) is None
+        s.commit()
+    assert _bill_count([unit["id"]]) == 1
+
+
+def test_generate_bill_for_unit_returns_existing_bill():
+    rows = _portfolio(units=1)
+    unit_id = rows["unit"][0]["id"]
+    first = generate_bill_for_unit(unit_id, date(2025, 12, 15))
+    again = generate_bill_for_unit(unit_id, date(2025, 12, 15))
+    assert again.id == first.id
+    with Session(engine) as s:
+        lines = s.exec(select(BillLine).where(BillLine.bill_id == first.id)).all()
+    assert [line.item_code for line in lines].count("rent") == 1
+
+
+def test_concurrent_batches_create_each_bill_once():
+    rows = _portfolio(units=6)
+    company_id = rows["company"][0]["id"]
+    unit_ids = [u["id"] for u in rows["unit"]]
+    errors, results = [], []
+
+    def run():
+        try:
+            results.append(generate_batch_for_company(company_id, date(2025, 12, 15)))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert _bill_count(unit_ids) == len(unit_ids)
+    assert len({tuple(sorted(b.id for b in r)) for r in results}) == 1
+
+
+def test_active_lease_skips_ended_leases():
+    rows = _portfolio(units=2, ended_ratio=1.0)
+    unit_id = rows["unit"][0]["id"]
+    prev, cur = [lease for lease in rows["lease"] if lease["unit_id"] == unit_id]
+    with Session(engine) as s:
+        assert find_active_lease(s, unit_id, prev["start_date"]).id == prev["id"]
+        assert find_active_lease(s, unit_id, prev["end_date"]).id == prev["id"]
+        assert find_active_lease(s, unit_id, cur["start_date"]).id == cur["id"]
+        after_end = cur["end_date"] + timedelta(days=1)
+        assert find_active_lease(s, unit_id, after_end) is None
+
+    target = date(2025, 12, 15)
+    bills = generate_batch_for_company(rows["company"][0]["id"], target)
+    current = {lease["unit_id"]: lease for lease in rows["lease"]}
+    assert len(bills) == 2
+    for bill in bills:
+        lease = current[bill.unit_id]
+        assert bill.cycle_start == compute_billing_cycle(lease["start_date"], target)[0]
+
+
+def test_units_without_active_lease_are_not_billed():
+    rows = _portfolio(units=2, ended_ratio=0.0)
+    after_end = max(lease["end_date"] for lease in rows["lease"]) + timedelta(days=1)
+    assert generate_batch_for_company(rows["company"][0]["id"], after_end) == []
+    with pytest.raises(ValueError):
+        generate_bill_for_unit(rows["unit"][0]["id"], after_end)
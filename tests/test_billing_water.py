@@ -0,0 +1,136 @@
+from datetime import date
+from decimal import Decimal
+import uuid
+
+from sqlmodel import Session, select
+
+from app.billing import generate_batch_for_company, generate_bill_for_unit
+from app.db import engine, init_db
+from app.models import (
+    BillLine,
+    Building,
+    Community,
+    Company,
+    Lease,
+    Meter,
+    MeterReading,
+    TariffWater,
+    Tenant,
+    Unit,
+)
+
+
+def setup_module(module):
+    init_db()
+
+
+def create_metered_company(n_units=2, readings=None):
+    """Company with one community, leased units and 2 cold + 2 hot meters.
+
+    `readings` maps period -> (cold, hot) reading applied to every meter.
+    """
+    uniq = uuid.uuid4().hex[:8]
+    with Session(engine) as s:
+        comp = Company(code=f"W-{uniq}", name="Water Co")
+        s.add(comp)
+        s.flush()
+        comm = Community(company_id=comp.id, code=f"WC-{uniq}", name="Comm")
+        s.add(comm)
+        s.flush()
+        bld = Building(community_id=comm.id, code=f"WB-{uniq}", name="Bld")
+        s.add(bld)
+        s.flush()
+        t = Tenant(name=f"water-{uniq}")
+        s.add(t)
+        s.flush()
+        unit_ids = []
+        for i in range(n_units):
+            u = Unit(building_id=bld.id, unit_no=f"W{i}")
+            s.add(u)
+            s.flush()
+            s.add(
+                Lease(
+                    unit_id=u.id,
+                    tenant_id=t.id,
+                    start_date=date(2026, 1, 1),
+                    end_date=date(2026, 12, 31),
+                    rent_amount=Decimal("1000"),
+                )
+            )
+            for kind in ("cold_water", "hot_water"):
+                for slot in (1, 2):
+                    m = Meter(unit_id=u.id, kind=kind, slot=slot)
+                    s.add(m)
+                    s.flush()
+                    for period, (cold, hot) in (readings or {}).items():
+                        value = cold if kind == "cold_water" else hot
+                        s.add(
+                            MeterReading(
+                                meter_id=m.id, period=period, reading=Decimal(value)
+                            )
+                        )
+            unit_ids.append(u.id)
+        s.commit()
+        return comp.id, comm.id, unit_ids
+
+
+def bill_lines(bill_id):
+    with Session(engine) as s:
+        lines = s.exec(select(BillLine).where(BillLine.bill_id == bill_id)).all()
+        return {ln.charge_code: ln for ln in lines}
+
+
+def test_single_bill_adds_water_lines_from_consecutive_readings():
+    company_id, community_id, (unit_id,) = create_metered_company(
+        n_units=1, readings={"2026-02": ("10", "5"), "2026-03": ("16", "7.5")}
+    )
+    with Session(engine) as s:
+        s.add(TariffWater(company_id=company_id, cold_price="3", hot_price="20"))
+        s.add(
+            TariffWater(
+                company_id=company_id,
+                community_id=community_id,
+                cold_price="4",
+                hot_price="25",
+            )
+        )
+        s.commit()
+
+    bill = generate_bill_for_unit(unit_id, date(2026, 3, 15))
+    lines = bill_lines(bill.id)
+    # two meters of each kind: (16-10)*2 cold, (7.5-5)*2 hot
+    assert lines["cold_water"].qty == Decimal("12")
+    assert lines["cold_water"].unit_price == Decimal("4")
+    assert lines["hot_water"].qty == Decimal("5")
+    assert lines["hot_water"].amount == Decimal("125")
+    assert bill.total_amount == Decimal("1000") + Decimal("48") + Decimal("125")
+
+
+def test_first_reading_period_has_no_water_line():
+    _, _, (unit_id,) = create_metered_company(
+        n_units=1, readings={"2026-02": ("10", "5")}
+    )
+    bill = generate_bill_for_unit(unit_id, date(2026, 2, 15))
+    assert set(bill_lines(bill.id)) == {"rent"}
+
+
+def test_batch_bills_only_company_units_with_water():
+    company_id, _, unit_ids = create_metered_company(
+        n_units=3, readings={"2026-03": ("1", "1"), "2026-04": ("2", "3")}
+    )
+    create_metered_company(n_units=1)  # another company, must not be billed
+    with Session(engine) as s:
+        s.add(TariffWater(company_id=company_id, cold_price="2", hot_price="10"))
+        s.commit()
+
+    bills = generate_batch_for_company(company_id, date(2026, 4, 20))
+    assert sorted(b.unit_id for b in bills) == sorted(unit_ids)
+    for b in bills:
+        lines = bill_lines(b.id)
+        assert lines["cold_water"].amount == Decimal("4")
+        assert lines["hot_water"].amount == Decimal("40")
+        assert b.total_amount == Decimal("1044")
+
+    # re-running returns the same bills instead of creating new ones
+    again = generate_batch_for_company(company_id, date(2026, 4, 20))
+    assert sorted(b.id for b in again) == sorted(b.id for b in bills)
@@ -0,0 +1,30 @@
+import json
+import sys
+
+from scripts import compare_benchmarks
+
+
+def _run(monkeypatch, tmp_path, old, new):
+    paths = []
+    for name, benchmarks in (("old", old), ("new", new)):
+        path = tmp_path / f"{name}.json"
+        path.write_text(json.dumps({"commit": name, "benchmarks": benchmarks}))
+        paths.append(str(path))
+    monkeypatch.setattr(sys, "argv", ["compare_benchmarks.py", *paths])
+    compare_benchmarks.main()
+
+
+def test_missing_metrics_print_a_dash(monkeypatch, tmp_path, capsys):
+    old = [{"name": "load", "rps": 50.0}, {"name": "other", "rps": None}]
+    new = [
+        {"name": "load", "rps": None},
+        {"name": "other", "rps": 40.0},
+        {"name": "added", "rps": None},
+        {"name": "bills", "median": 0.5},
+    ]
+    _run(monkeypatch, tmp_path, old, new)
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[2].split() == ["load", "50.0000", "-", "-"]
+    assert lines[3].split() == ["other", "-", "40.0000", "-"]
+    assert lines[4].split() == ["added", "-", "-", "new"]
+    assert lines[5].split() == ["bills", "-", "0.5000", "new"]
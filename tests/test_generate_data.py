@@ -0,0 +1,84 @@
+import uuid
+
+from sqlmodel import Session, func, select
+
+from app.db import engine, init_db
+from app.imports import process_leases_path, process_rooms_path
+from app.models import Bill, BillLine, Company, Lease, Unit
+from scripts.generate_data import build_portfolio, next_ids, write_csv, write_sqlite
+
+SIZES = dict(companies=2, communities=1, buildings=2, units=3, months=4)
+
+
+def setup_module(module):
+    init_db()
+
+
+def _strip_ids(rows):
+    return {
+        t: [{k: v for k, v in r.items() if k != "id"} for r in rs]
+        for t, rs in rows.items()
+    }
+
+
+def test_same_seed_same_rows():
+    a = build_portfolio(seed=7, **SIZES)
+    b = build_portfolio(seed=7, start_ids={"unit": 100}, **SIZES)
+    assert _strip_ids(a)["lease"] == [
+        {**r, "unit_id": r["unit_id"] - 99} for r in _strip_ids(b)["lease"]
+    ]
+    assert a["meterreading"] == b["meterreading"]
+    assert build_portfolio(seed=8, **SIZES)["lease"] != a["lease"]
+
+
+def test_leases_do_not_overlap_and_cover_bills():
+    rows = build_portfolio(seed=3, ended_ratio=0.5, **SIZES)
+    by_unit = {}
+    for lease in rows["lease"]:
+        by_unit.setdefault(lease["unit_id"], []).append(lease)
+    assert len(rows["lease"]) > len(rows["unit"])
+    for leases in by_unit.values():
+        for prev, cur in zip(leases, leases[1:]):
+            assert prev["end_date"] < cur["start_date"]
+    assert len(rows["bill"]) == len(rows["unit"]) * 3
+    lines = {}
+    for line in rows["billline"]:
+        lines.setdefault(line["bill_id"], []).append(line["amount"])
+    for bill in rows["bill"]:
+        assert bill["total_amount"] == sum(lines[bill["id"]])
+    assert [b["status"] for b in rows["bill"][:3]] == ["issued", "issued", "draft"]
+
+
+def test_csv_output_imports(tmp_path):
+    prefix = f"G{uuid.uuid4().hex[:6]}"
+    rows = build_portfolio(seed=1, prefix=prefix, **SIZES)
+    paths = write_csv(str(tmp_path), rows)
+    assert process_rooms_path(paths["rooms"])["created"] == len(rows["unit"])
+    assert process_leases_path(paths["leases"])["created"] == len(rows["lease"])
+
+
+def test_sqlite_output_bulk_inserts():
+    prefix = f"G{uuid.uuid4().hex[:6]}"
+    with engine.connect() as conn:
+        start_ids = next_ids(conn)
+    rows = build_portfolio(seed=2, prefix=prefix, start_ids=start_ids, **SIZES)
+    counts = write_sqlite(engine, rows)
+    assert counts["unit"] == 12
+    with Session(engine) as s:
+        company_ids = s.exec(
+            select(Company.id).where(Company.code.startswith(prefix))
+        ).all()
+        assert len(company_ids) == 2
+        unit_ids = [r["id"] for r in rows["unit"]]
+        assert (
+            s.exec(
+                select(func.count()).select_from(Unit).where(Unit.id.in_(unit_ids))
+            ).one()
+            == 12
+        )
+        assert s.exec(
+            select(func.count()).select_from(Lease).where(Lease.unit_id.in_(unit_ids))
+        ).one() == len(rows["lease"])
+        bill = s.get(Bill, rows["bill"][0]["id"])
+        lines = s.exec(select(BillLine).where(BillLine.bill_id == bill.id)).all()
+        assert bill.total_amount == sum(line.amount for line in lines)
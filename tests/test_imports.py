@@ -190,3 +190,251 @@ def test_leases_import_rollback_on_overlap():
         assert b.get("errors") is not None
     else:
         assert "errors" in body
+
+
+def _poll_batch(client, token, batch_id):
+    import time
+
+    for _ in range(20):
+        r = client.get(
+            f"/api/v1/imports/batches/{batch_id}",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert r.status_code == 200
+        b = r.json()
+        if b.get("status") in ("done", "failed"):
+            return b
+        time.sleep(0.05)
+    return b
+
+
+def test_payments_import_matches_bills_and_is_idempotent():
+    import uuid
+
+    from app.billing import generate_bill_for_unit
+    from app.models import Building, Community, Company, Payment, Tenant
+
+    client = TestClient(app)
+    make_user("clerkp", "pass", "clerk")
+    r = client.post("/api/auth/token", data={"username": "clerkp", "password": "pass"})
+    token = r.json()["access_token"]
+
+    uniq = uuid.uuid4().hex[:6]
+    with Session(engine) as s:
+        comp = Company(code=f"PAY{uniq}", name="Pay Co")
+        s.add(comp)
+        s.flush()
+        comm = Community(company_id=comp.id, code="PC1", name="PC1")
+        s.add(comm)
+        s.flush()
+        bld = Building(community_id=comm.id, code="PB1", name="PB1")
+        s.add(bld)
+        s.flush()
+        t = Tenant(name=f"payer-{uniq}")
+        s.add(t)
+        s.flush()
+        unit_ids = []
+        for no in ("301", "302"):
+            u = Unit(building_id=bld.id, unit_no=no)
+            s.add(u)
+            s.flush()
+            s.add(
+                Lease(
+                    unit_id=u.id,
+                    tenant_id=t.id,
+                    start_date=date(2026, 1, 1),
+                    end_date=date(2026, 12, 31),
+                    rent_amount=900,
+                    deposit_amount=0,
+                )
+            )
+            unit_ids.append(u.id)
+        s.commit()
+
+    bill1 = generate_bill_for_unit(unit_ids[0], date(2026, 6, 5))
+    generate_bill_for_unit(unit_ids[1], date(2026, 6, 5))
+
+    csv_content = (
+        "bill_id,company_code,community_code,building_code,unit_no,cycle_start,"
+        "amount,method,reference,received_at\n"
+        f"{bill1.id},,,,,,400,cash,R-{uniq}-1,2026-06-06\n"
+        f",PAY{uniq},PC1,PB1,302,2026-06-01,900,bank,R-{uniq}-2,\n"
+        f",PAY{uniq},PC1,PB1,999,2026-06-01,10,bank,R-{uniq}-3,\n"
+        f"{bill1.id},,,,,,400,cash,R-{uniq}-1,2026-06-06\n"
+    )
+    files = {"file": ("payments.csv", csv_content, "text/csv")}
+    res = client.post(
+        "/api/v1/imports/payments",
+        files=files,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    b = _poll_batch(client, token, res.json()["batch_id"])
+    assert b["status"] == "done", b
+    result = b["result"]
+    assert result["created"] == 2
+    assert result["duplicates"] == 1
+    assert [u["row"] for u in result["unmatched"]] == [4]
+
+    with Session(engine) as s:
+        payments = s.exec(select(Payment).where(Payment.unit_id.in_(unit_ids))).all()
+        assert sorted(p.unit_id for p in payments) == sorted(unit_ids)
+
+    # re-importing the same file inserts nothing new
+    res = client.post(
+        "/api/v1/imports/payments",
+        files=files,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    b = _poll_batch(client, token, res.json()["batch_id"])
+    assert b["result"]["created"] == 0
+    assert b["result"]["duplicates"] == 3
+
+
+def test_payments_import_rejects_invalid_rows():
+    client = TestClient(app)
+    make_user("clerkp", "pass", "clerk")
+    r = client.post("/api/auth/token", data={"username": "clerkp", "password": "pass"})
+    token = r.json()["access_token"]
+
+    csv_content = "bill_id,amount\n1,abc\n,5\n1,NaN\n1,-Infinity\n"
+    res = client.post(
+        "/api/v1/imports/payments",
+        files={"file": ("payments.csv", csv_content, "text/csv")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    b = _poll_batch(client, token, res.json()["batch_id"])
+    assert b["status"] == "failed"
+    assert [e["row"] for e in b["errors"]] == [2, 3, 4, 5]
+    assert b["errors"][2]["error"] == "invalid amount format"
+
+
+def test_leases_import_handles_open_ended_lease_and_reimport():
+    import uuid
+
+    from app.models import Building, Community, Company, Tenant
+
+    client = TestClient(app)
+    make_user("clerko", "pass", "clerk")
+    r = client.post("/api/auth/token", data={"username": "clerko", "password": "pass"})
+    token = r.json()["access_token"]
+
+    uniq = uuid.uuid4().hex[:6]
+    with Session(engine) as s:
+        comp = Company(code=f"OPEN{uniq}", name="Open Co")
+        s.add(comp)
+        s.flush()
+        comm = Community(company_id=comp.id, code="OC1", name="OC1")
+        s.add(comm)
+        s.flush()
+        bld = Building(community_id=comm.id, code="OB1", name="OB1")
+        s.add(bld)
+        s.flush()
+        u1 = Unit(building_id=bld.id, unit_no="1")
+        u2 = Unit(building_id=bld.id, unit_no="2")
+        s.add(u1)
+        s.add(u2)
+        s.flush()
+        t = Tenant(name="Open Tenant")
+        s.add(t)
+        s.flush()
+        # open-ended lease on unit 1 used to crash the importer's overlap loop
+        s.add(
+            Lease(
+                unit_id=u1.id,
+                tenant_id=t.id,
+                start_date=date(2026, 1, 1),
+                end_date=None,
+            )
+        )
+        s.commit()
+        u2_id = u2.id
+
+    header = "company_code,community_code,building_code,unit_no,tenant_name,tenant_mobile,start_date,end_date,rent_amount,deposit_amount\n"
+    rows = (
+        f"OPEN{uniq},OC1,OB1,1,Jane,1,2027-01-01,2027-12-31,900,0\n"
+        f"OPEN{uniq},OC1,OB1,2,Jane,1,2026-01-01,2026-12-31,900,0\n"
+    )
+    res = client.post(
+        "/api/v1/imports/leases",
+        files={"file": ("leases.csv", header + rows, "text/csv")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    b = _poll_batch(client, token, res.json()["batch_id"])
+    assert b["status"] == "failed"
+    assert [e["row"] for e in b["errors"]] == [2]
+
+    # the same start date re-imported is an update, not an overlap
+    row = f"OPEN{uniq},OC1,OB1,2,Jane,1,2026-01-01,2026-12-31,900,0\n"
+    for rent in ("900", "950"):
+        res = client.post(
+            "/api/v1/imports/leases",
+            files={
+                "file": ("leases.csv", header + row.replace("900", rent), "text/csv")
+            },
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        b = _poll_batch(client, token, res.json()["batch_id"])
+        assert b["status"] == "done", b
+    with Session(engine) as s:
+        leases = s.exec(select(Lease).where(Lease.unit_id == u2_id)).all()
+        assert [str(ln.rent_amount) for ln in leases] in (["950"], ["950.0000"])
+
+
+def test_leases_path_checks_overlaps_per_chunk(tmp_path):
+    import uuid
+
+    import pytest
+
+    from app.imports import ImportErrors, process_leases_path
+    from app.models import Building, Community, Company
+    from app.profiling import Profiler
+
+    uniq = uuid.uuid4().hex[:6]
+    with Session(engine) as s:
+        comp = Company(code=f"CHK{uniq}", name="Chunk Co")
+        s.add(comp)
+        s.flush()
+        comm = Community(company_id=comp.id, code="CC1", name="CC1")
+        s.add(comm)
+        s.flush()
+        bld = Building(community_id=comm.id, code="CB1", name="CB1")
+        s.add(bld)
+        s.flush()
+        for n in range(20):
+            s.add(Unit(building_id=bld.id, unit_no=str(n)))
+        s.commit()
+
+    header = "company_code,community_code,building_code,unit_no,tenant_name,tenant_mobile,start_date,end_date,rent_amount,deposit_amount\n"
+    rows = "".join(
+        f"CHK{uniq},CC1,CB1,{n},T{n},{n},2026-01-01,2026-06-30,900,0\n"
+        for n in range(20)
+    )
+    path = tmp_path / "leases.csv"
+    # row 22 overlaps row 2 of the same file
+    path.write_text(
+        header + rows + f"CHK{uniq},CC1,CB1,0,T0,0,2026-06-01,2026-12-31,900,0\n"
+    )
+    with pytest.raises(ImportErrors) as exc:
+        process_leases_path(str(path))
+    assert [e["row"] for e in exc.value.errors] == [22]
+
+    path.write_text(header + rows)
+    with Profiler() as prof:
+        assert process_leases_path(str(path)) == {"created": 20, "updated": 0}
+    lease_selects = [
+        row
+        for row in prof.summary()["sql"]
+        if row["statement"].startswith("SELECT") and "lease" in row["statement"]
+    ]
+    assert sum(row["count"] for row in lease_selects) <= 2
+
+    # re-importing updates in place, and overlaps with stored leases are found
+    path.write_text(
+        header + rows + f"CHK{uniq},CC1,CB1,5,T5,5,2026-03-01,2026-12-31,900,0\n"
+    )
+    with pytest.raises(ImportErrors) as exc:
+        process_leases_path(str(path))
+    assert [e["row"] for e in exc.value.errors] == [22]
+    path.write_text(header + rows)
+    assert process_leases_path(str(path)) == {"created": 0, "updated": 20}
@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+import json
+from zoneinfo import ZoneInfo
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app import scheduler as sched
+from app.auth import get_password_hash
+from app.db import engine, init_db
+from app.locks import acquire_lock, lock_holder, release_lock
+from app.main import app
+from app.models import JobRun, User
+
+
+def setup_module(module):
+    init_db()
+
+
+def _admin_headers(client):
+    with Session(engine) as s:
+        if not s.exec(select(User).where(User.username == "jobsadmin")).first():
+            s.add(
+                User(
+                    username="jobsadmin",
+                    password_hash=get_password_hash("pw"),
+                    role="admin",
+                )
+            )
+            s.commit()
+    r = client.post("/api/auth/token", data={"username": "jobsadmin", "password": "pw"})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_lock_is_exclusive_until_expiry():
+    now = datetime(2026, 1, 1, 12, 0)
+    assert acquire_lock("t-lock", 60, owner="a", now=now)
+    assert not acquire_lock("t-lock", 60, owner="b", now=now)
+    # the owner renews; others only take over after expiry
+    assert acquire_lock("t-lock", 60, owner="a", now=now + timedelta(seconds=30))
+    assert not acquire_lock("t-lock", 60, owner="b", now=now + timedelta(seconds=80))
+    assert acquire_lock("t-lock", 60, owner="b", now=now + timedelta(seconds=91))
+    assert not release_lock("t-lock", owner="a")
+    assert release_lock("t-lock", owner="b")
+    assert lock_holder("t-lock") is None
+
+
+def test_run_job_records_success_and_failure(monkeypatch):
+    run = sched.run_job("summary_rebuild", trigger="manual")
+    assert run.status == "success"
+    assert "rows" in json.loads(run.result)
+
+    def boom():
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(sched.JOBS, "summary_rebuild", boom)
+    run = sched.run_job("summary_rebuild", trigger="manual")
+    assert run.status == "failed"
+    assert json.loads(run.error)["error"] == "boom"
+    assert lock_holder("job:summary_rebuild") is None
+
+
+def test_scheduled_runs_need_leadership_and_do_not_overlap():
+    far = datetime.utcnow() + timedelta(hours=1)
+    assert acquire_lock(sched.LEADER_LOCK, 3600, owner="other-host:1", now=far)
+    try:
+        assert sched.run_job("summary_rebuild") is None
+    finally:
+        release_lock(sched.LEADER_LOCK, owner="other-host:1")
+
+    assert acquire_lock("job:summary_rebuild", 3600, owner="other-host:1")
+    try:
+        assert sched.run_job("summary_rebuild", trigger="manual") is None
+    finally:
+        release_lock("job:summary_rebuild", owner="other-host:1")
+
+
+def test_missed_cron_slots_are_caught_up():
+    scheduler = sched.create_scheduler()
+    tz = ZoneInfo(sched.SCHEDULER_TIMEZONE)
+    # 05:00 local: the 03:15 summary slot is within the 6h grace
+    now = datetime(2099, 1, 1, 5, 0, tzinfo=tz)
+    assert "summary_rebuild" in sched.missed_runs(scheduler, now)
+
+    with Session(engine) as s:
+        run = JobRun(
+            job_id="summary_rebuild",
+            status="success",
+            started_at=datetime(2098, 12, 31, 19, 20),  # 03:20 local
+        )
+        s.add(run)
+        s.commit()
+        try:
+            assert "summary_rebuild" not in sched.missed_runs(scheduler, now)
+        finally:
+            s.delete(run)
+            s.commit()
+
+    job_ids = {job.id for job in scheduler.get_jobs()}
+    assert set(sched.job_triggers()) <= job_ids
+
+
+def test_jobs_endpoints():
+    client = TestClient(app)
+    headers = _admin_headers(client)
+    r = client.post("/api/v1/jobs/summary_rebuild/run", headers=headers)
+    assert r.status_code == 200
+    assert r.json()["status"] == "success"
+    assert r.json()["trigger"] == "manual"
+
+    r = client.get("/api/v1/jobs/", headers=headers)
+    assert r.status_code == 200
+    jobs = {j["id"]: j for j in r.json()["jobs"]}
+    assert set(jobs) == set(sched.JOBS)
+    assert jobs["summary_rebuild"]["last_run"]["status"] == "success"
+    assert jobs["monthly_billing"]["schedule"].startswith("cron")
+
+    r = client.get("/api/v1/jobs/summary_rebuild/runs?limit=1", headers=headers)
+    assert len(r.json()) == 1
+    assert client.get("/api/v1/jobs/nope/runs", headers=headers).status_code == 404
+    assert client.post("/api/v1/jobs/nope/run", headers=headers).status_code == 404
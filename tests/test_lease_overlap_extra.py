@@ -1,6 +1,7 @@
 from datetime import date
 
 import pytest
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, SQLModel, create_engine
 
 from app.models import (
@@ -11,6 +12,7 @@ from app.models import (
     Tenant,
     Unit,
     assert_no_lease_overlap,
+    find_lease_overlaps,
 )
 
 
@@ -180,3 +182,71 @@ def test_new_lease_covers_existing(engine):
         # new lease fully covers existing -> overlap
         with pytest.raises(ValueError):
             assert_no_lease_overlap(s, u.id, date(2023, 9, 1), date(2023, 10, 1))
+
+
+def test_bulk_overlap_check(engine):
+    with Session(engine) as s:
+        u, t = setup_minimal(s)
+        open_lease = Lease(
+            unit_id=u.id, tenant_id=t.id, start_date=date(2024, 6, 1), end_date=None
+        )
+        closed = Lease(
+            unit_id=u.id,
+            tenant_id=t.id,
+            start_date=date(2024, 1, 1),
+            end_date=date(2024, 3, 31),
+        )
+        s.add(open_lease)
+        s.add(closed)
+        s.commit()
+
+        found = find_lease_overlaps(
+            s,
+            [
+                (u.id, date(2024, 2, 1), date(2024, 2, 28), None),
+                (u.id, date(2024, 4, 1), date(2024, 5, 31), None),
+                (u.id, date(2030, 1, 1), None, None),
+                (u.id, date(2024, 1, 1), date(2024, 3, 31), closed.id),
+            ],
+        )
+        assert found == {0: closed.id, 2: open_lease.id}
+        # candidates staged by the previous call do not leak into this one
+        gap = (u.id, date(2024, 4, 1), date(2024, 5, 31), None)
+        assert find_lease_overlaps(s, [gap]) == {}
+
+
+def test_database_rejects_overlapping_lease(engine):
+    with Session(engine) as s:
+        u, t = setup_minimal(s)
+        s.add(
+            Lease(
+                unit_id=u.id, tenant_id=t.id, start_date=date(2025, 1, 1), end_date=None
+            )
+        )
+        s.commit()
+        later = Lease(
+            unit_id=u.id,
+            tenant_id=t.id,
+            start_date=date(2024, 1, 1),
+            end_date=date(2024, 12, 31),
+        )
+        s.add(later)
+        s.commit()
+
+        # bypassing assert_no_lease_overlap still fails at the database
+        s.add(
+            Lease(
+                unit_id=u.id,
+                tenant_id=t.id,
+                start_date=date(2026, 1, 1),
+                end_date=date(2026, 1, 31),
+            )
+        )
+        with pytest.raises(IntegrityError):
+            s.commit()
+        s.rollback()
+
+        later.end_date = date(2025, 1, 1)
+        s.add(later)
+        with pytest.raises(IntegrityError):
+            s.commit()
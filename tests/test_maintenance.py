@@ -0,0 +1,60 @@
+from datetime import datetime
+import uuid
+
+from sqlalchemy import text
+
+from app.db import SQLITE_JOURNAL_SIZE_LIMIT, engine, init_db
+from app.maintenance import in_quiet_hours, run_optimize, run_wal_maintenance
+from app.metrics import metrics
+from app.scheduler import create_scheduler
+
+
+def setup_module(module):
+    init_db()
+
+
+def test_connections_set_wal_size_pragmas():
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        limit = conn.exec_driver_sql("PRAGMA journal_size_limit").scalar()
+        assert limit == SQLITE_JOURNAL_SIZE_LIMIT
+
+
+def test_quiet_hours_window():
+    assert in_quiet_hours(datetime(2026, 1, 1, 3), "1-5")
+    assert not in_quiet_hours(datetime(2026, 1, 1, 5), "1-5")
+    # window across midnight
+    assert in_quiet_hours(datetime(2026, 1, 1, 23), "22-4")
+    assert in_quiet_hours(datetime(2026, 1, 1, 2), "22-4")
+    assert not in_quiet_hours(datetime(2026, 1, 1, 12), "22-4")
+    assert not in_quiet_hours(datetime(2026, 1, 1, 3), "")
+
+
+def test_wal_checkpoint_passive_then_truncate():
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO appconfig (key, value) VALUES (:k, :v)"),
+            {"k": f"wal-{uuid.uuid4().hex[:8]}", "v": "x" * 2000},
+        )
+
+    passive = run_wal_maintenance(now=datetime(2026, 1, 1, 12))
+    assert passive["mode"] == "PASSIVE"
+    assert passive["wal_bytes_before"] > 0
+
+    truncated = run_wal_maintenance(now=datetime(2026, 1, 1, 3))
+    assert truncated["mode"] == "TRUNCATE"
+    if not truncated["busy"]:
+        assert truncated["wal_bytes_after"] == 0
+
+    snap = metrics.snapshot()
+    assert snap["counters"]["wal.checkpoint.passive"] >= 1
+    assert snap["counters"]["wal.checkpoint.truncate"] >= 1
+    assert "wal.size_bytes" in snap["gauges"]
+
+
+def test_optimize_and_scheduled_jobs():
+    assert run_optimize()["duration"] >= 0
+    assert metrics.snapshot()["counters"]["sqlite.optimize"] >= 1
+
+    job_ids = {job.id for job in create_scheduler().get_jobs()}
+    assert {"backup", "wal_checkpoint", "sqlite_optimize"} <= job_ids
@@ -0,0 +1,154 @@
+from decimal import Decimal
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.auth import get_password_hash
+from app.db import engine, init_db
+from app.main import app
+from app.models import Building, Community, Company, Meter, MeterReading, Unit, User
+
+
+def setup_module(module):
+    init_db()
+
+
+def make_user(username, password, role):
+    with Session(engine) as session:
+        existing = session.exec(select(User).where(User.username == username)).first()
+        if existing:
+            return existing
+        u = User(
+            username=username, password_hash=get_password_hash(password), role=role
+        )
+        session.add(u)
+        session.commit()
+        return u
+
+
+def create_unit_meters():
+    """One unit with the standard 2 cold + 2 hot meters."""
+    uniq = uuid.uuid4().hex[:8]
+    with Session(engine) as s:
+        comp = Company(code=f"M-{uniq}", name="Meter Co")
+        s.add(comp)
+        s.flush()
+        comm = Community(company_id=comp.id, code=f"MC-{uniq}", name="Comm")
+        s.add(comm)
+        s.flush()
+        bld = Building(community_id=comm.id, code=f"MB-{uniq}", name="Bld")
+        s.add(bld)
+        s.flush()
+        u = Unit(building_id=bld.id, unit_no="M1")
+        s.add(u)
+        s.flush()
+        meters = []
+        for kind in ("cold_water", "hot_water"):
+            for slot in (1, 2):
+                m = Meter(unit_id=u.id, kind=kind, slot=slot)
+                s.add(m)
+                s.flush()
+                meters.append(m.id)
+        s.commit()
+        return meters
+
+
+def clerk_headers(client):
+    make_user("meter_clerk", "cpass", "clerk")
+    r = client.post(
+        "/api/auth/token", data={"username": "meter_clerk", "password": "cpass"}
+    )
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def post_readings(client, headers, period, values):
+    return client.post(
+        "/api/v1/meters/readings",
+        json={
+            "period": period,
+            "readings": [{"meter_id": m, "reading": str(v)} for m, v in values.items()],
+        },
+        headers=headers,
+    )
+
+
+def test_bulk_capture_and_monotonic_validation():
+    client = TestClient(app)
+    headers = clerk_headers(client)
+    meters = create_unit_meters()
+
+    r = post_readings(client, headers, "2026-01", {m: 10 for m in meters})
+    assert r.status_code == 200
+    assert r.json()["created"] == 4
+
+    r = post_readings(client, headers, "2026-02", {m: 15 for m in meters})
+    assert r.status_code == 200
+
+    # one meter goes backwards -> whole request rejected
+    values = {m: 20 for m in meters}
+    values[meters[2]] = 12
+    r = post_readings(client, headers, "2026-03", values)
+    assert r.status_code == 400
+    errors = r.json()["detail"]
+    assert [e["meter_id"] for e in errors] == [meters[2]]
+    assert "lower than 15" in errors[0]["error"]
+    with Session(engine) as s:
+        rows = s.exec(
+            select(MeterReading).where(
+                MeterReading.meter_id.in_(meters), MeterReading.period == "2026-03"
+            )
+        ).all()
+        assert rows == []
+
+    # back-filling a period validates against the reading before it
+    r = post_readings(client, headers, "2025-12", {meters[0]: 5})
+    assert r.status_code == 200
+    with Session(engine) as s:
+        latest = s.exec(
+            select(MeterReading)
+            .where(MeterReading.meter_id == meters[0])
+            .order_by(MeterReading.period.desc())
+        ).first()
+        assert latest.period == "2026-02" and latest.reading == Decimal("15")
+
+    # ... and against the reading after it
+    r = post_readings(client, headers, "2025-11", {meters[1]: 11})
+    assert r.status_code == 400
+    errors = r.json()["detail"]
+    assert [e["meter_id"] for e in errors] == [meters[1]]
+    assert "higher than 10" in errors[0]["error"]
+    assert "2026-01" in errors[0]["error"]
+    r = post_readings(client, headers, "2025-11", {meters[1]: 10})
+    assert r.status_code == 200
+
+
+def test_bulk_capture_rejects_duplicates_and_unknown_meters():
+    client = TestClient(app)
+    headers = clerk_headers(client)
+    meters = create_unit_meters()
+
+    r = post_readings(client, headers, "2026-01", {meters[0]: 1})
+    assert r.status_code == 200
+    r = post_readings(client, headers, "2026-01", {meters[0]: 2, 99999999: 1})
+    assert r.status_code == 400
+    errors = {e["meter_id"]: e["error"] for e in r.json()["detail"]}
+    assert "already exists" in errors[meters[0]]
+    assert errors[99999999] == "meter not found"
+
+    r = client.post(
+        "/api/v1/meters/readings",
+        json={
+            "period": "2026-04",
+            "readings": [
+                {"meter_id": meters[1], "reading": "1"},
+                {"meter_id": meters[1], "reading": "2"},
+            ],
+        },
+        headers=headers,
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"][0]["error"] == "duplicate meter"
+
+    r = post_readings(client, headers, "2026-13", {meters[1]: 1})
+    assert r.status_code == 422
@@ -0,0 +1,152 @@
+from datetime import date, datetime, timedelta
+import os
+import uuid
+
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from app.auth import get_auth_user, get_password_hash
+from app.cache import cache_versions
+from app.db import engine, init_db
+from app.imports import batch_upload_path, recover_import_batches
+from app.models import AppConfig, Company, ImportBatch, User
+from app.tariffs import get_tariff_table
+
+
+def setup_module(module):
+    init_db()
+
+
+def _version(name):
+    with Session(engine) as s:
+        row = s.exec(
+            select(AppConfig).where(AppConfig.key == f"cache_version:{name}")
+        ).first()
+        return int(row.value) if row else 0
+
+
+def _other_worker(sql, name, **params):
+    # a write made by another process: plain SQL plus the version bump, so
+    # none of this process's ORM events fire
+    with engine.begin() as conn:
+        conn.execute(text(sql), params)
+        cache_versions.bump(conn, name)
+
+
+def test_tariff_cache_follows_other_workers():
+    with Session(engine) as s:
+        comp = Company(code=f"MW-{uuid.uuid4().hex[:8]}", name="MW")
+        s.add(comp)
+        s.commit()
+        company_id = comp.id
+    cache_versions.poll(force=True)
+    assert get_tariff_table().resolve(company_id, None, date(2026, 1, 1)) is None
+
+    _other_worker(
+        "INSERT INTO tariffwater (company_id, cold_price, hot_price) "
+        "VALUES (:c, 3, 5)",
+        "tariffs",
+        c=company_id,
+    )
+    # still cached until this process polls the version counters
+    assert get_tariff_table().resolve(company_id, None, date(2026, 1, 1)) is None
+    assert "tariffs" in cache_versions.poll(force=True)
+    price = get_tariff_table().resolve(company_id, None, date(2026, 1, 1))
+    assert price is not None and price.cold_price == 3
+
+
+def test_user_writes_bump_version_and_refresh_other_workers():
+    name = f"mw-{uuid.uuid4().hex[:8]}"
+    with Session(engine) as s:
+        user = User(username=name, password_hash=get_password_hash("pw"), role="clerk")
+        s.add(user)
+        s.commit()
+        before = _version("users")
+        user.role = "finance"
+        s.add(user)
+        s.commit()
+    assert _version("users") == before + 1
+
+    cache_versions.poll(force=True)
+    assert get_auth_user(name).role == "finance"
+    _other_worker("UPDATE user SET role = 'sales' WHERE username = :n", "users", n=name)
+    assert get_auth_user(name).role == "finance"
+    cache_versions.poll(force=True)
+    assert get_auth_user(name).role == "sales"
+
+
+def test_recover_import_batches():
+    old = datetime.utcnow() - timedelta(days=1)
+    uniq = uuid.uuid4().hex[:8]
+    with Session(engine) as s:
+        stuck = ImportBatch(
+            filename="a.csv", kind="rooms", status="processing", started_at=old
+        )
+        missing = ImportBatch(filename="b.csv", kind="rooms", created_at=old)
+        orphan = ImportBatch(filename="c.csv", kind="rooms", created_at=old)
+        fresh = ImportBatch(filename="d.csv", kind="rooms")
+        for b in (stuck, missing, orphan, fresh):
+            s.add(b)
+        s.commit()
+        ids = [b.id for b in (stuck, missing, orphan, fresh)]
+
+    path = batch_upload_path(ids[2], "c.csv")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("company_code,community_code,building_code,unit_no,remark\n")
+        fh.write(f"MWR-{uniq},CM,B1,101,\n")
+    try:
+        result = recover_import_batches()
+    finally:
+        os.remove(path)
+
+    assert {ids[0], ids[1]} <= set(result["failed"])
+    assert ids[2] in result["processed"]
+    with Session(engine) as s:
+        statuses = [s.get(ImportBatch, i).status for i in ids]
+    assert statuses == ["failed", "failed", "done", "pending"]
+
+
+def test_recovery_leaves_batches_with_a_live_worker():
+    from app.locks import acquire_lock
+
+    old = datetime.utcnow() - timedelta(days=1)
+    with Session(engine) as s:
+        live = ImportBatch(
+            filename="e.csv", kind="rooms", status="processing", started_at=old
+        )
+        s.add(live)
+        s.commit()
+        live_id = live.id
+    assert acquire_lock(f"import:{live_id}", 60, owner="other-host:1")
+    assert live_id not in recover_import_batches()["failed"]
+    with Session(engine) as s:
+        assert s.get(ImportBatch, live_id).status == "processing"
+
+
+def test_worker_does_not_overwrite_a_recovered_batch(monkeypatch):
+    from app import imports
+    from app.locks import lock_holder
+
+    with Session(engine) as s:
+        batch = ImportBatch(filename="f.csv", kind="rooms")
+        s.add(batch)
+        s.commit()
+        batch_id = batch.id
+
+    def taken_over(path):
+        assert lock_holder(f"import:{batch_id}") is not None
+        # recovery on another worker gave up on the batch meanwhile
+        with engine.begin() as conn:
+            conn.execute(
+                text("UPDATE importbatch SET status = 'failed' WHERE id = :i"),
+                {"i": batch_id},
+            )
+        return {"created": 1, "updated": 0}
+
+    monkeypatch.setattr(imports, "process_rooms_path", taken_over)
+    imports.process_import_batch(batch_id, "unused.csv")
+    with Session(engine) as s:
+        batch = s.get(ImportBatch, batch_id)
+        assert batch.status == "failed" and batch.result is None
+    assert lock_holder(f"import:{batch_id}") is None
@@ -7,7 +7,7 @@ from starlette.testclient import TestClient
 from app.auth import get_password_hash
 from app.db import engine, init_db
 from app.main import app
-from app.models import Building, Community, Company, Lease, Unit, User
+from app.models import Building, Community, Company, Lease, Payment, Unit, User
 
 
 def setup_module(module):
@@ -102,6 +102,7 @@ def test_payments_api_json_and_form():
     print("JSON resp:", r.status_code, r.text)
     assert r.status_code == 200
     assert "payment_id" in r.json()
+    json_payment_id = r.json()["payment_id"]
 
     # Form payload (unit-level credit)
     form = {"unit_id": unit_id, "amount": "50.00", "method": "cash"}
@@ -109,6 +110,15 @@ def test_payments_api_json_and_form():
     print("FORM resp:", r.status_code, r.text)
     assert r.status_code == 200
     assert "payment_id" in r.json()
+    form_payment_id = r.json()["payment_id"]
+
+    # both payments are persisted; the bill payment inherits the bill's unit
+    with Session(engine) as s:
+        p1 = s.get(Payment, json_payment_id)
+        p2 = s.get(Payment, form_payment_id)
+        assert p1.bill_id == bill_id and p1.unit_id == unit_id
+        assert p1.amount == Decimal("120.50") and p1.reference == "txn-json"
+        assert p2.bill_id is None and p2.unit_id == unit_id
 
     # verify payments applied reduced arrears when generating next bill
     # generate next cycle bill
@@ -121,3 +131,22 @@ def test_payments_api_json_and_form():
     next_bill_id = r.json()["bill_id"]
     # ensure created
     assert next_bill_id is not None
+
+
+def test_payments_api_rejects_unknown_targets():
+    client = TestClient(app)
+    make_user("clerk1", "cpass", "clerk")
+    headers = {"Authorization": f"Bearer {get_token(client, 'clerk1', 'cpass')}"}
+
+    r = client.post(
+        "/api/v1/payments", json={"bill_id": 99999999, "amount": "1"}, headers=headers
+    )
+    assert r.status_code == 404
+
+    r = client.post("/api/v1/payments", json={"amount": "1"}, headers=headers)
+    assert r.status_code == 400
+
+    r = client.post(
+        "/api/v1/payments", json={"unit_id": 1, "amount": "-5"}, headers=headers
+    )
+    assert r.status_code == 422
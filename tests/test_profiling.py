@@ -0,0 +1,107 @@
+import json
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app import profiling, scheduler as sched
+from app.auth import get_password_hash
+from app.db import engine, init_db
+from app.main import app
+from app.models import Company, User
+
+
+def setup_module(module):
+    init_db()
+
+
+def _headers(client, username, role):
+    with Session(engine) as s:
+        if not s.exec(select(User).where(User.username == username)).first():
+            s.add(
+                User(
+                    username=username, password_hash=get_password_hash("pw"), role=role
+                )
+            )
+            s.commit()
+    r = client.post("/api/auth/token", data={"username": username, "password": "pw"})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_normalize_statement_folds_in_lists():
+    sql = "SELECT id\n  FROM unit WHERE id IN (?, ?, ?)"
+    assert (
+        profiling.normalize_statement(sql) == "SELECT id FROM unit WHERE id IN (?...)"
+    )
+
+
+def test_profiler_counts_statements_of_its_thread():
+    with profiling.Profiler(top=5) as prof:
+        with Session(engine) as s:
+            s.exec(select(Company.id).limit(1)).all()
+            s.exec(select(Company.id).limit(1)).all()
+    summary = prof.summary()
+    assert summary["sql_statements"] == 2
+    assert summary["sql"][0]["count"] == 2
+    assert summary["peak_memory_bytes"] > 0
+    assert len(summary["top_functions"]) == 5
+
+
+def test_import_profile_is_stored_and_served():
+    client = TestClient(app)
+    admin = _headers(client, "profadmin", "admin")
+    clerk = _headers(client, "profclerk", "clerk")
+    code = f"P{uuid.uuid4().hex[:6]}"
+    csv = f"company_code,community_code,building_code,unit_no,remark\n{code},C,B,101,\n"
+    files = {"file": ("rooms.csv", csv, "text/csv")}
+
+    r = client.post("/api/v1/imports/rooms?profile=true", files=files, headers=clerk)
+    assert r.status_code == 403
+
+    r = client.post("/api/v1/imports/rooms?profile=true", files=files, headers=admin)
+    batch_id = r.json()["batch_id"]
+    r = client.get(f"/api/v1/imports/batches/{batch_id}", headers=admin)
+    assert r.json()["status"] == "done" and r.json()["profiled"]
+
+    r = client.get(f"/api/v1/profiles/imports/{batch_id}", headers=admin)
+    assert r.status_code == 200
+    profile = r.json()["profile"]
+    assert profile["sql_statements"] > 0
+    assert any("INSERT INTO unit" in row["statement"] for row in profile["sql"])
+    assert any(
+        "process_rooms_path" in row["function"] for row in profile["top_functions"]
+    )
+    assert (
+        client.get(f"/api/v1/profiles/imports/{batch_id}", headers=clerk).status_code
+        == 403
+    )
+
+    listed = client.get("/api/v1/profiles/", headers=admin).json()
+    assert listed["imports"][0]["batch_id"] == batch_id
+
+
+def test_batch_billing_profile_recorded_as_job_run():
+    client = TestClient(app)
+    admin = _headers(client, "profadmin", "admin")
+    with Session(engine) as s:
+        company = Company(code=f"P{uuid.uuid4().hex[:6]}", name="profiled")
+        s.add(company)
+        s.commit()
+        company_id = company.id
+    r = client.post(
+        f"/api/v1/bills/generate-batch?company_id={company_id}&date=2026-01-15&profile=true",
+        headers=admin,
+    )
+    run_id = r.json()["profile_run_id"]
+    r = client.get(f"/api/v1/profiles/jobs/{run_id}", headers=admin)
+    assert r.json()["job_id"] == "generate_batch"
+    assert r.json()["status"] == "success"
+    assert "top_functions" in r.json()["profile"]
+
+
+def test_profile_jobs_setting_profiles_scheduled_runs(monkeypatch):
+    run = sched.run_job("summary_rebuild", trigger="manual")
+    assert run.profile is None
+    monkeypatch.setattr(profiling, "PROFILE_JOBS", True)
+    run = sched.run_job("summary_rebuild", trigger="manual")
+    assert json.loads(run.profile)["sql_statements"] > 0
@@ -0,0 +1,110 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+import pytest
+
+from app import db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# generous default so slow CI machines pass; tighten locally via env
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "3.0"))
+LAZY_MODULES = ("jose", "passlib", "apscheduler", "openpyxl", "app.imports")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+app.main.on_startup()
+t2 = time.perf_counter()
+print(json.dumps({
+    "import": t1 - t0,
+    "startup": t2 - t1,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def _script():
+    return ScriptDirectory.from_config(Config(os.path.join(ROOT, "alembic.ini")))
+
+
+def test_schema_head_is_the_alembic_head():
+    assert _script().get_heads() == [db.schema_head()]
+
+
+def test_check_schema_refuses_behind_and_unknown_revisions(monkeypatch):
+    head = db.schema_head()
+    assert db.check_schema() == head
+    monkeypatch.setattr(db, "DB_AUTO_CREATE", False)
+    previous = _script().get_revision(head).down_revision
+    for revision in (previous, "9999_future", None):
+        monkeypatch.setattr(db, "schema_revision", lambda: revision)
+        with pytest.raises(db.SchemaOutOfDate):
+            db.check_schema()
+
+
+def test_database_migrated_by_newer_code_needs_opt_in(monkeypatch, tmp_path, caplog):
+    # a newer release's script directory: ours plus one more revision
+    head = db.schema_head()
+    shutil.copytree(os.path.join(ROOT, "alembic"), tmp_path / "alembic")
+    (tmp_path / "alembic" / "versions" / "9000_newer_release.py").write_text(
+        f'''"""newer release\n\nRevision ID: 9000_newer_release\nRevises: {head}\n"""
+
+revision = "9000_newer_release"
+down_revision = "{head}"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    pass
+
+
+def downgrade() -> None:
+    pass
+'''
+    )
+    newer = Config(os.path.join(ROOT, "alembic.ini"))
+    newer.set_main_option("script_location", str(tmp_path / "alembic"))
+    newer.set_main_option("sqlalchemy.url", db.DATABASE_URL)
+    monkeypatch.setattr(db, "DB_AUTO_CREATE", False)
+
+    command.upgrade(newer, "head")
+    # alembic's env.py runs fileConfig, which disables existing loggers and
+    # replaces the root handlers that caplog relies on
+    monkeypatch.setattr(db.logger, "disabled", False)
+    db.logger.addHandler(caplog.handler)
+    try:
+        assert db.schema_revision() == "9000_newer_release"
+        with pytest.raises(db.SchemaOutOfDate, match="unknown revision"):
+            db.check_schema()
+        monkeypatch.setattr(db, "SCHEMA_ALLOW_UNKNOWN", True)
+        assert db.check_schema() == "9000_newer_release"
+        assert "unknown revision 9000_newer_release" in caplog.text
+    finally:
+        db.logger.removeHandler(caplog.handler)
+        command.downgrade(newer, head)
+    assert db.check_schema() == head
+
+
+def test_cold_start_budget_and_lazy_imports():
+    env = dict(os.environ, SCHEDULER_ENABLED="0")
+    env.pop("ADMIN_PASSWORD", None)
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE % (LAZY_MODULES,)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    assert result["loaded"] == []
+    assert result["import"] + result["startup"] < STARTUP_BUDGET_SECONDS
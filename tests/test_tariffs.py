@@ -0,0 +1,126 @@
+from datetime import date
+from decimal import Decimal
+import uuid
+
+import pytest
+from sqlmodel import Session
+
+from app.db import engine, init_db
+from app.models import Community, Company, TariffWater
+from app.tariffs import get_tariff_table, invalidate_tariff_cache
+
+ON = date(2026, 3, 1)
+
+
+def setup_module(module):
+    init_db()
+
+
+def make_scope():
+    uniq = uuid.uuid4().hex[:8]
+    with Session(engine) as s:
+        comp = Company(code=f"TF-{uniq}", name="Tariff Co")
+        s.add(comp)
+        s.flush()
+        a = Community(company_id=comp.id, code=f"TFA-{uniq}", name="A")
+        b = Community(company_id=comp.id, code=f"TFB-{uniq}", name="B")
+        s.add(a)
+        s.add(b)
+        s.commit()
+        return comp.id, a.id, b.id
+
+
+def add_tariff(**kwargs):
+    with Session(engine) as s:
+        t = TariffWater(**kwargs)
+        s.add(t)
+        s.commit()
+        return t.id
+
+
+def test_community_tariff_overrides_company_fallback():
+    company_id, comm_a, comm_b = make_scope()
+    add_tariff(company_id=company_id, cold_price=Decimal("2"), hot_price=Decimal("5"))
+    add_tariff(community_id=comm_a, cold_price=Decimal("3"), hot_price=Decimal("6"))
+
+    table = get_tariff_table()
+    assert table.resolve(company_id, comm_a, ON).cold_price == Decimal("3")
+    assert table.resolve(company_id, comm_b, ON).hot_price == Decimal("5")
+    assert table.resolve(-1, -1, ON) is None
+
+
+def test_cache_is_reused_and_dropped_on_tariff_commit():
+    company_id, comm_a, _ = make_scope()
+    invalidate_tariff_cache()
+    table = get_tariff_table()
+    assert get_tariff_table() is table
+    assert table.resolve(company_id, comm_a, ON) is None
+
+    # a rolled back write keeps the cached table
+    with Session(engine) as s:
+        s.add(TariffWater(company_id=company_id, cold_price=Decimal("9")))
+        s.flush()
+        s.rollback()
+    assert get_tariff_table() is table
+
+    tariff_id = add_tariff(company_id=company_id, cold_price=Decimal("4"))
+    fresh = get_tariff_table()
+    assert fresh is not table
+    assert fresh.resolve(company_id, comm_a, ON).tariff_id == tariff_id
+
+    with Session(engine) as s:
+        s.delete(s.get(TariffWater, tariff_id))
+        s.commit()
+    assert get_tariff_table().resolve(company_id, comm_a, ON) is None
+
+
+def test_effective_dated_tariffs_resolve_by_cycle_date():
+    company_id, comm_a, _ = make_scope()
+    add_tariff(
+        company_id=company_id,
+        cold_price=Decimal("1"),
+        effective_to=date(2026, 12, 31),
+    )
+    add_tariff(
+        community_id=comm_a,
+        cold_price=Decimal("2"),
+        effective_to=date(2026, 5, 31),
+    )
+    add_tariff(
+        community_id=comm_a,
+        cold_price=Decimal("3"),
+        effective_from=date(2026, 7, 1),
+    )
+
+    table = get_tariff_table()
+
+    def cold(on):
+        price = table.resolve(company_id, comm_a, on)
+        return price.cold_price if price else None
+
+    assert cold(date(2025, 1, 1)) == Decimal("2")
+    assert cold(date(2026, 5, 31)) == Decimal("2")
+    # community gap in June falls back to the company tariff
+    assert cold(date(2026, 6, 15)) == Decimal("1")
+    assert cold(date(2026, 7, 1)) == Decimal("3")
+    assert cold(date(2030, 1, 1)) == Decimal("3")
+
+
+def test_overlapping_tariff_periods_are_rejected():
+    company_id, comm_a, _ = make_scope()
+    add_tariff(
+        community_id=comm_a,
+        effective_from=date(2026, 1, 1),
+        effective_to=date(2026, 6, 30),
+    )
+    with pytest.raises(ValueError):
+        add_tariff(community_id=comm_a, effective_from=date(2026, 6, 30))
+    # two new rows overlapping each other within one flush
+    with pytest.raises(ValueError):
+        with Session(engine) as s:
+            s.add(TariffWater(company_id=company_id))
+            s.add(TariffWater(company_id=company_id))
+            s.commit()
+    # adjacent periods and other scopes are fine
+    add_tariff(community_id=comm_a, effective_from=date(2026, 7, 1))
+    add_tariff(company_id=company_id)
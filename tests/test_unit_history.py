@@ -0,0 +1,176 @@
+from datetime import date, datetime
+from decimal import Decimal
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.auth import get_password_hash
+from app.db import engine, init_db
+from app.main import app
+from app.models import (
+    Bill,
+    Building,
+    Community,
+    Company,
+    Lease,
+    Payment,
+    Tenant,
+    Unit,
+    User,
+)
+
+
+def setup_module(module):
+    init_db()
+
+
+def make_user(username, password, role):
+    with Session(engine) as session:
+        existing = session.exec(select(User).where(User.username == username)).first()
+        if existing:
+            return existing
+        u = User(
+            username=username, password_hash=get_password_hash(password), role=role
+        )
+        session.add(u)
+        session.commit()
+        return u
+
+
+def create_unit_with_history():
+    uniq = uuid.uuid4().hex[:8]
+    with Session(engine) as s:
+        comp = Company(code=f"H-{uniq}", name="Hist Co")
+        s.add(comp)
+        s.flush()
+        comm = Community(company_id=comp.id, code=f"HC-{uniq}", name="Comm")
+        s.add(comm)
+        s.flush()
+        bld = Building(community_id=comm.id, code=f"HB-{uniq}", name="Bld")
+        s.add(bld)
+        s.flush()
+        u = Unit(building_id=bld.id, unit_no="H1")
+        s.add(u)
+        s.flush()
+        t = Tenant(name=f"hist-{uniq}")
+        s.add(t)
+        s.flush()
+        s.add(
+            Lease(
+                unit_id=u.id,
+                tenant_id=t.id,
+                start_date=date(2025, 1, 1),
+                end_date=date(2025, 12, 31),
+                rent_amount=Decimal("500"),
+            )
+        )
+        s.add(
+            Lease(
+                unit_id=u.id,
+                tenant_id=t.id,
+                start_date=date(2026, 1, 1),
+                end_date=None,
+                rent_amount=Decimal("600"),
+            )
+        )
+        for month in (11, 12):
+            s.add(
+                Bill(
+                    unit_id=u.id,
+                    cycle_start=date(2025, month, 1),
+                    cycle_end=date(2025, month, 28),
+                    status="issued",
+                    total_amount=Decimal("500"),
+                )
+            )
+        bill = Bill(
+            unit_id=u.id,
+            cycle_start=date(2026, 1, 1),
+            cycle_end=date(2026, 1, 31),
+            status="issued",
+            total_amount=Decimal("600"),
+        )
+        s.add(bill)
+        s.flush()
+        s.add(
+            Payment(
+                unit_id=u.id,
+                bill_id=bill.id,
+                amount=Decimal("600"),
+                received_at=datetime(2026, 1, 5, 9, 30),
+            )
+        )
+        # same calendar day as the 2026 lease/bill: ordered by time then kind
+        s.add(
+            Payment(
+                unit_id=u.id, amount=Decimal("50"), received_at=datetime(2026, 1, 1)
+            )
+        )
+        s.commit()
+        return u.id
+
+
+def test_unit_history_pages_cover_stream_in_order():
+    client = TestClient(app)
+    make_user("hist_clerk", "cpass", "clerk")
+    r = client.post(
+        "/api/auth/token", data={"username": "hist_clerk", "password": "cpass"}
+    )
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    unit_id = create_unit_with_history()
+
+    r = client.get(
+        f"/api/v1/units/{unit_id}/history", params={"limit": 100}, headers=headers
+    )
+    assert r.status_code == 200
+    full = r.json()
+    assert full["next_cursor"] is None
+    kinds = [(i["kind"], i["date"][:10]) for i in full["items"]]
+    assert kinds == [
+        ("payment", "2026-01-05"),
+        ("payment", "2026-01-01"),
+        ("lease", "2026-01-01"),
+        ("bill", "2026-01-01"),
+        ("bill", "2025-12-01"),
+        ("bill", "2025-11-01"),
+        ("lease", "2025-01-01"),
+    ]
+    assert full["items"][3]["total_amount"] == "600.0000"
+
+    paged = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get(
+            f"/api/v1/units/{unit_id}/history", params=params, headers=headers
+        )
+        assert r.status_code == 200
+        page = r.json()
+        paged.extend(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert [(i["kind"], i["id"]) for i in paged] == [
+        (i["kind"], i["id"]) for i in full["items"]
+    ]
+
+
+def test_unit_history_errors():
+    client = TestClient(app)
+    make_user("hist_clerk", "cpass", "clerk")
+    r = client.post(
+        "/api/auth/token", data={"username": "hist_clerk", "password": "cpass"}
+    )
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    r = client.get("/api/v1/units/99999999/history", headers=headers)
+    assert r.status_code == 404
+    unit_id = create_unit_with_history()
+    r = client.get(
+        f"/api/v1/units/{unit_id}/history",
+        params={"cursor": "nope"},
+        headers=headers,
+    )
+    assert r.status_code == 400